@@ -1,22 +1,222 @@
-from decimal import Decimal, getcontext
-import random
-import time
+from decimal import Decimal
 import os
+import numpy as np
+import pandas as pd
 # from google import genai
 import google.generativeai as genai
 import yfinance as yf
 import requests
-from .models import ( SimulationResponse, DailyResult, TradeResult, GoalPlannerResponse, HealthAnalysisResponse )
+from .models import ( SimulationResponse, SweepResponse, OptimizeResponse, PortfolioResponse, DailyResult, TradeResult, GoalPlannerResponse, GoalSolveResponse, HealthAnalysisResponse )
+from .monte_carlo import simulate_paths, simulate_to_precision, sweep_paths, simulate_portfolio, equity_curve, fan_bands, PrecisionTracker, FAN_PERCENTILES
+from .exact import solve_exact, quantile
+from .optimizer import kelly_fraction, search_risk, solve_goal
+from .payoffs import payoff_table, build_alias_table, signed_outcomes, sample, TABLE_SIZE
+from .rng import new_seed, stream, PROJECTION_STREAM
+from .market_cache import market_cache
+from .symbols import normalize_symbol
 
-# Set precision for Decimal calculations
-getcontext().prec = 28
+# Market cache key prefix of watchlist rows
+_BAR = "bar:"
 
-# Simple in-memory cache for market prices
-# Cache format: {symbol: (price_data, timestamp)}
-_price_cache = {}
-_CACHE_DURATION = 30  # seconds
+# Trades generated at a time by the deterministic projection
+_PROJECTION_CHUNK = 1 << 16
+# numpy's hypergeometric sampler takes fewer than 1e9 items of each kind
+_HYPERGEOMETRIC_MAX = 10 ** 9
 
-def calculate_compounding(request):
+# Cells (paths x trades) per streamed Monte Carlo batch
+_STREAM_BATCH_CELLS = 10 ** 7
+
+# Smallest share of a sweep's paths worth shipping to another pool process
+_SWEEP_MIN_PART = 250
+
+# Paths used for the (path dependent) drawdown and fan chart estimates when the outcome distribution is exact
+_DRAWDOWN_PATHS = 500
+
+# Columns of the deterministic projection's daily breakdown and trade log
+_DAILY_COLUMNS = ("day", "start_balance", "profit_loss", "end_balance", "roi")
+_TRADE_COLUMNS = ("trade_no", "day", "is_win", "pnl", "balance")
+
+def _fan_chart(paths):
+    """Per-day percentile bands of a run as parallel numeric arrays for the chart,
+    with the number of paths they are taken over."""
+    fan_balance, fan_drawdown = fan_bands(paths)
+    return {
+        "day": list(range(1, len(fan_balance) + 1)),
+        "paths": paths["day_balances"].shape[0],
+        "balance": {f"p{q}": np.round(fan_balance[:, i], 2).tolist() for i, q in enumerate(FAN_PERCENTILES)},
+        "drawdown": {f"p{q}": np.round(fan_drawdown[:, i], 2).tolist() for i, q in enumerate(FAN_PERCENTILES)},
+    }
+
+def _daily_rows(daily):
+    return [
+        DailyResult(day=day, start_balance=f"{start:.2f}", profit_loss=f"{pnl:.2f}", end_balance=f"{end:.2f}", roi=f"{roi:.2f}%")
+        for day, start, pnl, end, roi in zip(*(daily[name].tolist() for name in _DAILY_COLUMNS))
+    ]
+
+def _trade_rows(trades):
+    return [
+        TradeResult(trade_no=trade_no, day=day, result="WIN" if is_win else "LOSS", pnl=f"{pnl:.2f}", balance=f"{balance:.2f}")
+        for trade_no, day, is_win, pnl, balance in zip(*(trades[name].tolist() for name in _TRADE_COLUMNS))
+    ]
+
+def _columns(columns, money):
+    """Numeric columns as plain lists, rounding the `money` columns to cents."""
+    return {name: (np.round(values, 2) if name in money else values).tolist() for name, values in columns.items()}
+
+def _payoff_tables(request, rr_ratio):
+    """(win, loss, slippage) alias tables when the request has payoff distributions, else None."""
+    if request.win_payoff is None and request.loss_payoff is None and request.slippage is None:
+        return None
+    return (
+        payoff_table(request.win_payoff) if request.win_payoff is not None else build_alias_table([rr_ratio], [1.0]),
+        payoff_table(request.loss_payoff) if request.loss_payoff is not None else build_alias_table([1.0], [1.0]),
+        payoff_table(request.slippage) if request.slippage is not None else None,
+    )
+
+def _bootstrap_sequence(rng, returns, total_trades, block):
+    """Circular block bootstrap of `total_trades` R-multiples from `returns`."""
+    starts = rng.integers(returns.size, size=-(-total_trades // block))
+    index = (starts[:, None] + np.arange(block)).ravel()[:total_trades] % returns.size
+    return returns[index]
+
+def _sampled_estimates(paths):
+    """Worst case (p5), median, best case (p95), ruin probability (%) and average max drawdown (%) of sampled paths."""
+    final_balances = np.sort(paths["final_balances"])
+    median_result = final_balances[len(final_balances)//2]
+    worst_case = final_balances[int(len(final_balances)*0.05)] # Bottom 5%
+    best_case = final_balances[int(len(final_balances)*0.95)] # Top 5%
+    return worst_case, median_result, best_case, paths["ruined"].mean() * 100, paths["max_drawdowns"].mean()
+
+def _outcome_model(request, returns):
+    """(recorded returns as an array or None, payoff tables or None) of a SimulationRequest."""
+    if request.outcome_model == "bootstrap":
+        if returns is None or len(returns) == 0:
+            raise ValueError("Bootstrap simulation needs recorded trades")
+        # Recorded trades already carry their own payoffs
+        return np.asarray(returns, dtype=np.float64), None
+    return None, _payoff_tables(request, float(request.risk_reward_ratio))
+
+def _chunk_wins(rng, wins_left, trades_left, width):
+    """Next `width` outcomes of a shuffled sequence holding `wins_left` wins in `trades_left` trades.
+
+    The chunk's win count is hypergeometric, so chunk after chunk the sequence
+    is a uniform shuffle with exactly the requested number of wins.
+    """
+    if width >= trades_left:
+        count = wins_left
+    elif max(wins_left, trades_left - wins_left) < _HYPERGEOMETRIC_MAX:
+        count = rng.hypergeometric(wins_left, trades_left - wins_left, width)
+    else:
+        # numpy's hypergeometric stops at 1e9 of each kind; a binomial is indistinguishable there
+        count = min(max(rng.binomial(width, wins_left / trades_left), width - (trades_left - wins_left)), wins_left)
+    return rng.permutation(width) < count
+
+def _projection(request, seed, returns, payoffs):
+    """Deterministic projection: one representative equity curve for the main chart.
+
+    Computed on arrays, _PROJECTION_CHUNK trades at a time, so memory stays
+    bounded whatever the horizon and trades per day. The balance after every
+    trade comes from the same cumulative product / sum as the Monte Carlo
+    paths, and trading stops at the first trade that leaves no balance.
+    Returns the daily breakdown and the first 100 trades as dicts of numeric
+    columns (formatted only when the response is built), and the final balance.
+    """
+    initial_balance = float(request.initial_balance)
+    risk_per_trade = float(request.risk_per_trade) / 100
+    rr_ratio = float(request.risk_reward_ratio)
+    win_rate = float(request.win_rate) / 100
+    trades_per_day = request.trades_per_day
+    fees = float(request.fees_per_trade)
+    total_trades = request.simulation_days * trades_per_day
+
+    # Creates a "representative" equity curve based on the win rate
+    projection_rng = stream(seed, PROJECTION_STREAM)
+    chunk = _PROJECTION_CHUNK
+    if returns is not None:
+        # Whole bootstrap blocks per chunk
+        chunk -= chunk % request.bootstrap_block
+    else:
+        # Exactly this many wins, shuffled to make the daily log look realistic
+        wins_left = int(total_trades * win_rate)
+        if payoffs is not None:
+            signed, slippage_table = signed_outcomes(payoffs[0], payoffs[1]), payoffs[2]
+
+    # Balance after the last trade of every day; the ruinous trade ends its day
+    day_end = np.empty(request.simulation_days)
+    balance = initial_balance
+    trades = None
+    for first in range(0, total_trades, chunk):
+        width = min(chunk, total_trades - first)
+        if returns is not None:
+            # One resampled history, in R-multiples (profit per unit of risk)
+            outcomes = _bootstrap_sequence(projection_rng, returns, width, request.bootstrap_block)
+            # A recorded trade won when it made money
+            wins = outcomes > 0
+        else:
+            wins = _chunk_wins(projection_rng, wins_left, total_trades - first, width)
+            wins_left -= int(wins.sum())
+            if payoffs is None:
+                outcomes = np.where(wins, rr_ratio, -1.0)
+            else:
+                bits = projection_rng.integers(0, 2 ** 64, size=width, dtype=np.uint64)
+                outcomes = sample(signed, bits >> np.uint64(32), offset=(~wins) * TABLE_SIZE)
+                if slippage_table is not None:
+                    outcomes -= sample(slippage_table, bits)
+
+        curve = equity_curve(initial_balance, outcomes, risk_per_trade, fees, request.risk_type, start_balance=balance)
+        ruin = np.flatnonzero(~(curve > 0))
+        if ruin.size:
+            width = ruin[0] + 1
+            curve = curve[:width]
+            # NaN only appears when a full-risk loss wipes the balance out exactly
+            if np.isnan(curve[-1]):
+                curve[-1] = 0.0
+
+        if trades is None:
+            # Log first 100 trades for UI; a win pays rr_ratio R, a loss costs 1R.
+            # Wins are the drawn ones: with slippage a win can still lose money
+            logged = min(width, 100)
+            before = np.concatenate([[initial_balance], curve[:logged - 1]])
+            risk_amount = before * risk_per_trade if request.risk_type == "dynamic" else initial_balance * risk_per_trade
+            trades = {
+                "trade_no": np.arange(1, logged + 1),
+                "day": np.arange(logged) // trades_per_day + 1,
+                "is_win": wins[:logged],
+                "pnl": risk_amount * outcomes[:logged] - fees,
+                "balance": curve[:logged],
+            }
+
+        last_trades = np.arange(first + (trades_per_day - 1 - first) % trades_per_day, first + width, trades_per_day)
+        day_end[last_trades // trades_per_day] = curve[last_trades - first]
+        balance = curve[-1]
+        if ruin.size:
+            day_end[(first + width - 1) // trades_per_day] = balance
+            break
+
+    # Days run until the one with the ruinous trade; its end balance is floored at 0
+    days = -(-(first + width) // trades_per_day)
+    end_balance = day_end[:days]
+    start_balance = np.concatenate([[initial_balance], end_balance[:-1]])
+    profit_loss = end_balance - start_balance
+    end_balance = np.maximum(end_balance, 0.0)
+    daily = {
+        "day": np.arange(1, days + 1),
+        "start_balance": start_balance,
+        "profit_loss": profit_loss,
+        "end_balance": end_balance,
+        "roi": (end_balance - start_balance) / start_balance * 100,
+    }
+    return daily, trades, float(end_balance[-1])
+
+def calculate_compounding(request, returns=None, columnar=False):
+    """Run the deterministic projection and the outcome distribution for a SimulationRequest.
+
+    With outcome_model "bootstrap", `returns` holds the user's recorded trades as
+    R-multiples (see trade_history) and every trade is resampled from them.
+
+    Returns a SimulationResponse, or with `columnar` a plain dict whose
+    daily_breakdown and trade_log are parallel numeric arrays (no per-row models).
+    """
     initial_balance = float(request.initial_balance)
     # capital_utilization is used for margin logic, but for simple compounding usually risk is based on total equity
     # We will assume risk % is based on total account balance for dynamic, or initial for fixed.
@@ -29,160 +229,314 @@ def calculate_compounding(request):
     risk_type = request.risk_type
 
     total_trades = days * trades_per_day
+    # One seed drives every random draw of the run; it is returned so the run can be replayed
+    seed = request.seed if request.seed is not None else new_seed()
     
+    bootstrap = request.outcome_model == "bootstrap"
+    returns, payoffs = _outcome_model(request, returns)
+
     # --- 1. Deterministic Projection (For the main chart) ---
-    # Creates a "representative" equity curve based on the win rate
-    
-    daily_results = []
-    current_balance = initial_balance
-    trade_log = []
-    
-    # Create a deterministic sequence of wins/losses based on winrate
-    wins_needed = int(total_trades * win_rate)
-    losses_needed = total_trades - wins_needed
-    outcomes = [True] * wins_needed + [False] * losses_needed
-    random.shuffle(outcomes) # Shuffle to make the daily log look realistic
-    
-    trade_counter = 0
-    
-    for day in range(1, days + 1):
-        start_bal = current_balance
-        daily_pnl = 0
-        
-        for _ in range(trades_per_day):
-            if current_balance <= 0: break
-            if trade_counter >= len(outcomes): break
-            is_win = outcomes[trade_counter]
-            trade_counter += 1
-            
-            # Calculate Risk Amount
-            if risk_type == "dynamic":
-                risk_amount = current_balance * risk_per_trade
-            else: # fixed
-                risk_amount = initial_balance * risk_per_trade
-            
-            # Calculate PnL
-            trade_pnl = 0
-            if is_win:
-                trade_pnl = (risk_amount * rr_ratio) - fees
-            else:
-                trade_pnl = -risk_amount - fees
-            
-            current_balance += trade_pnl
-            daily_pnl += trade_pnl
-            
-            # Log first 100 trades for UI
-            if len(trade_log) < 100:
-                trade_log.append(TradeResult(
-                    trade_no=trade_counter,
-                    day=day,
-                    result="WIN" if is_win else "LOSS",
-                    pnl=f"{trade_pnl:.2f}",
-                    balance=f"{current_balance:.2f}"
-                ))
-
-        if current_balance <= 0:
-            current_balance = 0
-            
-        roi = ((current_balance - start_bal) / start_bal * 100) if start_bal > 0 else 0
-        
-        daily_results.append(DailyResult(
-            day=day,
-            start_balance=f"{start_bal:.2f}",
-            profit_loss=f"{daily_pnl:.2f}",
-            end_balance=f"{current_balance:.2f}",
-            roi=f"{roi:.2f}%"
-        ))
-        
-        if current_balance <= 0:
-            break
+    daily, trades, current_balance = _projection(request, seed, returns, payoffs)
 
-    # --- 2. Monte Carlo Simulation (The Optimization) ---
-    # Run 500 parallel universes to find the probability of ruin and range of outcomes
-    
-    iterations = 500
-    final_balances = []
-    ruin_count = 0
-    max_drawdowns = []
+    # --- 2. Outcome Distribution ---
+    # Exact mode solves the terminal-balance distribution and ruin probability
+    # directly (binomial / DP over the win count). When the model is path
+    # dependent (dynamic risk with fees) it falls back to the Monte Carlo.
     
-    for _ in range(iterations):
-        mc_balance = initial_balance
-        mc_peak = initial_balance
-        mc_drawdown = 0
-        
-        # Simulate trades for this iteration
-        for _ in range(total_trades):
-            if mc_balance <= 0:
-                break
-            
-            # Randomize outcome based on win rate
-            is_win = random.random() < win_rate
-            
-            if risk_type == "dynamic":
-                risk_amt = mc_balance * risk_per_trade
-            else:
-                risk_amt = initial_balance * risk_per_trade
-                
-            if is_win:
-                pnl = (risk_amt * rr_ratio) - fees
-            else:
-                pnl = -risk_amt - fees
-            
-            mc_balance += pnl
-            
-            # Track Drawdown
-            if mc_balance > mc_peak:
-                mc_peak = mc_balance
-            
-            if mc_peak > 0:
-                dd = (mc_peak - mc_balance) / mc_peak * 100
-                if dd > mc_drawdown:
-                    mc_drawdown = dd
-        
-        if mc_balance <= 0:
-            ruin_count += 1
-            mc_balance = 0
-            
-        final_balances.append(mc_balance)
-        max_drawdowns.append(mc_drawdown)
+    distribution = None
+    if request.probability_method == "exact" and not bootstrap and payoffs is None:
+        distribution = solve_exact(initial_balance, risk_per_trade, rr_ratio, win_rate, fees, risk_type, total_trades)
 
-    final_balances.sort()
-    median_result = final_balances[len(final_balances)//2]
-    worst_case = final_balances[int(len(final_balances)*0.05)] # Bottom 5%
-    best_case = final_balances[int(len(final_balances)*0.95)] # Top 5%
-    
-    ruin_probability = (ruin_count / iterations) * 100
-    avg_max_drawdown = sum(max_drawdowns) / len(max_drawdowns)
+    if distribution is not None:
+        method = "exact"
+        iterations = 0
+        worst_case = quantile(distribution, 0.05)
+        median_result = quantile(distribution, 0.5)
+        best_case = quantile(distribution, 0.95)
+        ruin_probability = distribution["ruin_probability"] * 100
+        ruin_stderr = median_stderr = 0.0
+        converged = True
+        # Drawdowns and the daily fan depend on the order of wins and losses, so they are still sampled
+        paths = simulate_paths(
+            initial_balance, risk_per_trade, rr_ratio, win_rate, fees, risk_type,
+            total_trades, _DRAWDOWN_PATHS, seed=seed, sampler="stratified", day_length=trades_per_day
+        )
+        avg_max_drawdown = paths["max_drawdowns"].mean()
+    else:
+        # Run parallel universes to find the probability of ruin and range of outcomes.
+        # Paths are added in batches until the ruin probability and median reach the
+        # requested precision (or the iteration cap is hit).
+        paths = simulate_to_precision(
+            initial_balance, risk_per_trade, rr_ratio, win_rate, fees, risk_type,
+            total_trades, float(request.mc_precision), request.mc_max_iterations,
+            seed=seed, sampler=request.mc_sampler, day_length=trades_per_day,
+            returns=returns if bootstrap else None, block_length=request.bootstrap_block,
+            payoffs=(signed_outcomes(payoffs[0], payoffs[1]), payoffs[2]) if payoffs is not None else None
+        )
+        method = "bootstrap" if bootstrap else "monte_carlo"
+        iterations = paths["iterations"]
+        worst_case, median_result, best_case, ruin_probability, avg_max_drawdown = _sampled_estimates(paths)
+        ruin_stderr, median_stderr, converged = paths["ruin_stderr"], paths["median_stderr"], paths["converged"]
     
     # Summary Metrics
     total_profit = current_balance - initial_balance
     total_roi = (total_profit / initial_balance) * 100 if initial_balance > 0 else 0
     
     # Expectancy Calculation
-    expectancy_val = (initial_balance * risk_per_trade * rr_ratio * win_rate) - (initial_balance * risk_per_trade * (1 - win_rate)) - fees
+    if bootstrap:
+        gains, losses = returns[returns > 0].sum(), -returns[returns < 0].sum()
+        expectancy_val = initial_balance * risk_per_trade * returns.mean() - fees
+        profit_factor = gains / losses if losses > 0 else 999
+    elif payoffs is not None:
+        slip = payoffs[2].mean if payoffs[2] is not None else 0.0
+        gross_win = win_rate * (payoffs[0].mean - slip)
+        gross_loss = (1 - win_rate) * (payoffs[1].mean + slip)
+        expectancy_val = initial_balance * risk_per_trade * (gross_win - gross_loss) - fees
+        profit_factor = gross_win / gross_loss if gross_loss > 0 else 999
+    else:
+        expectancy_val = (initial_balance * risk_per_trade * rr_ratio * win_rate) - (initial_balance * risk_per_trade * (1 - win_rate)) - fees
+        profit_factor = (win_rate * rr_ratio) / (1 - win_rate) if win_rate < 1 else 999
     
-    return SimulationResponse(
+    result = dict(
         status="success",
+        seed=seed,
         summary={
             "initial_balance": f"{initial_balance:.2f}",
             "final_balance": f"{current_balance:.2f}",
             "total_profit": f"{total_profit:.2f}",
             "total_roi": f"{total_roi:.2f}%",
             "max_drawdown": f"{avg_max_drawdown:.2f}%", # Average Max Drawdown from MC is more reliable
-            "profit_factor": f"{((win_rate * rr_ratio) / (1 - win_rate) if win_rate < 1 else 999):.2f}",
+            "profit_factor": f"{profit_factor:.2f}",
             "expectancy": f"{expectancy_val:.2f}",
             "risk_of_ruin": f"{ruin_probability:.1f}%",
             "day_simulated": days
         },
-        daily_breakdown=daily_results,
         monte_carlo={
+            "method": method,
             "iterations": iterations,
             "worst_case": f"{worst_case:.2f}",
             "median": f"{median_result:.2f}",
             "best_case": f"{best_case:.2f}",
-            "ruin_probability": f"{ruin_probability:.1f}"
+            "ruin_probability": f"{ruin_probability:.1f}",
+            "ruin_probability_stderr": f"{ruin_stderr:.2f}",
+            "median_stderr": f"{median_stderr:.2f}",
+            "converged": converged
         },
-        trade_log=trade_log
+        fan_chart=_fan_chart(paths)
+    )
+    if bootstrap:
+        result["monte_carlo"]["recorded_trades"] = len(returns)
+    if columnar:
+        result["daily_breakdown"] = _columns(daily, money=("start_balance", "profit_loss", "end_balance", "roi"))
+        result["trade_log"] = _columns(trades, money=("pnl", "balance"))
+        return result
+    return SimulationResponse(daily_breakdown=_daily_rows(daily), trade_log=_trade_rows(trades), **result)
+
+def calculate_compounding_columnar(request, returns=None):
+    return calculate_compounding(request, returns, columnar=True)
+
+def calculate_projection(request, returns=None):
+    """Deterministic part of calculate_compounding, for streaming.
+
+    `request` must carry its seed. Returns the final balance and the columnar
+    daily breakdown and trade log.
+    """
+    returns, payoffs = _outcome_model(request, returns)
+    daily, trades, final_balance = _projection(request, request.seed, returns, payoffs)
+    return {
+        "final_balance": round(final_balance, 2),
+        "daily_breakdown": _columns(daily, money=("start_balance", "profit_loss", "end_balance", "roi")),
+        "trade_log": _columns(trades, money=("pnl", "balance")),
+    }
+
+def simulation_tracker(request):
+    """PrecisionTracker for streaming a SimulationRequest's Monte Carlo, with
+    batches small enough to report progress a few times a second."""
+    total_trades = request.simulation_days * request.trades_per_day
+    max_batch = max(_STREAM_BATCH_CELLS // total_trades, 2)
+    return PrecisionTracker(float(request.mc_precision), request.mc_max_iterations, max_batch=max_batch,
+                            log_scale=request.risk_type == "dynamic",
+                            sampler="random" if request.outcome_model == "bootstrap" else request.mc_sampler)
+
+def run_simulation_batch(request, first_path, paths, returns=None):
+    """Monte Carlo paths first_path.. first_path + paths of a SimulationRequest (with its seed).
+
+    Paths depend only on the seed and their global id, so batches add up to
+    the same run as calculate_compounding's, batch for batch.
+    """
+    returns, payoffs = _outcome_model(request, returns)
+    return simulate_paths(
+        float(request.initial_balance), float(request.risk_per_trade) / 100, float(request.risk_reward_ratio),
+        float(request.win_rate) / 100, float(request.fees_per_trade), request.risk_type,
+        request.simulation_days * request.trades_per_day, paths, seed=request.seed, sampler=request.mc_sampler,
+        day_length=request.trades_per_day, first_path=first_path, returns=returns, block_length=request.bootstrap_block,
+        payoffs=(signed_outcomes(payoffs[0], payoffs[1]), payoffs[2]) if payoffs is not None else None
+    )
+
+def monte_carlo_estimate(request, tracker):
+    """Current monte_carlo block (as in SimulationResponse) of a streaming tracker."""
+    paths = tracker.result()
+    worst_case, median_result, best_case, ruin_probability, avg_max_drawdown = _sampled_estimates(paths)
+    return {
+        "method": "bootstrap" if request.outcome_model == "bootstrap" else "monte_carlo",
+        "iterations": tracker.iterations,
+        "worst_case": f"{worst_case:.2f}",
+        "median": f"{median_result:.2f}",
+        "best_case": f"{best_case:.2f}",
+        "ruin_probability": f"{ruin_probability:.1f}",
+        "ruin_probability_stderr": f"{tracker.ruin_stderr:.2f}",
+        "median_stderr": f"{tracker.median_stderr:.2f}",
+        "avg_max_drawdown": f"{avg_max_drawdown:.2f}",
+        "converged": tracker.converged,
+    }
+
+def stream_fan_chart(tracker):
+    return _fan_chart(tracker.result())
+
+def split_sweep(request, parts):
+    """Fix the seed of a SweepRequest and split its paths into up to `parts` jobs.
+
+    Returns (request, first_path, paths) tuples for run_sweep_part. Draws depend
+    only on the seed and the global path id, so the split doesn't change the result.
+    """
+    if request.seed is None:
+        request = request.model_copy(update={"seed": new_seed()})
+    parts = max(1, min(parts, request.iterations // _SWEEP_MIN_PART))
+    bounds = np.linspace(0, request.iterations, parts + 1).astype(int)
+    return [(request, int(first), int(last - first)) for first, last in zip(bounds[:-1], bounds[1:])]
+
+def run_sweep_part(request, first_path, paths):
+    """Simulate paths [first_path, first_path + paths) of every sweep cell."""
+    cells = [
+        (float(w) / 100, float(r) / 100, float(rr))
+        for w in request.axis("win_rate") for r in request.axis("risk_per_trade") for rr in request.axis("risk_reward_ratio")
+    ]
+    return sweep_paths(
+        float(request.initial_balance), cells, float(request.fees_per_trade), request.risk_type,
+        request.simulation_days * request.trades_per_day, paths, request.seed, first_path=first_path
+    )
+
+def combine_sweep(request, results):
+    """Merge the run_sweep_part results of one split_sweep into a SweepResponse."""
+    axes = [request.axis(name) for name in ("win_rate", "risk_per_trade", "risk_reward_ratio")]
+    shape = tuple(len(axis) for axis in axes)
+    final_balances = np.sort(np.concatenate([r["final_balances"] for r in results], axis=1), axis=1)
+    ruined = np.concatenate([r["ruined"] for r in results], axis=1)
+    max_drawdowns = np.concatenate([r["max_drawdowns"] for r in results], axis=1)
+    n = final_balances.shape[1]
+
+    def matrix(values):
+        return np.round(values, 2).reshape(shape).tolist()
+
+    return SweepResponse(
+        status="success",
+        seed=request.seed,
+        iterations=n,
+        win_rate=[float(v) for v in axes[0]],
+        risk_per_trade=[float(v) for v in axes[1]],
+        risk_reward_ratio=[float(v) for v in axes[2]],
+        median=matrix(final_balances[:, n // 2]),
+        p5=matrix(final_balances[:, int(n * 0.05)]),
+        ruin_probability=matrix(ruined.mean(axis=1) * 100),
+        avg_max_drawdown=matrix(max_drawdowns.mean(axis=1)),
+    )
+
+def calculate_optimal_risk(request):
+    """Search risk_per_trade (and optionally trades_per_day) for the highest median
+    final balance whose ruin probability and average max drawdown stay within bounds."""
+    initial_balance = float(request.initial_balance)
+    win_rate = float(request.win_rate) / 100
+    rr_ratio = float(request.risk_reward_ratio)
+    fees = float(request.fees_per_trade)
+    max_drawdown = float(request.max_drawdown) if request.max_drawdown is not None else None
+    seed = request.seed if request.seed is not None else new_seed()
+    kelly = kelly_fraction(win_rate, rr_ratio)
+
+    candidates = []
+    best = None
+    iterations = 0
+    for trades_per_day in sorted({request.trades_per_day, *request.trades_per_day_options}):
+        search = search_risk(
+            initial_balance, win_rate, rr_ratio, fees, request.risk_type,
+            request.simulation_days * trades_per_day, seed,
+            float(request.max_ruin_probability), max_drawdown
+        )
+        if search is None:
+            break
+        iterations = search["paths"] if not iterations else min(iterations, search["paths"])
+        for i, (risk, median, ruin, drawdown) in enumerate(search["rows"]):
+            candidate = {
+                "risk_per_trade": round(risk * 100, 4),
+                "trades_per_day": trades_per_day,
+                "median_final_balance": round(median, 2),
+                "ruin_probability": round(ruin, 2),
+                "avg_max_drawdown": round(drawdown, 2),
+            }
+            candidates.append(candidate)
+            if i == search["best"] and (best is None or median > best["median_final_balance"]):
+                best = candidate
+
+    result = dict(status="success", seed=seed, kelly_fraction=f"{kelly * 100:.2f}", iterations=iterations, candidates=candidates)
+    if kelly <= 0:
+        return OptimizeResponse(feasible=False, message="No positive edge: the expected return per trade is negative at any risk size.", **result)
+    if best is None:
+        return OptimizeResponse(feasible=False, message="No risk size meets the ruin and drawdown limits; loosen them or lower the fees.", **result)
+    return OptimizeResponse(
+        feasible=True,
+        risk_per_trade=f"{best['risk_per_trade']:.2f}",
+        trades_per_day=best["trades_per_day"],
+        median_final_balance=f"{best['median_final_balance']:.2f}",
+        ruin_probability=f"{best['ruin_probability']:.1f}",
+        avg_max_drawdown=f"{best['avg_max_drawdown']:.2f}",
+        message=f"Risk {best['risk_per_trade']:.2f}% per trade ({best['risk_per_trade'] / (kelly * 100):.2f}x Kelly) maximizes the median within your limits.",
+        **result
+    )
+
+def calculate_portfolio(request):
+    """Monte Carlo of several strategies compounding (or not) one shared balance."""
+    initial_balance = float(request.initial_balance)
+    strategies = request.strategies
+    seed = request.seed if request.seed is not None else new_seed()
+    paths = simulate_portfolio(
+        initial_balance,
+        [float(s.win_rate) / 100 for s in strategies],
+        [float(s.risk_per_trade) / 100 for s in strategies],
+        [float(s.risk_reward_ratio) for s in strategies],
+        [float(s.fees_per_trade) for s in strategies],
+        [s.trades_per_day for s in strategies],
+        request.simulation_days, request.risk_type, request.iterations, seed,
+        correlation=np.array(request.correlation, dtype=np.float64) if request.correlation is not None else None
+    )
+
+    final_balances = paths["final_balances"]
+    p5, p25, p50, p75, p95 = np.percentile(final_balances, [5, 25, 50, 75, 95])
+    mean_pnl = paths["contributions"].mean(axis=0)
+    total_pnl = mean_pnl.sum()
+    return PortfolioResponse(
+        status="success",
+        seed=seed,
+        iterations=request.iterations,
+        summary={
+            "initial_balance": f"{initial_balance:.2f}",
+            "mean_final_balance": f"{final_balances.mean():.2f}",
+            "p5": f"{p5:.2f}",
+            "p25": f"{p25:.2f}",
+            "median": f"{p50:.2f}",
+            "p75": f"{p75:.2f}",
+            "p95": f"{p95:.2f}",
+            "ruin_probability": f"{paths['ruined'].mean() * 100:.1f}",
+            "avg_max_drawdown": f"{paths['max_drawdowns'].mean():.2f}",
+            "day_simulated": request.simulation_days
+        },
+        strategies=[
+            {
+                "name": s.name,
+                "mean_pnl": f"{pnl:.2f}",
+                # Share of the portfolio's mean P&L; only meaningful when the total is not ~0
+                "share": f"{pnl / total_pnl * 100:.1f}%" if abs(total_pnl) > 1e-9 else "n/a",
+            }
+            for s, pnl in zip(strategies, mean_pnl)
+        ]
     )
 
 def calculate_goal_plan(request):
@@ -207,60 +561,126 @@ def calculate_goal_plan(request):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+def calculate_goal_requirements(request):
+    """Smallest win rate or risk per trade (%) reaching each goal's target by its
+    deadline with the requested probability, all goals solved together."""
+    seed = request.seed if request.seed is not None else new_seed()
+    trades_per_month = request.days_per_month * request.trades_per_day
+    required, reach = solve_goal(
+        float(request.initial_balance), request.solve_for,
+        float(request.win_rate) / 100 if request.win_rate is not None else None,
+        float(request.risk_per_trade) / 100 if request.risk_per_trade is not None else None,
+        float(request.risk_reward_ratio), float(request.fees_per_trade), request.risk_type,
+        [float(goal.target_balance) for goal in request.goals],
+        [goal.deadline_months * trades_per_month for goal in request.goals],
+        float(request.probability) / 100, request.iterations, seed
+    )
+    return GoalSolveResponse(
+        status="success",
+        seed=seed,
+        solve_for=request.solve_for,
+        probability=f"{request.probability:.1f}",
+        iterations=request.iterations,
+        goals=[
+            {
+                "target_balance": f"{goal.target_balance:.2f}",
+                "deadline_months": goal.deadline_months,
+                "feasible": feasible,
+                # Required win rate / risk (%), and the estimated chance of reaching the target with it
+                "required": f"{value * 100:.2f}" if feasible else None,
+                "probability": f"{chance * 100:.1f}" if feasible else None,
+            }
+            for goal, value, chance, feasible in zip(request.goals, required, reach, np.isfinite(required).tolist())
+        ]
+    )
+
+def _fetch_market_price(norm_symbol):
+    ticker = yf.Ticker(norm_symbol)
+    info = ticker.info
+    price = info.get('regularMarketPrice') or info.get('currentPrice')
+
+    if price is None:
+        # Fallback to history
+        hist = ticker.history(period="1d")
+        if not hist.empty:
+            price = hist['Close'].iloc[-1]
+        else:
+            raise ValueError("No price data")
+
+    return {"status": "success", "price": float(price), "symbol": norm_symbol}
+
 def get_market_price(symbol):
-    global _price_cache
-    
-    # Check cache first
-    current_time = time.time()
-    if symbol in _price_cache:
-        cached_data, timestamp = _price_cache[symbol]
-        if current_time - timestamp < _CACHE_DURATION:
-            return cached_data
-    
+    """Latest price of `symbol`, answered from the market cache (see market_cache)."""
     try:
-        # Normalize symbol for yfinance
-        norm_symbol = symbol.upper().replace("BINANCE:", "").replace("PEPE24478", "PEPE").replace("UNI7083", "UNI")
-        norm_symbol = norm_symbol.replace("USDT", "USD")
-        
-        # Commodities direct map
-        if 'XAU' in norm_symbol or 'GOLD' in norm_symbol:
-            norm_symbol = 'GC=F'
-        elif 'XAG' in norm_symbol or 'SILVER' in norm_symbol:
-            norm_symbol = 'SI=F'
-        elif 'OIL' in norm_symbol:
-            norm_symbol = 'CL=F'
-        # Format for Crypto (yfinance needs -USD suffix)
-        elif norm_symbol.endswith("USD") and "-" not in norm_symbol and len(norm_symbol) > 3:
-            if not any(pair in norm_symbol for pair in ['EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'USDCAD']):
-                norm_symbol = f"{norm_symbol[:-3]}-USD"
-        elif norm_symbol in ["BTC", "ETH", "BNB", "SOL", "XRP", "DOGE", "ADA", "PEPE", "UNI"]:
-            norm_symbol = f"{norm_symbol}-USD"
-            
-        # Forex suffix
-        if not '=' in norm_symbol and "-" not in norm_symbol:
-            if any(pair in norm_symbol for pair in ['EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'USDCAD']):
-                norm_symbol += '=X'
-        
-        ticker = yf.Ticker(norm_symbol)
-        info = ticker.info
-        price = info.get('regularMarketPrice') or info.get('currentPrice')
-        
-        if price is None:
-            # Fallback to history
-            hist = ticker.history(period="1d")
-            if not hist.empty:
-                price = hist['Close'].iloc[-1]
-            else:
-                raise ValueError("No price data")
-        
-        result = {"status": "success", "price": float(price), "symbol": norm_symbol}
-        _price_cache[symbol] = (result, current_time)
-        return result
-        
+        norm_symbol = normalize_symbol(symbol)
+        return market_cache.get(f"price:{norm_symbol}", lambda: _fetch_market_price(norm_symbol))
     except Exception as e:
         print(f"yfinance price fetch error for {symbol}: {e}")
         return {"status": "error", "price": 0}
 
+def watchlist_stats(bars, yf_symbols):
+    """Per-symbol arrays (in yf_symbols order) from a bulk download of daily bars.
+
+    Returns (listed, price, change_pct, high, low, volume): the last close and
+    its change against the previous close, and the high, low and volume of the
+    last bar. Symbols trade on different calendars (crypto on weekends, forex
+    not), so every symbol uses its own last two rows with a close. `listed`
+    is False for symbols without data.
+    """
+    n = len(yf_symbols)
+    if bars is None or bars.empty:
+        return (np.zeros(n, dtype=bool),) + tuple(np.zeros(n) for _ in range(5))
+    if not isinstance(bars.columns, pd.MultiIndex):
+        # Older yfinance returns flat columns for a single ticker
+        bars = bars.copy()
+        bars.columns = pd.MultiIndex.from_product([bars.columns, yf_symbols[:1]])
+    fields = {field: bars[field].reindex(columns=yf_symbols).to_numpy(dtype=np.float64)
+              for field in ("Close", "High", "Low", "Volume")}
+
+    close = fields["Close"]
+    has_close = ~np.isnan(close)
+    # Rows with a close at or after each row, so 1 marks the last and 2 the previous one
+    from_end = np.cumsum(has_close[::-1], axis=0)[::-1]
+    last = has_close & (from_end == 1)
+    previous = has_close & (from_end == 2)
+
+    def at(values, rows):
+        return np.nan_to_num(np.where(rows, values, 0.0)).sum(axis=0)
+
+    price = at(close, last)
+    previous_close = at(close, previous)
+    change_pct = np.zeros(n)
+    np.divide(price - previous_close, previous_close, out=change_pct, where=previous_close != 0)
+    return last.any(axis=0), price, change_pct * 100, at(fields["High"], last), at(fields["Low"], last), at(fields["Volume"], last)
+
+def download_watchlist(yf_symbols):
+    """watchlist_stats of the last 2 days of daily bars of every symbol, in one bulk download."""
+    bars = yf.download(yf_symbols, period="2d", interval="1d", group_by="column", progress=False, threads=True)
+    return watchlist_stats(bars, yf_symbols)
+
+def _watchlist_rows(keys):
+    """Market cache key -> (listed, price, change_pct, high, low, volume) of `bar:` keys, in one download."""
+    yf_symbols = [key[len(_BAR):] for key in keys]
+    columns = download_watchlist(yf_symbols)
+    return dict(zip(keys, zip(*(column.tolist() for column in columns))))
+
+def get_watchlist(yf_symbols):
+    """(listed, price, change_pct, high, low, volume) of every symbol from the market cache.
+
+    Symbols missing from the cache are downloaded together; stale ones are
+    refreshed together in the background (see MarketCache.get_many).
+    """
+    keys = [_BAR + yf_symbol for yf_symbol in yf_symbols]
+    rows = market_cache.get_many(keys, _watchlist_rows)
+    return [rows[key] for key in keys]
+
+def refresh_watchlist(yf_symbols, max_age=0.0):
+    """Download the rows of yf_symbols into the market cache, except those
+    refreshed (e.g. by another web worker) less than max_age seconds ago.
+    Returns the downloaded symbols."""
+    keys = market_cache.refresh_many([_BAR + yf_symbol for yf_symbol in yf_symbols], _watchlist_rows, max_age)
+    return [key[len(_BAR):] for key in keys]
+
 def analyze_trade_health(request):
     trades = request.trades
     if not trades:
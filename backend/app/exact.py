@@ -0,0 +1,103 @@
+import numpy as np
+
+# The fixed-risk solver is O(total_trades^2); beyond this the Monte Carlo is cheaper
+EXACT_MAX_TRADES = 20000
+
+
+def binomial_pmf(total_trades, win_rate):
+    """P(W = k) for k = 0..total_trades wins, computed in log space."""
+    if win_rate <= 0 or win_rate >= 1:
+        pmf = np.zeros(total_trades + 1)
+        pmf[total_trades if win_rate >= 1 else 0] = 1.0
+        return pmf
+    k = np.arange(total_trades)
+    # log pmf by the recurrence pmf(k + 1) = pmf(k) * (n - k) / (k + 1) * p / (1 - p)
+    log_pmf = np.empty(total_trades + 1)
+    log_pmf[0] = total_trades * np.log1p(-win_rate)
+    np.cumsum(np.log((total_trades - k) / (k + 1)) + np.log(win_rate / (1 - win_rate)), out=log_pmf[1:])
+    log_pmf[1:] += log_pmf[0]
+    pmf = np.exp(log_pmf - log_pmf.max())
+    pmf /= pmf.sum()
+    return pmf
+
+
+def _fixed_distribution(initial_balance, risk_per_trade, rr_ratio, win_rate, fees, total_trades):
+    """Dynamic programme over the win count of the additive (fixed risk) walk.
+
+    After t trades with W wins the balance is b0 + W * up - (t - W) * down, so the
+    state is W alone. Mass whose balance drops to <= 0 is absorbed as ruin.
+    """
+    risk_amount = initial_balance * risk_per_trade
+    up = risk_amount * rr_ratio - fees
+    down = risk_amount + fees
+
+    alive = np.zeros(total_trades + 1)
+    alive[0] = 1.0
+    ruin = 0.0
+    wins = np.arange(total_trades + 1)
+    for t in range(1, total_trades + 1):
+        # alive[:t] holds trades 0..t-1; shift in place from the top
+        alive[1:t + 1] = alive[1:t + 1] * (1 - win_rate) + alive[:t] * win_rate
+        alive[0] *= 1 - win_rate
+        # Balance increases with W, so ruined states are a prefix
+        ruined_upto = np.searchsorted(initial_balance + wins[:t + 1] * (up + down) - t * down, 0, side="right")
+        if ruined_upto:
+            ruin += alive[:ruined_upto].sum()
+            alive[:ruined_upto] = 0.0
+
+    balances = initial_balance + wins * (up + down) - total_trades * down
+    return balances, alive, ruin
+
+
+def _dynamic_distribution(initial_balance, risk_per_trade, rr_ratio, win_rate, total_trades):
+    """Closed form for fee-free compounding: the balance depends only on the win count."""
+    wins = np.arange(total_trades + 1)
+    pmf = binomial_pmf(total_trades, win_rate)
+    if risk_per_trade >= 1:
+        # A full-risk loss wipes the account; only the all-wins path survives
+        balances = np.zeros(total_trades + 1)
+        balances[-1] = initial_balance * (1 + rr_ratio) ** total_trades
+        return balances, np.where(wins == total_trades, pmf, 0.0), float(pmf[:-1].sum())
+    with np.errstate(over="ignore"):
+        log_balance = np.log(initial_balance) + wins * np.log1p(risk_per_trade * rr_ratio) \
+            + (total_trades - wins) * np.log1p(-risk_per_trade)
+        balances = np.exp(log_balance)
+    return balances, pmf, 0.0
+
+
+def solve_exact(initial_balance, risk_per_trade, rr_ratio, win_rate, fees, risk_type, total_trades):
+    """Exact terminal-balance distribution and ruin probability, without sampling.
+
+    Supported for fixed risk (with or without fees) and for dynamic risk without
+    fees. Returns None when the model is path dependent (dynamic risk with fees)
+    or too large, so the caller can fall back to the Monte Carlo.
+
+    The result has `balances` (ascending, with ruin as a 0 atom), their
+    `probabilities` and `ruin_probability` (0-1).
+    """
+    if total_trades > EXACT_MAX_TRADES:
+        return None
+    if risk_type == "fixed":
+        balances, probabilities, ruin = _fixed_distribution(
+            initial_balance, risk_per_trade, rr_ratio, win_rate, fees, total_trades)
+    elif fees == 0:
+        balances, probabilities, ruin = _dynamic_distribution(
+            initial_balance, risk_per_trade, rr_ratio, win_rate, total_trades)
+    else:
+        return None
+
+    balances = np.concatenate(([0.0], np.where(probabilities > 0, balances, 0.0)))
+    probabilities = np.concatenate(([ruin], probabilities))
+    order = np.argsort(balances, kind="stable")
+    return {
+        "balances": balances[order],
+        "probabilities": probabilities[order],
+        "ruin_probability": float(ruin),
+    }
+
+
+def quantile(distribution, q):
+    """Smallest balance whose cumulative probability reaches `q` (0-1)."""
+    cdf = np.cumsum(distribution["probabilities"])
+    index = np.searchsorted(cdf, q * cdf[-1], side="left")
+    return float(distribution["balances"][min(index, cdf.size - 1)])
@@ -0,0 +1,173 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# CPU-bound simulation jobs run in a process pool so a long Monte Carlo never
+# blocks the event loop (HTTP + socket.io) of the uvicorn worker.
+SIM_POOL_WORKERS = int(os.getenv("SIM_POOL_WORKERS", "2"))
+SIM_POOL_QUEUE = int(os.getenv("SIM_POOL_QUEUE", "8"))  # jobs allowed to wait for a free process
+SIM_JOB_TIMEOUT = float(os.getenv("SIM_JOB_TIMEOUT", "30"))  # seconds
+SIM_RETRY_AFTER = int(os.getenv("SIM_RETRY_AFTER", "2"))  # seconds, sent with 429 responses
+
+_DISCONNECT_POLL_SECONDS = 0.25
+
+# Set inside pool processes only: one cancellation flag per job slot
+_cancel_flags = None
+_current_slot = None
+
+
+class PoolSaturated(Exception):
+    """Raised when every running and queued slot of the pool is taken."""
+    def __init__(self, retry_after: int):
+        super().__init__("Simulation pool is saturated")
+        self.retry_after = retry_after
+
+
+class JobTimeout(Exception):
+    """Raised when a job does not finish within the per-job timeout."""
+
+
+class JobCancelled(Exception):
+    """Raised when a job is abandoned (client disconnected or timed out)."""
+
+
+def _init_worker(cancel_flags):
+    global _cancel_flags
+    _cancel_flags = cancel_flags
+
+
+def _run_job(slot, fn, args):
+    global _current_slot
+    _current_slot = slot
+    try:
+        return fn(*args)
+    finally:
+        _current_slot = None
+
+
+def check_cancelled():
+    """Cooperative cancellation point for long-running jobs.
+
+    No-op outside the pool; inside a pool process it raises JobCancelled once
+    the parent has given up on the current job.
+    """
+    if _cancel_flags is not None and _current_slot is not None and _cancel_flags[_current_slot]:
+        raise JobCancelled()
+
+
+class SimulationPool:
+    """Bounded process pool with backpressure, timeouts and cancellation.
+
+    At most `workers` jobs run and `queue_size` more wait; beyond that `run`
+    raises PoolSaturated immediately instead of queueing without limit.
+    """
+
+    def __init__(self, workers: int = SIM_POOL_WORKERS, queue_size: int = SIM_POOL_QUEUE,
+                 timeout: float = SIM_JOB_TIMEOUT, retry_after: int = SIM_RETRY_AFTER):
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_size)
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._context = multiprocessing.get_context("spawn")
+        self._cancel_flags = None
+        self._free_slots = list(range(self.capacity))
+        self._executor = None
+
+    @property
+    def in_flight(self) -> int:
+        return self.capacity - len(self._free_slots)
+
+    @property
+    def free_slots(self) -> int:
+        return len(self._free_slots)
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Created lazily so each (forked) web worker gets its own flags
+            if self._cancel_flags is None:
+                self._cancel_flags = self._context.RawArray("b", self.capacity)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=self._context,
+                initializer=_init_worker,
+                initargs=(self._cancel_flags,),
+            )
+        return self._executor
+
+    def _release(self, slot):
+        self._cancel_flags[slot] = 0
+        self._free_slots.append(slot)
+
+    def _release_threadsafe(self, loop, slot):
+        try:
+            loop.call_soon_threadsafe(self._release, slot)
+        except RuntimeError:
+            # Event loop already closed (shutdown); nothing left to hand the slot to
+            pass
+
+    async def run(self, fn, *args, is_disconnected=None, timeout: float | None = None):
+        """Run `fn(*args)` in the pool and return its result.
+
+        `is_disconnected` is an optional coroutine function (e.g. Starlette's
+        `Request.is_disconnected`); when it reports True the job is cancelled.
+        """
+        if not self._free_slots:
+            raise PoolSaturated(self.retry_after)
+
+        slot = self._free_slots.pop()
+        loop = asyncio.get_running_loop()
+        try:
+            executor = self._get_executor()
+            self._cancel_flags[slot] = 0
+            job = executor.submit(_run_job, slot, fn, args)
+        except BrokenProcessPool:
+            self._executor = None
+            self._free_slots.append(slot)
+            raise
+        # The slot stays reserved until the process is really done with it,
+        # so a cancelled-but-still-running job can't see its flag reset
+        job.add_done_callback(lambda _: self._release_threadsafe(loop, slot))
+        future = asyncio.wrap_future(job)
+
+        watcher = asyncio.ensure_future(self._wait_for_disconnect(is_disconnected))
+        try:
+            done, _ = await asyncio.wait(
+                {future, watcher},
+                timeout=timeout if timeout is not None else self.timeout,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if future in done:
+                try:
+                    return future.result()
+                except BrokenProcessPool:
+                    # A worker died; start a fresh pool on the next job
+                    self._executor = None
+                    raise
+            # Give up on the job: drop it if still queued, stop it if running
+            self._cancel_flags[slot] = 1
+            future.cancel()
+            if watcher in done:
+                raise JobCancelled()
+            raise JobTimeout()
+        except asyncio.CancelledError:
+            self._cancel_flags[slot] = 1
+            future.cancel()
+            raise
+        finally:
+            watcher.cancel()
+
+    async def _wait_for_disconnect(self, is_disconnected):
+        if is_disconnected is None:
+            await asyncio.Event().wait()
+        while not await is_disconnected():
+            await asyncio.sleep(_DISCONNECT_POLL_SECONDS)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+simulation_pool = SimulationPool()
@@ -8,6 +8,8 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from dotenv import load_dotenv
 from .database import create_db_and_tables
+from .executor import simulation_pool
+from .market_refresher import market_refresher
 from .routers import auth, users, posts, communities, simulation, admin, general, payment
 from fastapi_socketio import SocketManager
 
@@ -115,6 +117,12 @@ else:
 @app.on_event("startup")
 def startup_event():
     create_db_and_tables()
+    market_refresher.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    simulation_pool.shutdown()
+    market_refresher.stop()
 
 # SocketIO for real-time notifications
 sio = SocketManager(app=app, cors_allowed_origins=["http://localhost:5173", "http://127.0.0.1:5173"])
@@ -0,0 +1,204 @@
+import asyncio
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .result_cache import MemoryBackend, SQLiteBackend
+
+# Upstream market data (yfinance quotes) is served stale-while-revalidate:
+# entries younger than MARKET_CACHE_TTL are fresh, older ones are still served
+# while a background thread fetches a new value. Entries unused for
+# MARKET_CACHE_MAX_STALE are dropped, so only a cold symbol waits on upstream.
+MARKET_CACHE_BACKEND = os.getenv("MARKET_CACHE_BACKEND", "memory")  # memory | sqlite
+MARKET_CACHE_PATH = os.getenv("MARKET_CACHE_PATH", "market_cache.sqlite3")
+MARKET_CACHE_TTL = float(os.getenv("MARKET_CACHE_TTL", "30"))  # seconds
+MARKET_CACHE_MAX_STALE = float(os.getenv("MARKET_CACHE_MAX_STALE", "600"))  # seconds
+MARKET_CACHE_MAX_BYTES = int(os.getenv("MARKET_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+# Background refresh threads per web worker
+_REFRESH_THREADS = 4
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls per key: while one upstream fetch for a key is
+    in flight, other callers of that key wait for it and share its result or
+    exception instead of starting their own."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        # (event loop, key) -> future of the thread running do(); only touched from its loop
+        self._futures = {}
+
+    def do(self, key: str, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def run(self, key: str, fn):
+        """do() from async code, in a worker thread. Coroutines waiting on a key
+        share one future, so a burst of requests holds one thread, not one each."""
+        loop = asyncio.get_running_loop()
+        future = self._futures.get((loop, key))
+        if future is None:
+            future = self._futures[loop, key] = loop.run_in_executor(None, self.do, key, fn)
+            future.add_done_callback(lambda _: self._futures.pop((loop, key), None))
+        # A cancelled waiter must not cancel the others
+        return await asyncio.shield(future)
+
+
+class MarketCache:
+    """Stale-while-revalidate front-end over a result_cache byte-store backend.
+
+    The backend holds pickled (fetched_at, value) pairs and evicts them by
+    size and age; a SQLiteBackend shares them between every web worker on
+    the host, so a quote fetched by one worker serves all of them. Upstream
+    fetches of a worker go through `flight`, so concurrent misses of a key
+    make one call.
+    """
+
+    def __init__(self, backend, ttl: float = MARKET_CACHE_TTL, timer=time.time, executor=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.flight = SingleFlight()
+        self._timer = timer
+        self._executor = executor or ThreadPoolExecutor(max_workers=_REFRESH_THREADS, thread_name_prefix="market-refresh")
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _read(self, key: str):
+        value = self.backend.get(key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key: str, value):
+        self.backend.set(key, pickle.dumps((self._timer(), value), protocol=pickle.HIGHEST_PROTOCOL))
+
+    def get(self, key: str, fetch):
+        """Cached value of `key`; fetch() supplies it on a miss.
+
+        A stale entry is returned at once and refreshed in the background
+        (one refresh per key at a time); only a miss waits for fetch(), whose
+        exceptions propagate to every caller waiting on it. Failed refreshes
+        keep the stale value.
+        """
+        entry = self._read(key)
+        if entry is None:
+            return self.flight.do(key, lambda: self._fetch(key, fetch))
+        fetched_at, value = entry
+        if self._timer() - fetched_at >= self.ttl:
+            self._refresh(key, fetch)
+        return value
+
+    def get_many(self, keys, fetch_many):
+        """Cached values of `keys` as a dict, like get() for several keys at once.
+
+        fetch_many(keys) returns a dict with a value for each of `keys`: the
+        misses are fetched with one call, and the stale entries are refreshed
+        with one background call.
+        """
+        values, stale = {}, []
+        now = self._timer()
+        for key in keys:
+            entry = self._read(key)
+            if entry is None:
+                continue
+            values[key] = entry[1]
+            if now - entry[0] >= self.ttl:
+                stale.append(key)
+        missing = [key for key in keys if key not in values]
+        if missing:
+            values.update(self.flight.do(",".join(missing), lambda: self._fetch_many(missing, fetch_many)))
+        if stale:
+            self._refresh_many(stale, fetch_many)
+        return values
+
+    def refresh_many(self, keys, fetch_many, max_age: float):
+        """Fetch the `keys` whose entry is missing or at least `max_age` seconds
+        old, with one fetch_many call, and return them. Entries another web
+        worker refreshed in the meantime are left alone."""
+        now = self._timer()
+        due = [key for key in keys if (entry := self._read(key)) is None or now - entry[0] >= max_age]
+        if due:
+            self.flight.do(",".join(due), lambda: self._fetch_many(due, fetch_many))
+        return due
+
+    def _fetch(self, key: str, fetch):
+        value = fetch()
+        self.set(key, value)
+        return value
+
+    def _fetch_many(self, keys, fetch_many):
+        values = fetch_many(keys)
+        for key in keys:
+            self.set(key, values[key])
+        return values
+
+    def _refresh(self, key: str, fetch):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._revalidate, key, fetch)
+
+    def _refresh_many(self, keys, fetch_many):
+        with self._lock:
+            keys = [key for key in keys if key not in self._refreshing]
+            self._refreshing.update(keys)
+        if keys:
+            self._executor.submit(self._revalidate_many, keys, fetch_many)
+
+    def _revalidate_many(self, keys, fetch_many):
+        try:
+            now = self._timer()
+            stale = [key for key in keys if (entry := self._read(key)) is None or now - entry[0] >= self.ttl]
+            if stale:
+                self.flight.do(",".join(stale), lambda: self._fetch_many(stale, fetch_many))
+        except Exception as e:
+            print(f"Market data refresh failed for {','.join(keys)}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(keys)
+
+    def _revalidate(self, key: str, fetch):
+        try:
+            # Another web worker may have refreshed it in the meantime
+            entry = self._read(key)
+            if entry is None or self._timer() - entry[0] >= self.ttl:
+                self.flight.do(key, lambda: self._fetch(key, fetch))
+        except Exception as e:
+            print(f"Market data refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+def _backend_from_env():
+    if MARKET_CACHE_BACKEND == "sqlite":
+        return SQLiteBackend(MARKET_CACHE_PATH, max_bytes=MARKET_CACHE_MAX_BYTES, ttl=MARKET_CACHE_MAX_STALE)
+    return MemoryBackend(max_bytes=MARKET_CACHE_MAX_BYTES, ttl=MARKET_CACHE_MAX_STALE)
+
+
+market_cache = MarketCache(_backend_from_env())
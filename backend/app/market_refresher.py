@@ -0,0 +1,116 @@
+import os
+import random
+import threading
+from collections import Counter
+from .engine import refresh_watchlist
+from .symbols import DEFAULT_WATCHLIST, normalize_symbol
+
+# Opt-in background refresh of the hot watchlist: the default /api/market-data
+# symbols plus the most requested ones are re-downloaded into the market cache
+# every MARKET_REFRESH_INTERVAL seconds (one thread per web worker), so
+# dashboard requests find fresh rows and never wait on upstream. Rows another
+# worker refreshed within the interval are skipped, so with the shared SQLite
+# cache the workers together download each symbol about once per interval.
+# Keep the interval below MARKET_CACHE_TTL.
+MARKET_REFRESH_INTERVAL = float(os.getenv("MARKET_REFRESH_INTERVAL", "0"))  # seconds, 0 = off
+MARKET_REFRESH_HOT = int(os.getenv("MARKET_REFRESH_HOT", "20"))  # most requested symbols refreshed besides the defaults
+# Every wait is the interval +/- this fraction, so workers do not hit upstream in lockstep
+_JITTER = 0.2
+# Request counts halve over this many seconds, so the hot set follows recent demand
+_HALF_LIFE = 600.0
+# Counts below this are forgotten
+_FORGET = 0.5
+# Symbols counted; the least requested are dropped once twice as many are seen
+_COUNTED_MAX = 1000
+# Seconds shutdown waits for a refresh in progress
+_STOP_TIMEOUT = 5.0
+
+
+class AccessCounter:
+    """Thread-safe request counts per symbol, scaled down by decay()."""
+
+    def __init__(self, max_symbols: int = _COUNTED_MAX):
+        self.max_symbols = max_symbols
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, symbols):
+        with self._lock:
+            self._counts.update(symbols)
+            if len(self._counts) > 2 * self.max_symbols:
+                self._counts = Counter(dict(self._counts.most_common(self.max_symbols)))
+
+    def top(self, n: int):
+        """The n most requested symbols, most requested first."""
+        with self._lock:
+            return [symbol for symbol, _ in self._counts.most_common(n)]
+
+    def decay(self, factor: float):
+        with self._lock:
+            self._counts = Counter({symbol: count * factor for symbol, count in self._counts.items()
+                                    if count * factor >= _FORGET})
+
+
+class MarketRefresher:
+    """Calls refresh(watchlist(), max_age) on a background thread every
+    `interval` seconds, jittered; an interval of 0 leaves it disabled.
+
+    max_age is the shortest wait, so refresh() skips the symbols another
+    worker refreshed since this one last woke up.
+    """
+
+    def __init__(self, refresh, pinned, counter, interval: float, hot: int = MARKET_REFRESH_HOT,
+                 jitter: float = _JITTER, rng=random.random):
+        self.pinned = list(dict.fromkeys(pinned))
+        self.counter = counter
+        self.interval = interval
+        self.hot = hot
+        self.jitter = jitter
+        self._refresh = refresh
+        self._random = rng
+        self._stop = threading.Event()
+        self._thread = None
+
+    def watchlist(self):
+        """The pinned symbols, then the `hot` most requested other ones."""
+        pinned = set(self.pinned)
+        requested = [symbol for symbol in self.counter.top(self.hot + len(pinned)) if symbol not in pinned]
+        return self.pinned + requested[:self.hot]
+
+    def delay(self):
+        return self.interval * (1 + self.jitter * (2 * self._random() - 1))
+
+    def refresh_once(self):
+        symbols = self.watchlist()
+        try:
+            self._refresh(symbols, self.interval * (1 - self.jitter))
+        except Exception as e:
+            print(f"Market data refresh failed for {','.join(symbols)}: {e}")
+        self.counter.decay(0.5 ** (self.interval / _HALF_LIFE))
+
+    def _run(self):
+        while True:
+            self.refresh_once()
+            if self._stop.wait(self.delay()):
+                return
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="market-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(_STOP_TIMEOUT)
+        self._thread = None
+
+
+# Symbols requested from /api/market-data, as yfinance tickers
+hot_symbols = AccessCounter()
+market_refresher = MarketRefresher(
+    refresh_watchlist, [normalize_symbol(symbol) for symbol in DEFAULT_WATCHLIST], hot_symbols, MARKET_REFRESH_INTERVAL
+)
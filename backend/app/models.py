@@ -1,8 +1,9 @@
-from pydantic import BaseModel, Field, field_validator, EmailStr
+from pydantic import BaseModel, Field, field_validator, model_validator, EmailStr
 from decimal import Decimal
 from typing import Literal, Optional
 from sqlmodel import Session, SQLModel, Field as SQLField
 import sqlalchemy as sa
+import numpy as np
 from datetime import datetime, timedelta
 
 # SaaS Tenant Model
@@ -13,6 +14,28 @@ class Tenant(SQLModel, table=True):
     created_at: datetime = SQLField(default_factory=datetime.utcnow)
     is_active: bool = SQLField(default=True)
 
+class PayoffDistribution(BaseModel):
+  """Size of a win or a loss in R (multiples of the risked amount), always >= 0."""
+  kind: Literal["fixed", "histogram", "normal", "lognormal"]
+  value: Optional[Decimal] = Field(default=None, ge=0, description="fixed: the payoff.")
+  values: list[Decimal] = Field(default=[], max_length=1000, description="histogram: possible payoffs, e.g. [1, 0.5] for full and partial stop-outs.")
+  weights: list[Decimal] = Field(default=[], max_length=1000, description="histogram: relative frequency of each value.")
+  mean: Optional[Decimal] = Field(default=None, gt=0, description="normal / lognormal: mean payoff.")
+  std: Optional[Decimal] = Field(default=None, gt=0, description="normal / lognormal: standard deviation.")
+
+  @model_validator(mode="after")
+  def validate_parameters(self):
+    if self.kind == "fixed" and self.value is None:
+      raise ValueError("A fixed payoff needs a value")
+    if self.kind == "histogram":
+      if not self.values or len(self.values) != len(self.weights):
+        raise ValueError("A histogram payoff needs matching values and weights")
+      if any(v < 0 for v in self.values) or any(w < 0 for w in self.weights) or sum(self.weights) <= 0:
+        raise ValueError("Histogram values and weights must be non-negative, with some positive weight")
+    if self.kind in ("normal", "lognormal") and (self.mean is None or self.std is None):
+      raise ValueError(f"A {self.kind} payoff needs mean and std")
+    return self
+
 class SimulationRequest(BaseModel):
   initial_balance: Decimal = Field(..., gt=0, description="The starting balance for the simulation.")
   capital_utilization: Decimal = Field(..., gt=0, le=100, description="% Balance to be used in each trade (0-100).")
@@ -23,6 +46,16 @@ class SimulationRequest(BaseModel):
   simulation_days: int = Field(..., gt=0, le=3650, description="The number of days over which to run the simulation (max 10 years).")
   fees_per_trade: Decimal = Field(default=0, ge=0, description="Commission or fees per trade in currency.")
   risk_type: Literal["dynamic", "fixed"] = Field(default="dynamic", description="Risk calculation method: 'dynamic' (compounding) or 'fixed' (based on initial capital).")
+  probability_method: Literal["monte_carlo", "exact"] = Field(default="monte_carlo", description="'exact' computes percentiles and ruin probability without sampling when the risk model allows it.")
+  mc_precision: Decimal = Field(default=Decimal("5"), gt=0, le=10, description="Target 95% confidence half-width (%) of the Monte Carlo ruin probability (percentage points) and median (percent of the median).")
+  mc_sampler: Literal["random", "antithetic", "stratified"] = Field(default="random", description="Monte Carlo draws: independent, antithetic pairs (path 2k + 1 mirrors path 2k) or stratified win counts.")
+  mc_max_iterations: int = Field(default=10000, ge=200, le=50000, description="Upper bound on Monte Carlo paths when the target precision is not reached.")
+  seed: Optional[int] = Field(default=None, ge=0, le=2 ** 53 - 1, description="Seed for reproducible results. A random seed is chosen (and returned) when omitted.")
+  outcome_model: Literal["bernoulli", "bootstrap"] = Field(default="bernoulli", description="'bootstrap' resamples the user's recorded manual trades instead of win_rate / risk_reward_ratio.")
+  bootstrap_block: int = Field(default=1, ge=1, le=250, description="Consecutive recorded trades resampled together, to keep streaks (1 = independent trades).")
+  win_payoff: Optional[PayoffDistribution] = Field(default=None, description="Distribution of win sizes in R; defaults to exactly risk_reward_ratio.")
+  loss_payoff: Optional[PayoffDistribution] = Field(default=None, description="Distribution of loss sizes in R; defaults to exactly 1 (a full stop-out).")
+  slippage: Optional[PayoffDistribution] = Field(default=None, description="Distribution of the cost in R deducted from every trade.")
   
   #validators
   @field_validator('initial_balance')
@@ -45,10 +78,165 @@ class TradeResult(BaseModel):
 
 class SimulationResponse(BaseModel):
   status: str
+  seed: int | None = None # replays this exact run when sent back as SimulationRequest.seed
   summary: dict
   daily_breakdown: list[DailyResult]
   monte_carlo: dict | None = None
   trade_log: list[TradeResult] = []
+  fan_chart: dict | None = None # per-day percentile bands of balance and drawdown over the first `paths` paths
+
+# Upper bounds for one sweep: grid cells, and cells x paths x trades of work
+SWEEP_MAX_CELLS = 400
+SWEEP_MAX_WORK = 2 * 10 ** 9
+
+class SweepRange(BaseModel):
+  start: Decimal
+  stop: Decimal
+  steps: int = Field(..., ge=1, le=50, description="Number of evenly spaced values from start to stop (inclusive).")
+
+  def values(self) -> list[Decimal]:
+    if self.steps == 1:
+      return [self.start]
+    step = (self.stop - self.start) / (self.steps - 1)
+    return [self.start + step * i for i in range(self.steps)]
+
+class SweepRequest(BaseModel):
+  initial_balance: Decimal = Field(..., gt=0)
+  trades_per_day: int = Field(..., gt=0)
+  simulation_days: int = Field(..., gt=0, le=3650)
+  fees_per_trade: Decimal = Field(default=0, ge=0)
+  risk_type: Literal["dynamic", "fixed"] = "dynamic"
+  # Each axis is an explicit list of values or an evenly spaced range
+  win_rate: list[Decimal] | SweepRange = Field(..., description="Win rates (%) to evaluate.")
+  risk_per_trade: list[Decimal] | SweepRange = Field(..., description="Risk per trade (%) values to evaluate.")
+  risk_reward_ratio: list[Decimal] | SweepRange = Field(..., description="Risk to reward ratios to evaluate.")
+  iterations: int = Field(default=1000, ge=100, le=10000, description="Monte Carlo paths per grid cell.")
+  seed: Optional[int] = Field(default=None, ge=0, le=2 ** 53 - 1, description="Seed for reproducible results. A random seed is chosen (and returned) when omitted.")
+
+  def axis(self, name: str) -> list[Decimal]:
+    value = getattr(self, name)
+    return value.values() if isinstance(value, SweepRange) else value
+
+  @model_validator(mode="after")
+  def validate_grid(self):
+    win_rates, risks, ratios = self.axis("win_rate"), self.axis("risk_per_trade"), self.axis("risk_reward_ratio")
+    if not (win_rates and risks and ratios):
+      raise ValueError("Every sweep axis needs at least one value")
+    if any(not 0 <= v <= 100 for v in win_rates):
+      raise ValueError("win_rate values must be between 0 and 100")
+    if any(not 0 < v <= 100 for v in risks):
+      raise ValueError("risk_per_trade values must be greater than 0 and at most 100")
+    if any(v <= 0 for v in ratios):
+      raise ValueError("risk_reward_ratio values must be greater than 0")
+    cells = len(win_rates) * len(risks) * len(ratios)
+    if cells > SWEEP_MAX_CELLS:
+      raise ValueError(f"Sweep has {cells} cells; the maximum is {SWEEP_MAX_CELLS}")
+    if cells * self.iterations * self.trades_per_day * self.simulation_days > SWEEP_MAX_WORK:
+      raise ValueError("Sweep is too large; reduce the grid, iterations or horizon")
+    return self
+
+class SweepResponse(BaseModel):
+  status: str
+  seed: int
+  iterations: int
+  win_rate: list[float]
+  risk_per_trade: list[float]
+  risk_reward_ratio: list[float]
+  # Metric matrices indexed [win_rate][risk_per_trade][risk_reward_ratio]
+  median: list[list[list[float]]]
+  p5: list[list[list[float]]]
+  ruin_probability: list[list[list[float]]]
+  avg_max_drawdown: list[list[list[float]]]
+
+class OptimizeRequest(BaseModel):
+  initial_balance: Decimal = Field(..., gt=0)
+  win_rate: Decimal = Field(..., ge=0, le=100)
+  risk_reward_ratio: Decimal = Field(..., gt=0)
+  trades_per_day: int = Field(..., gt=0)
+  simulation_days: int = Field(..., gt=0, le=3650)
+  fees_per_trade: Decimal = Field(default=0, ge=0)
+  risk_type: Literal["dynamic", "fixed"] = "dynamic"
+  trades_per_day_options: list[int] = Field(default=[], max_length=5, description="Other trades_per_day values to search alongside trades_per_day.")
+  max_ruin_probability: Decimal = Field(default=Decimal("1"), ge=0, le=100, description="Highest acceptable ruin probability (%).")
+  max_drawdown: Optional[Decimal] = Field(default=Decimal("30"), gt=0, le=100, description="Highest acceptable average max drawdown (%). null drops the limit where the ruin limit still binds.")
+  seed: Optional[int] = Field(default=None, ge=0, le=2 ** 53 - 1, description="Seed for reproducible results. A random seed is chosen (and returned) when omitted.")
+
+  @field_validator('trades_per_day_options')
+  def validate_trades_per_day_options(cls, v):
+    if any(n <= 0 for n in v):
+      raise ValueError("trades_per_day_options must be positive")
+    return v
+
+  @model_validator(mode="after")
+  def validate_constraint(self):
+    # Compounding risk without fees never empties the balance, so its ruin
+    # probability is always 0 and the search would just return full Kelly
+    ruin_binds = self.max_ruin_probability < 100 and (self.risk_type == "fixed" or self.fees_per_trade > 0)
+    if self.max_drawdown is None and not ruin_binds:
+      raise ValueError("max_drawdown is required: the ruin limit alone cannot bind for this request")
+    return self
+
+class OptimizeResponse(BaseModel):
+  status: str
+  seed: int
+  kelly_fraction: str # full Kelly risk (%) of the win/loss bet, fees ignored
+  feasible: bool
+  risk_per_trade: str | None = None # recommended risk (%), None when nothing meets the constraints
+  trades_per_day: int | None = None
+  median_final_balance: str | None = None
+  ruin_probability: str | None = None
+  avg_max_drawdown: str | None = None
+  iterations: int = 0 # Monte Carlo paths per candidate
+  candidates: list[dict] = [] # every evaluated candidate with its metrics, for charting the trade-off
+  message: str
+
+# Upper bounds for one portfolio: strategies, and paths x rounds x strategies of work
+PORTFOLIO_MAX_STRATEGIES = 10
+PORTFOLIO_MAX_WORK = 2 * 10 ** 9
+
+class PortfolioStrategy(BaseModel):
+  name: str = Field(..., min_length=1, max_length=100)
+  win_rate: Decimal = Field(..., ge=0, le=100)
+  risk_per_trade: Decimal = Field(..., gt=0, le=100, description="Risk per trade (%) of the shared balance.")
+  risk_reward_ratio: Decimal = Field(..., gt=0)
+  trades_per_day: int = Field(..., gt=0, le=100)
+  fees_per_trade: Decimal = Field(default=0, ge=0)
+
+class PortfolioRequest(BaseModel):
+  initial_balance: Decimal = Field(..., gt=0)
+  simulation_days: int = Field(..., gt=0, le=3650)
+  risk_type: Literal["dynamic", "fixed"] = "dynamic"
+  strategies: list[PortfolioStrategy] = Field(..., min_length=1, max_length=PORTFOLIO_MAX_STRATEGIES)
+  correlation: Optional[list[list[Decimal]]] = Field(default=None, description="Correlation matrix of the strategies' outcomes (one row per strategy); independent when omitted.")
+  iterations: int = Field(default=2000, ge=100, le=20000, description="Monte Carlo paths.")
+  seed: Optional[int] = Field(default=None, ge=0, le=2 ** 53 - 1, description="Seed for reproducible results. A random seed is chosen (and returned) when omitted.")
+
+  @model_validator(mode="after")
+  def validate_portfolio(self):
+    n = len(self.strategies)
+    if len({s.name for s in self.strategies}) != n:
+      raise ValueError("Strategy names must be unique")
+    if self.correlation is not None:
+      matrix = np.array(self.correlation, dtype=np.float64) if all(len(row) == n for row in self.correlation) else None
+      if matrix is None or matrix.shape != (n, n):
+        raise ValueError(f"correlation must be a {n}x{n} matrix")
+      if not np.allclose(matrix, matrix.T) or not np.allclose(np.diag(matrix), 1) or np.abs(matrix).max() > 1:
+        raise ValueError("correlation must be symmetric, with ones on the diagonal and entries between -1 and 1")
+      try:
+        np.linalg.cholesky(matrix)
+      except np.linalg.LinAlgError:
+        raise ValueError("correlation must be positive definite")
+    rounds = max(s.trades_per_day for s in self.strategies) * self.simulation_days
+    if self.iterations * rounds * n > PORTFOLIO_MAX_WORK:
+      raise ValueError("Portfolio is too large; reduce the strategies, iterations or horizon")
+    return self
+
+class PortfolioResponse(BaseModel):
+  status: str
+  seed: int
+  iterations: int
+  summary: dict # percentiles of the final balance, ruin probability, average max drawdown
+  strategies: list[dict] # per-strategy contribution: mean P&L and share of the total
 
 class GoalPlannerRequest(BaseModel):
     initial_balance: Decimal = Field(..., gt=0)
@@ -61,6 +249,51 @@ class GoalPlannerResponse(BaseModel):
     feasibility: str
     message: str
 
+# Upper bounds for one goal solve: goals, and paths x trades x (coarse grid + goals) of work
+GOAL_MAX_TARGETS = 200
+GOAL_MAX_WORK = 2 * 10 ** 9
+# Values of the coarse round of the solver (see optimizer.solve_goal)
+GOAL_GRID_CELLS = 16
+
+class GoalTarget(BaseModel):
+  target_balance: Decimal = Field(..., gt=0)
+  deadline_months: int = Field(..., gt=0, le=120)
+
+class GoalSolveRequest(BaseModel):
+  initial_balance: Decimal = Field(..., gt=0)
+  solve_for: Literal["win_rate", "risk_per_trade"] = Field(..., description="The parameter to solve for; the other one is held fixed.")
+  win_rate: Optional[Decimal] = Field(default=None, ge=0, le=100, description="Win rate (%), required when solving for risk_per_trade.")
+  risk_per_trade: Optional[Decimal] = Field(default=None, gt=0, le=100, description="Risk per trade (%), required when solving for win_rate.")
+  risk_reward_ratio: Decimal = Field(..., gt=0)
+  trades_per_day: int = Field(..., gt=0)
+  days_per_month: int = Field(default=30, ge=1, le=31, description="Trading days per month, e.g. 30 for crypto or 21 for stocks.")
+  fees_per_trade: Decimal = Field(default=0, ge=0)
+  risk_type: Literal["dynamic", "fixed"] = "dynamic"
+  goals: list[GoalTarget] = Field(..., min_length=1, max_length=GOAL_MAX_TARGETS, description="(target, deadline) pairs, e.g. every cell of a feasibility heatmap.")
+  probability: Decimal = Field(default=Decimal("50"), gt=0, lt=100, description="Required probability (%) of reaching the target by the deadline.")
+  iterations: int = Field(default=500, ge=100, le=5000, description="Monte Carlo paths per evaluated value.")
+  seed: Optional[int] = Field(default=None, ge=0, le=2 ** 53 - 1, description="Seed for reproducible results. A random seed is chosen (and returned) when omitted.")
+
+  @model_validator(mode="after")
+  def validate_goal_solve(self):
+    fixed = "risk_per_trade" if self.solve_for == "win_rate" else "win_rate"
+    if getattr(self, fixed) is None:
+      raise ValueError(f"{fixed} is required when solving for {self.solve_for}")
+    if any(goal.target_balance <= self.initial_balance for goal in self.goals):
+      raise ValueError("Every target_balance must be above initial_balance")
+    trades = max(goal.deadline_months for goal in self.goals) * self.days_per_month * self.trades_per_day
+    if self.iterations * trades * (GOAL_GRID_CELLS + len(self.goals)) > GOAL_MAX_WORK:
+      raise ValueError("Goal solve is too large; reduce the goals, iterations, deadlines or trades per day")
+    return self
+
+class GoalSolveResponse(BaseModel):
+  status: str
+  seed: int
+  solve_for: str
+  probability: str # required probability (%) of reaching each target
+  iterations: int # Monte Carlo paths per evaluated value
+  goals: list[dict] # per goal, in request order: the required value (%) or None when out of reach
+
 class ChatRequest(BaseModel):
   message: str
   trades_summary: Optional[dict] = None
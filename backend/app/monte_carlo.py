@@ -0,0 +1,688 @@
+from statistics import NormalDist
+import numpy as np
+from .exact import binomial_pmf
+from .executor import check_cancelled
+from .payoffs import sample, TABLE_SIZE
+from .rng import (new_seed, stream, cell_key, cell_bits, bounded, bernoulli_threshold,
+                  STRATIFIED_STREAM, PAYOFF_STREAM)
+
+# Upper bound on the number of cells (paths x trades) held in one outcome block;
+# more paths are processed as several row chunks. Keeps the working set of a
+# 3650-day, high-frequency request to a few MB.
+_CHUNK_CELLS = 1 << 20
+# The first blocks are short so paths that are ruined early stop drawing outcomes
+# soon; widths then double up to _MAX_BLOCK_TRADES. The schedule never depends on
+# the number of paths, so a path's floating point results don't either.
+_FIRST_BLOCK_TRADES = 256
+_MAX_BLOCK_TRADES = 512
+# Bands of the per-day fan chart
+FAN_PERCENTILES = (5, 25, 50, 75, 95)
+# The fan chart follows the first paths of a run (global ids 0..n, n set by the
+# horizon alone, so batching never changes it): their day-end balances and
+# drawdowns are kept and the bands are exact percentiles over them.
+_FAN_MAX_PATHS = 1000
+_FAN_CELLS = 10 ** 6  # (paths x days) kept per run
+
+def _draw_wins(key, sampler, alive, iterations, first_path, first_trade, width, win_rate):
+    """Win/loss outcomes for one outcome block, one row per alive path.
+
+    Outcomes come from the counter-based cell_bits of each path's global id
+    (first_path + local index). With the antithetic sampler path 2k + 1
+    reuses 1 - u of path 2k, so pairs stay intact across even-sized splits.
+    """
+    if win_rate >= 1:
+        return np.ones((alive.size, width), dtype=bool)
+    threshold = bernoulli_threshold(win_rate)
+    if sampler == "antithetic":
+        paths = first_path + alive
+        pairs, index = np.unique(paths >> 1, return_inverse=True)
+        bits = cell_bits(key, pairs, first_trade, width)[index]
+        wins = bits < threshold
+        # u' = 1 - u wins when u > 1 - p
+        mirrored = (paths & 1).astype(bool)
+        wins[mirrored] = bits[mirrored] > ~threshold
+        return wins
+    return cell_bits(key, first_path + alive, first_trade, width) < threshold
+
+
+def _draw_returns(key, paths, first_trade, width, returns, block):
+    """Bootstrapped R-multiples for one outcome block, one row per path (global ids).
+
+    Circular block bootstrap: trades [j * block, (j + 1) * block) of a path replay
+    consecutive recorded trades from a start drawn from the cell_bits of block j,
+    so streaks up to `block` trades long survive. block=1 is the i.i.d. bootstrap.
+    """
+    first_block = first_trade // block
+    trade_no = np.arange(first_trade, first_trade + width)
+    blocks = (first_trade + width - 1) // block - first_block + 1
+    starts = bounded(cell_bits(key, paths, first_block, blocks), returns.size)
+    index = starts[:, trade_no // block - first_block] + trade_no % block
+    index %= returns.size
+    return returns[index]
+
+
+def _payoff_returns(key, wins, paths, first_trade, width, payoffs):
+    """R-multiples for a block of wins: + a win size or - a loss size, less slippage.
+
+    Sizes come from alias tables (see payoffs.sample); one 64-bit cell draw
+    per trade covers both, so the cost per trade is constant whatever the
+    distributions.
+    """
+    outcomes, slippage = payoffs
+    bits = cell_bits(key, paths, first_trade, width)
+    returns = sample(outcomes, bits >> np.uint64(32), offset=(~wins) * TABLE_SIZE)
+    if slippage is not None:
+        returns -= sample(slippage, bits)
+    return returns
+
+
+def _stratified_win_counts(rng, total_trades, win_rate, iterations):
+    """Total wins per path, one binomial draw from each of `iterations` equal strata.
+
+    Without fees the final balance depends only on the win count, so stratifying
+    it (a one-dimensional Latin hypercube through the inverse binomial CDF)
+    removes most of the sampling noise from the percentiles.
+    """
+    if win_rate <= 0 or win_rate >= 1:
+        return np.full(iterations, total_trades if win_rate >= 1 else 0, dtype=np.int64)
+    cdf = np.cumsum(binomial_pmf(total_trades, win_rate))
+    u = (rng.permutation(iterations) + rng.random(iterations)) / iterations
+    return np.minimum(np.searchsorted(cdf, u), total_trades)
+
+
+def _place_wins(rng, remaining_wins, alive, remaining_trades, width):
+    """Next `width` outcomes of paths with a fixed number of remaining wins.
+
+    The block's win count is hypergeometric and the wins are spread uniformly,
+    which keeps every ordering of a path's wins equally likely.
+    """
+    left = remaining_wins[alive]
+    counts = rng.hypergeometric(left, remaining_trades - left, width) if width < remaining_trades else left
+    remaining_wins[alive] = left - counts
+    order = rng.random((alive.size, width)).argsort(axis=1)
+    wins = np.empty((alive.size, width), dtype=bool)
+    np.put_along_axis(wins, order, np.arange(width) < counts[:, None], axis=1)
+    return wins
+
+
+def _select(wins, if_win, if_loss):
+    """Per-trade value for a boolean outcome block (cheaper than np.where on scalars)."""
+    values = wins * (if_win - if_loss)
+    values += if_loss
+    return values
+
+
+def _per_trade(outcomes, risk, rr_ratio, offset):
+    """offset + the profit of risking `risk` on every trade of an outcome block.
+
+    `outcomes` are boolean wins paying rr_ratio, or R-multiples (profit per unit of risk).
+    """
+    if outcomes.dtype == bool:
+        return _select(outcomes, offset + risk * rr_ratio, offset - risk)
+    values = outcomes * risk
+    values += offset
+    return values
+
+
+def _chunk_balances(start_balance, outcomes, initial_balance, risk_per_trade, rr_ratio, fees, risk_type):
+    """Balance after every trade of an outcome block, one row per path.
+
+    `outcomes` are boolean wins (paying rr_ratio) or R-multiples. `fees` is a
+    scalar or one value per trade of the block.
+    Values after a ruinous trade are meaningless and must be masked by the caller.
+    """
+    if risk_type == "dynamic":
+        # b_t = g_t * b_{t-1} - fees  =>  b_t = P_t * (b_0 - fees * sum(1 / P_k))
+        curve = np.cumprod(_per_trade(outcomes, risk_per_trade, rr_ratio, 1.0), axis=1)
+        if np.ndim(fees):
+            fee_drag = np.cumsum(-fees / curve, axis=1)
+        elif fees == 0:
+            curve *= start_balance[:, None]
+            return curve
+        else:
+            fee_drag = np.cumsum(np.reciprocal(curve), axis=1)
+            fee_drag *= -fees
+        fee_drag += start_balance[:, None]
+        curve *= fee_drag
+        return curve
+
+    # fixed: risk is always based on the initial balance, so PnL is additive
+    risk_amount = initial_balance * risk_per_trade
+    curve = np.cumsum(_per_trade(outcomes, risk_amount, rr_ratio, -fees), axis=1)
+    curve += start_balance[:, None]
+    return curve
+
+
+def equity_curve(initial_balance, outcomes, risk_per_trade, fees, risk_type, start_balance=None):
+    """Balance after every trade of one path of R-multiples, from `start_balance`
+    (default initial_balance); ruin not handled."""
+    start = np.array([initial_balance if start_balance is None else start_balance], dtype=np.float64)
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        return _chunk_balances(start, np.asarray(outcomes, dtype=np.float64)[None, :],
+                               initial_balance, risk_per_trade, 1.0, fees, risk_type)[0]
+
+
+def _freeze_after_ruin(curve, hit, rows):
+    """Hold ruined paths at their ruin balance so later trades don't count."""
+    first = hit[rows].argmax(axis=1)
+    ruin_balance = curve[rows, first]
+    # NaN only appears when a full-risk loss wipes the balance out exactly
+    ruin_balance = np.where(np.isnan(ruin_balance), 0.0, ruin_balance)
+    after = np.arange(curve.shape[1]) >= first[:, None]
+    curve[rows] = np.where(after, ruin_balance[:, None], curve[rows])
+
+
+def _advance(state, rows, outcomes, initial_balance, risk_per_trade, rr_ratio, fees, risk_type):
+    """Apply one block of outcomes to paths `rows` of `state` in place.
+
+    `state` is (balance, peak, max_drawdown, ruined), one entry per path.
+    Returns the block's balance curve, its running peak and which rows were ruined.
+    """
+    balance, peak, max_drawdown, ruined = state
+    curve = _chunk_balances(balance[rows], outcomes, initial_balance, risk_per_trade, rr_ratio, fees, risk_type)
+
+    hit = ~(curve > 0)
+    path_ruined = hit.any(axis=1)
+    ruined_rows = np.flatnonzero(path_ruined)
+    if ruined_rows.size:
+        _freeze_after_ruin(curve, hit, ruined_rows)
+
+    running_peak = np.maximum.accumulate(curve, axis=1)
+    np.maximum(running_peak, peak[rows][:, None], out=running_peak)
+    worst_ratio = np.fmin.reduce(curve / running_peak, axis=1)
+    max_drawdown[rows] = np.fmax(max_drawdown[rows], (1.0 - worst_ratio) * 100)
+    peak[rows] = running_peak[:, -1]
+
+    balance[rows] = np.where(path_ruined, 0.0, curve[:, -1])
+    ruined[rows[path_ruined]] = True
+    return curve, running_peak, path_ruined
+
+
+def fan_paths(days):
+    """Number of leading paths (by global id) the fan chart of a `days` long run follows."""
+    return min(_FAN_MAX_PATHS, max(_FAN_CELLS // days, 1))
+
+
+def fan_bands(paths):
+    """(days x FAN_PERCENTILES) bands of the day-end balance and drawdown from the
+    `day_balances` / `day_drawdowns` of a run."""
+    return tuple(np.percentile(paths[key], FAN_PERCENTILES, axis=0).T for key in ("day_balances", "day_drawdowns"))
+
+
+def simulate_paths(initial_balance, risk_per_trade, rr_ratio, win_rate, fees, risk_type,
+                   total_trades, iterations, seed=None, sampler="random", day_length=None, first_path=0,
+                   returns=None, block_length=1, payoffs=None):
+    """Vectorized Monte Carlo over `iterations` independent equity paths.
+
+    Outcomes are drawn in blocks of (paths x consecutive trades). Balances come
+    from cumulative sums (fixed risk) or cumulative products (dynamic risk), and
+    drawdowns from a running peak. A ruined path (balance <= 0) stops drawing
+    outcomes, exactly like the early `break` of a per-trade loop. Between blocks
+    the kernel yields to pool cancellation (see executor.check_cancelled).
+    `sampler` selects the variance reduction: "random" (independent draws),
+    "antithetic" (path 2k + 1 mirrors path 2k) or "stratified" (stratified win counts).
+
+    With `returns` (an array of R-multiples, e.g. recorded trades) outcomes are
+    bootstrapped from it instead of drawn as wins at `win_rate` paying `rr_ratio`,
+    in blocks of `block_length` consecutive trades; `sampler` is then ignored.
+    With `payoffs`, a (payoffs.signed_outcomes table, slippage table or None)
+    pair, wins and losses are drawn as usual and their sizes (in R) from the tables.
+
+    Runs are reproducible from `seed`. Path i has the global id first_path + i;
+    with the random sampler its outcomes depend only on (seed, id), so splitting
+    paths 0..n into several calls gives bit-identical per-path results.
+
+    Returns a dict of arrays with one entry per path: `final_balances`
+    (0 for ruined paths), `max_drawdowns` (percent) and `ruined`, plus the
+    stratified sampler's drawn `win_counts`.
+
+    With `day_length` (trades per day) it also returns `day_balances` and
+    `day_drawdowns`, the balance and current drawdown (percent) at every day end
+    of the paths followed by the fan chart (global ids below fan_paths(days)),
+    one row per path; see fan_bands. Other paths keep no per-day values.
+    """
+    if seed is None:
+        seed = new_seed()
+    key = cell_key(seed)
+    payoff_key = cell_key(seed, PAYOFF_STREAM)
+
+    balance = np.full(iterations, initial_balance, dtype=np.float64)
+    peak = balance.copy()
+    max_drawdown = np.zeros(iterations)
+    ruined = np.zeros(iterations, dtype=bool)
+    alive = np.arange(iterations)
+    remaining_wins = None
+    if sampler == "stratified" and returns is None:
+        # Strata span the whole call, so these draws depend on the batch
+        rng = stream(seed, STRATIFIED_STREAM, first_path)
+        remaining_wins = _stratified_win_counts(rng, total_trades, win_rate, iterations)
+        win_counts = remaining_wins.copy()
+    if day_length:
+        days = -(-total_trades // day_length)
+        fan_rows = min(max(fan_paths(days) - first_path, 0), iterations)
+        # Days after a path's ruin keep these values
+        day_balances = np.zeros((fan_rows, days))
+        day_drawdowns = np.full((fan_rows, days), 100.0)
+
+    block = _FIRST_BLOCK_TRADES
+    done = 0
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        while done < total_trades and alive.size:
+            check_cancelled()
+            width = min(block, total_trades - done)
+            block = min(block * 2, _MAX_BLOCK_TRADES)
+            if day_length:
+                trade_no = np.arange(done + 1, done + width + 1)
+                day_columns = np.flatnonzero((trade_no % day_length == 0) | (trade_no == total_trades))
+                day_index = (trade_no[day_columns] - 1) // day_length
+
+            survivors = []
+            chunk_rows = max(1, _CHUNK_CELLS // width)
+            for start in range(0, alive.size, chunk_rows):
+                rows = alive[start:start + chunk_rows]
+                if returns is not None:
+                    outcomes = _draw_returns(key, first_path + rows, done, width, returns, block_length)
+                elif remaining_wins is not None:
+                    outcomes = _place_wins(rng, remaining_wins, rows, total_trades - done, width)
+                else:
+                    outcomes = _draw_wins(key, sampler, rows, iterations, first_path, done, width, win_rate)
+                if payoffs is not None and returns is None:
+                    outcomes = _payoff_returns(payoff_key, outcomes, first_path + rows, done, width, payoffs)
+                curve, running_peak, path_ruined = _advance(
+                    (balance, peak, max_drawdown, ruined), rows, outcomes,
+                    initial_balance, risk_per_trade, rr_ratio, fees, risk_type)
+
+                # Rows are in id order, so the followed paths come first
+                followed = np.searchsorted(rows, fan_rows) if day_length and day_columns.size else 0
+                if followed:
+                    cells = np.ix_(rows[:followed], day_index)
+                    day_end = np.maximum(curve[:followed, day_columns], 0.0)
+                    day_balances[cells] = day_end
+                    day_drawdowns[cells] = (1.0 - day_end / running_peak[:followed, day_columns]) * 100
+
+                survivors.append(rows[~path_ruined])
+
+            done += width
+            alive = np.concatenate(survivors)
+
+    result = {"final_balances": balance, "max_drawdowns": max_drawdown, "ruined": ruined}
+    if remaining_wins is not None:
+        result["win_counts"] = win_counts
+    if day_length:
+        result["day_balances"] = day_balances
+        result["day_drawdowns"] = day_drawdowns
+    return result
+
+
+def sweep_paths(initial_balance, cells, fees, risk_type, total_trades, iterations, seed, first_path=0,
+                checkpoints=()):
+    """Monte Carlo over a grid of `cells`, (win_rate, risk_per_trade, rr_ratio) tuples.
+
+    Every cell replays the same random numbers (common random numbers): path i
+    of each cell uses the cell_bits of the same global id, so differences
+    between cells are not blurred by sampling noise, and each cell equals a
+    random-sampler `simulate_paths` run with the same seed. The bits of a block
+    are hashed once and thresholded once per distinct win rate.
+
+    Returns `final_balances`, `max_drawdowns` and `ruined`, each (cells x iterations).
+    With `checkpoints` (sorted trade counts, at most total_trades) also `peaks`
+    (cells x checkpoints x iterations): the highest balance of every path up
+    to each checkpoint.
+    """
+    key = cell_key(seed)
+    shape = (len(cells), iterations)
+    balance = np.full(shape, initial_balance, dtype=np.float64)
+    peak = balance.copy()
+    max_drawdown = np.zeros(shape)
+    ruined = np.zeros(shape, dtype=bool)
+    peaks = np.empty((len(cells), len(checkpoints), iterations))
+    states = [(balance[c], peak[c], max_drawdown[c], ruined[c]) for c in range(len(cells))]
+    by_win_rate = {}
+    for c, (win_rate, _, _) in enumerate(cells):
+        by_win_rate.setdefault(win_rate, []).append(c)
+
+    block = _FIRST_BLOCK_TRADES
+    done = 0
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        while done < total_trades:
+            # Paths still alive in at least one cell
+            union = np.flatnonzero(~ruined.all(axis=0))
+            if not union.size:
+                break
+            check_cancelled()
+            width = min(block, total_trades - done)
+            block = min(block * 2, _MAX_BLOCK_TRADES)
+            # Checkpoints inside this block, as (index, column); paths ruined
+            # earlier keep the peak they had
+            crossed = [(k, t - done - 1) for k, t in enumerate(checkpoints) if done < t <= done + width]
+            for k, _ in crossed:
+                peaks[:, k] = peak
+
+            chunk_rows = max(1, _CHUNK_CELLS // width)
+            for start in range(0, union.size, chunk_rows):
+                rows = union[start:start + chunk_rows]
+                bits = cell_bits(key, first_path + rows, done, width)
+                outcomes = ((bits < bernoulli_threshold(win_rate) if win_rate < 1 else np.ones(bits.shape, dtype=bool), group)
+                            for win_rate, group in by_win_rate.items())
+                for wins, group in outcomes:
+                    for c in group:
+                        alive = ~ruined[c, rows]
+                        if alive.any():
+                            _, running_peak, _ = _advance(states[c], rows[alive], wins[alive], initial_balance,
+                                                          *cells[c][1:], fees, risk_type)
+                            for k, column in crossed:
+                                peaks[c, k, rows[alive]] = running_peak[:, column]
+            done += width
+
+    # Checkpoints after every path was ruined
+    for k, t in enumerate(checkpoints):
+        if t > done:
+            peaks[:, k] = peak
+    result = {"final_balances": balance, "max_drawdowns": max_drawdown, "ruined": ruined}
+    if len(checkpoints):
+        result["peaks"] = peaks
+    return result
+
+
+def _normals(key, paths, first_cell, shape):
+    """Standard normals from the counter-based cell bits (Box-Muller, one per draw)."""
+    bits = cell_bits(key, paths, first_cell, shape[0] * shape[1])
+    u1 = ((bits >> np.uint64(11)) + 1) * 2.0 ** -53
+    u2 = (bits & np.uint64(0xFFFFFFFF)) * 2.0 ** -32
+    z = np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2)
+    return z.reshape(len(paths), *shape)
+
+
+def simulate_portfolio(initial_balance, win_rates, risks, rr_ratios, fees, trades_per_day, days,
+                       risk_type, iterations, seed, correlation=None):
+    """Monte Carlo of several strategies trading one shared balance.
+
+    Strategy i has its own win rate, risk, RR, fee and trades per day. Each day
+    runs max(trades_per_day) rounds; round k includes every strategy with more
+    than k trades a day, all sized from the balance at the start of the round.
+    With `correlation` (a matrix on the strategies) outcomes of a round are
+    correlated through a Gaussian copula: strategy i wins when its latent normal
+    falls below the win-rate quantile. Rounds, paths and strategies form one
+    (paths x rounds x strategies) tensor per block; the summed round returns
+    run through the same balance / ruin / drawdown kernel as simulate_paths.
+
+    Returns `final_balances`, `max_drawdowns`, `ruined` and `contributions`
+    (paths x strategies, P&L of each strategy; a path's contributions add up
+    to its final balance minus initial_balance).
+    """
+    win_rates, risks, rr_ratios, fees = (np.asarray(v, dtype=np.float64) for v in (win_rates, risks, rr_ratios, fees))
+    trades_per_day = np.asarray(trades_per_day)
+    strategies = win_rates.size
+    rounds_per_day = int(trades_per_day.max())
+    total_rounds = rounds_per_day * days
+    key = cell_key(seed)
+
+    cholesky = None
+    if correlation is not None and not np.allclose(correlation, np.eye(strategies)):
+        cholesky = np.linalg.cholesky(np.asarray(correlation, dtype=np.float64))
+        dist = NormalDist()
+        latent_threshold = np.array([-np.inf if p <= 0 else np.inf if p >= 1 else dist.inv_cdf(p) for p in win_rates])
+    else:
+        win_threshold = np.array([bernoulli_threshold(p) for p in win_rates], dtype=np.uint64)
+
+    balance = np.full(iterations, initial_balance, dtype=np.float64)
+    peak = balance.copy()
+    max_drawdown = np.zeros(iterations)
+    ruined = np.zeros(iterations, dtype=bool)
+    contributions = np.zeros((iterations, strategies))
+    alive = np.arange(iterations)
+    # Fixed risk sizes every trade from the initial balance
+    base = None if risk_type == "dynamic" else initial_balance
+
+    block = _FIRST_BLOCK_TRADES
+    done = 0
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        while done < total_rounds and alive.size:
+            check_cancelled()
+            width = min(block, total_rounds - done)
+            block = min(block * 2, _MAX_BLOCK_TRADES)
+            # (rounds x strategies): who trades in each round, and at what stake
+            active = (np.arange(done, done + width) % rounds_per_day)[:, None] < trades_per_day
+            stake = active * risks
+            round_fees = active @ fees
+
+            survivors = []
+            chunk_rows = max(1, _CHUNK_CELLS // (width * strategies))
+            for start in range(0, alive.size, chunk_rows):
+                rows = alive[start:start + chunk_rows]
+                if cholesky is not None:
+                    wins = _normals(key, rows, done * strategies, (width, strategies)) @ cholesky.T < latent_threshold
+                else:
+                    bits = cell_bits(key, rows, done * strategies, width * strategies)
+                    wins = bits.reshape(rows.size, width, strategies) < win_threshold
+                # Return of each strategy's trade, as a fraction of the staked balance
+                strategy_returns = np.where(wins, rr_ratios, -1.0)
+                strategy_returns *= stake
+                round_returns = strategy_returns.sum(axis=2)
+
+                start_balance = balance[rows]
+                curve, _, path_ruined = _advance(
+                    (balance, peak, max_drawdown, ruined), rows, round_returns,
+                    initial_balance, 1.0, 1.0, round_fees, risk_type)
+
+                # Each strategy's P&L on the balance before each round; nothing after ruin
+                before = np.concatenate([start_balance[:, None], curve[:, :-1]], axis=1)
+                traded = before > 0
+                strategy_returns *= (traded * (before if base is None else base))[:, :, None]
+                strategy_returns -= traded[:, :, None] * (active * fees)
+                ruined_rows = np.flatnonzero(path_ruined)
+                if ruined_rows.size:
+                    # The ruinous round can only lose the balance left: split that among its strategies
+                    ruin_round = (~(curve[ruined_rows] > 0)).argmax(axis=1)
+                    ruin_pnl = strategy_returns[ruined_rows, ruin_round]
+                    ruin_pnl *= (-before[ruined_rows, ruin_round] / ruin_pnl.sum(axis=1))[:, None]
+                    strategy_returns[ruined_rows, ruin_round] = ruin_pnl
+                contributions[rows] += strategy_returns.sum(axis=1)
+                survivors.append(rows[~path_ruined])
+            done += width
+            alive = np.concatenate(survivors)
+
+    return {"final_balances": balance, "max_drawdowns": max_drawdown, "ruined": ruined, "contributions": contributions}
+
+
+# Convergence loop: the first batch holds the fewest paths any estimate rests
+# on, later batches are sized from the current standard errors.
+_MIN_PATHS = 500
+_MIN_BATCH = 200
+_Z95 = 1.96
+# Smallest variance ratio credited to a variance-reduced sampler
+_MIN_DESIGN_EFFECT = 0.01
+
+
+def _design_effect(values, sampler, pairs):
+    """Variance of the mean of `values` (one per path, in global id order) under
+    the sampler, relative to the variance of independent paths.
+
+    Antithetic pairs (paths 2k, 2k + 1) are independent units, so the variance
+    comes from the spread of the pair means. Stratified paths hold one draw per
+    stratum; `pairs` holds neighbouring strata (global ids), and the collapsed
+    strata estimate sums their squared differences. Floored at
+    _MIN_DESIGN_EFFECT, since a handful of differing pairs can estimate 0.
+    """
+    n = values.size
+    independent = values.var(ddof=1) / n if n > 1 else 0.0
+    if sampler == "antithetic" and n >= 4:
+        means = (values[0:n - 1:2] + values[1::2]) / 2
+        variance = means.var(ddof=1) / means.size
+    elif sampler == "stratified" and pairs is not None and pairs.size:
+        variance = ((values[pairs[:, 0]] - values[pairs[:, 1]]) ** 2).sum() / n ** 2
+    else:
+        return 1.0
+    if independent <= 0:
+        return 1.0
+    return max(variance / independent, _MIN_DESIGN_EFFECT)
+
+
+def _estimate_errors(final_balances, ruined, log_scale=False, sampler="random", pairs=None):
+    """Standard errors of the ruin probability (percentage points) and the median
+    (currency), and the relative 95% half-width of the median.
+
+    The ruin error uses the Agresti-Coull estimate so a run with no ruined paths
+    still reports an honest, non-zero uncertainty. The median error comes from
+    the order-statistic 95% confidence interval. Both i.i.d. errors are scaled
+    by the sampler's design effect (see _design_effect) on the ruin indicator
+    and on the indicator of ending at or below the median.
+
+    The median's relative half-width is taken in log space with `log_scale`
+    (as a log return). When one gap between neighbouring outcomes makes up
+    most of its interval, the median sits between two clusters of outcomes (a
+    discrete distribution, e.g. a few trades), no number of paths narrows it
+    further, and the relative half-width is 0.
+    """
+    n = final_balances.size
+    p = (ruined.sum() + 2) / (n + 4)
+    ruin_stderr = np.sqrt(p * (1 - p) / (n + 4)) * 100
+
+    ordered = np.sort(final_balances)
+    spread = _Z95 * np.sqrt(n) / 2
+    lo = max(int(np.floor(n / 2 - spread)), 0)
+    hi = min(int(np.ceil(n / 2 + spread)), n - 1)
+    low, high = ordered[lo], ordered[hi]
+    median = ordered[n // 2]
+    ruin_scale = np.sqrt(_design_effect(ruined.astype(np.float64), sampler, pairs))
+    median_scale = np.sqrt(_design_effect((final_balances <= median).astype(np.float64), sampler, pairs))
+    ruin_stderr *= ruin_scale
+    median_stderr = (high - low) / 2 / _Z95 * median_scale
+    if high == low or np.diff(ordered[lo:hi + 1]).max() > (high - low) * 0.75:
+        relative = 0.0
+    elif log_scale:
+        relative = np.log(high / low) / 2 * median_scale if low > 0 else np.inf
+    else:
+        relative = (high - low) / 2 * median_scale / abs(median) if median != 0 else np.inf
+    return ruin_stderr, median_stderr, relative
+
+
+class PrecisionTracker:
+    """Running Monte Carlo estimates over batches of paths, and the size of the next batch.
+
+    `precision` is the target 95% confidence half-width in percent: absolute
+    percentage points for the ruin probability, and percent of the median for
+    the median. With `log_scale` (compounding risk, where outcomes multiply)
+    the median's half-width is a log return, log(1 + precision / 100).
+    `sampler` is the one the batches were drawn with: antithetic pairs and
+    stratified win counts (the batches' `win_counts`) narrow the errors, so
+    variance-reduced runs stop on fewer paths.
+
+    `next_batch` is 0 once `max_iterations` paths were added, or once the
+    estimates are precise enough with at least _MIN_PATHS paths. With
+    `max_batch` no batch exceeds that many paths, e.g. to report progress at a
+    steady pace.
+    """
+
+    def __init__(self, precision, max_iterations, max_batch=None, log_scale=False, sampler="random"):
+        self.precision = precision
+        self.max_iterations = max_iterations
+        self.max_batch = max_batch
+        self.log_scale = log_scale
+        self.sampler = sampler
+        self.iterations = 0
+        self.converged = False
+        self.ruin_stderr = self.median_stderr = 0.0
+        self._batches = []
+        # Global ids of neighbouring strata, per stratified batch
+        self._pairs = []
+        # Per-day rows of the fan chart's paths, kept apart: only the first batches have any
+        self._days = {}
+        self._next = min(_MIN_PATHS, max_iterations)
+
+    @property
+    def next_batch(self) -> int:
+        if self.max_batch is None or self._next <= self.max_batch:
+            return self._next
+        # Even batches keep antithetic pairs within one batch
+        return max(self.max_batch & ~1, 2)
+
+    def add(self, paths):
+        """Fold in one simulate_paths result whose paths continue the global ids."""
+        batch = paths["final_balances"].size
+        paths = dict(paths)
+        for key in ("day_balances", "day_drawdowns"):
+            if key in paths:
+                parts = self._days.setdefault(key, [])
+                rows = paths.pop(key)
+                if rows.shape[0] or not parts:
+                    parts.append(rows)
+        win_counts = paths.pop("win_counts", None)
+        if win_counts is not None:
+            # Win counts rise with the stratum, and equal counts share neighbouring strata
+            order = np.argsort(win_counts, kind="stable") + self.iterations
+            self._pairs.append(order[:batch & ~1].reshape(-1, 2))
+        self._batches.append(paths)
+        self.iterations += batch
+
+        final_balances, ruined = self._concatenate("final_balances"), self._concatenate("ruined")
+        pairs = np.concatenate(self._pairs) if self._pairs else None
+        ruin_stderr, median_stderr, relative = _estimate_errors(final_balances, ruined, self.log_scale,
+                                                                self.sampler, pairs)
+        self.ruin_stderr, self.median_stderr = float(ruin_stderr), float(median_stderr)
+
+        # Required paths scale with the square of (achieved / target) half-width
+        ruin_ratio = _Z95 * ruin_stderr / self.precision
+        median_target = np.log1p(self.precision / 100) if self.log_scale else self.precision / 100
+        median_ratio = relative / median_target
+        worst = max(ruin_ratio, median_ratio)
+        self.converged = bool(worst <= 1 and self.iterations >= min(_MIN_PATHS, self.max_iterations))
+        if self.converged or self.iterations >= self.max_iterations:
+            self._next = 0
+        else:
+            needed = max(self.iterations * min(worst, 1e3) ** 2 * 1.1, _MIN_PATHS)
+            # Even batches keep antithetic pairs within one batch
+            self._next = min(int(max(needed - self.iterations, _MIN_BATCH)) + 1 & ~1, self.max_iterations - self.iterations)
+
+    def _concatenate(self, key):
+        if len(self._batches) > 1:
+            self._batches = [{k: np.concatenate([b[k] for b in self._batches]) for k in self._batches[0]}]
+        return self._batches[0][key]
+
+    def result(self):
+        """The per-path arrays so far plus `iterations`, `converged`, `ruin_stderr`,
+        `median_stderr`, and the `day_balances` / `day_drawdowns` of the fan
+        chart's paths when the batches have them (see fan_bands)."""
+        result = {
+            "final_balances": self._concatenate("final_balances"),
+            "max_drawdowns": self._concatenate("max_drawdowns"),
+            "ruined": self._concatenate("ruined"),
+            "iterations": self.iterations,
+            "converged": self.converged,
+            "ruin_stderr": self.ruin_stderr,
+            "median_stderr": self.median_stderr,
+        }
+        for key, parts in self._days.items():
+            if len(parts) > 1:
+                parts[:] = [np.concatenate(parts)]
+            result[key] = parts[0]
+        return result
+
+
+def simulate_to_precision(initial_balance, risk_per_trade, rr_ratio, win_rate, fees, risk_type,
+                          total_trades, precision, max_iterations, seed=None, sampler="random", day_length=None,
+                          returns=None, block_length=1, payoffs=None):
+    """Run `simulate_paths` in batches until the estimates are precise enough.
+
+    See PrecisionTracker for `precision` and the returned estimates; the median
+    of compounding (`dynamic`) risk is judged in log space, and the errors
+    account for the sampler's variance reduction. With `day_length` the result
+    has the `day_balances` and `day_drawdowns` of the fan chart's paths, as one
+    simulate_paths call would.
+
+    `returns` / `block_length` (bootstrap outcomes) and `payoffs` are passed through.
+
+    Batches continue the global path ids, so with the random sampler the
+    per-path arrays equal one simulate_paths call over all `iterations` paths.
+    """
+    if seed is None:
+        seed = new_seed()
+
+    # Bootstrap outcomes ignore the sampler
+    tracker = PrecisionTracker(precision, max_iterations, log_scale=risk_type == "dynamic",
+                               sampler=sampler if returns is None else "random")
+    while tracker.next_batch:
+        tracker.add(simulate_paths(initial_balance, risk_per_trade, rr_ratio, win_rate, fees, risk_type,
+                                   total_trades, tracker.next_batch, seed=seed, sampler=sampler, day_length=day_length,
+                                   first_path=tracker.iterations, returns=returns, block_length=block_length, payoffs=payoffs))
+    return tracker.result()
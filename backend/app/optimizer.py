@@ -0,0 +1,161 @@
+import numpy as np
+from .models import GOAL_GRID_CELLS
+from .monte_carlo import sweep_paths
+
+# Cells (candidates x paths x trades) simulated per search round, sized so a
+# one-year horizon stays within an interactive latency budget
+_ROUND_CELLS = 4 * 10 ** 6
+_MIN_PATHS = 200
+_MAX_PATHS = 2000
+# Coarse round: log-spaced from upper * _FLOOR to the analytic upper bound;
+# the fine round fills the gap around the best coarse candidate
+_COARSE_POINTS = 10
+_FINE_POINTS = 6
+_FLOOR = 1 / 256
+
+
+def kelly_fraction(win_rate, rr_ratio):
+    """Growth-optimal fraction of equity to risk on a win/loss bet paying rr_ratio:1."""
+    return win_rate - (1 - win_rate) / rr_ratio
+
+
+def _evaluate(initial_balance, risks, win_rate, rr_ratio, fees, risk_type, total_trades, seed):
+    """Median final balance, ruin probability (%) and average max drawdown (%) per risk.
+
+    All candidates share the same random numbers, so their ranking isn't
+    decided by sampling noise.
+    """
+    paths = int(np.clip(_ROUND_CELLS // (len(risks) * total_trades), _MIN_PATHS, _MAX_PATHS))
+    cells = [(win_rate, risk, rr_ratio) for risk in risks]
+    grid = sweep_paths(initial_balance, cells, fees, risk_type, total_trades, paths, seed)
+    median = np.sort(grid["final_balances"], axis=1)[:, paths // 2]
+    return paths, np.column_stack([risks, median, grid["ruined"].mean(axis=1) * 100, grid["max_drawdowns"].mean(axis=1)])
+
+
+def _best(rows, max_ruin, max_drawdown):
+    """Row index with the highest median among those meeting the constraints, or None."""
+    feasible = rows[:, 2] <= max_ruin
+    if max_drawdown is not None:
+        feasible &= rows[:, 3] <= max_drawdown
+    if not feasible.any():
+        return None
+    # Ties go to the lower risk (rows are sorted by risk)
+    return int(np.argmax(np.where(feasible, rows[:, 1], -np.inf)))
+
+
+def search_risk(initial_balance, win_rate, rr_ratio, fees, risk_type, total_trades, seed,
+                max_ruin, max_drawdown=None):
+    """Risk per trade (0-1) maximizing the median final balance under the constraints.
+
+    The Kelly fraction bounds the search for compounding risk: beyond it the
+    median only falls while drawdowns grow. Fixed risk has no such peak, so its
+    search runs up to 100%. A coarse log-spaced round of the Monte Carlo is
+    refined around its best candidate.
+
+    Returns None without a positive edge; otherwise a dict with `rows`
+    (risk, median, ruin %, avg max drawdown %) sorted by risk, the index of
+    the `best` row (None when no candidate meets the constraints) and the
+    `paths` simulated per candidate.
+    """
+    kelly = kelly_fraction(win_rate, rr_ratio)
+    if kelly <= 0:
+        return None
+    upper = min(kelly, 1.0) if risk_type == "dynamic" else 1.0
+
+    coarse = np.geomspace(upper * _FLOOR, upper, _COARSE_POINTS)
+    paths, rows = _evaluate(initial_balance, coarse, win_rate, rr_ratio, fees, risk_type, total_trades, seed)
+    best = _best(rows, max_ruin, max_drawdown)
+    if best is not None:
+        low = coarse[max(best - 1, 0)]
+        high = coarse[min(best + 1, _COARSE_POINTS - 1)]
+        fine = np.linspace(low, high, _FINE_POINTS + 2)[1:-1]
+        fine_paths, fine_rows = _evaluate(initial_balance, fine, win_rate, rr_ratio, fees, risk_type, total_trades, seed)
+        paths = min(paths, fine_paths)
+        rows = np.concatenate([rows, fine_rows])
+        rows = rows[np.argsort(rows[:, 0], kind="stable")]
+        best = _best(rows, max_ruin, max_drawdown)
+    return {"rows": rows, "best": best, "paths": paths}
+
+
+# Goal solver: the coarse round spans the whole range in GOAL_GRID_CELLS
+# points, then every bracket is halved until it is within _GOAL_TOLERANCE (relative)
+_GOAL_TOLERANCE = 0.01
+_GOAL_MAX_STEPS = 12
+# Lowest risk of the coarse round, as a fraction of the balance
+_GOAL_MIN_RISK = 1 / 1024
+# Peak balances (cells x checkpoints x paths) held by one sweep
+_GOAL_PEAK_CELLS = 4 * 10 ** 6
+
+
+def _reach(initial_balance, cells, fees, risk_type, iterations, seed, targets, checkpoints, horizon):
+    """Fraction of paths whose balance reaches targets[s] by trade count checkpoints[s],
+    for every cell (cells x targets)."""
+    points = sorted(set(checkpoints))
+    column = np.searchsorted(points, checkpoints)
+    group = max(1, _GOAL_PEAK_CELLS // (len(points) * iterations))
+    reach = []
+    for start in range(0, len(cells), group):
+        peaks = sweep_paths(initial_balance, cells[start:start + group], fees, risk_type, horizon, iterations,
+                            seed, checkpoints=points)["peaks"]
+        reach.append((peaks[:, column] >= np.asarray(targets)[:, None]).mean(axis=2))
+    return np.concatenate(reach)
+
+
+def _midpoint(low, high, geometric):
+    return np.where(geometric & (low > 0), np.sqrt(low * high), (low + high) / 2)
+
+
+def solve_goal(initial_balance, solve_for, win_rate, risk_per_trade, rr_ratio, fees, risk_type,
+               targets, checkpoints, probability, iterations, seed):
+    """Smallest win rate or risk per trade (0-1) with which the balance reaches
+    each target by its checkpoint (a trade count) with `probability` (0-1).
+
+    `solve_for` is "win_rate" or "risk_per_trade"; the other one stays fixed.
+    A coarse round evaluates a grid over the whole range (linear for the win
+    rate, log-spaced for the risk) for every goal at once; each goal then
+    bisects the bracket below its first grid value that meets the probability.
+    The midpoints of all goals are simulated together in one sweep per step,
+    and every step replays the same paths, so the reach probability of a path
+    set never moves between steps and the bisection converges on it.
+
+    Returns (required, probabilities): per goal the value (nan when no value in
+    range is enough) and the reach probability at that value.
+    """
+    targets = np.asarray(targets, dtype=np.float64)
+    horizon = int(max(checkpoints))
+
+    def cells(values):
+        if solve_for == "win_rate":
+            return [(float(v), risk_per_trade, rr_ratio) for v in values]
+        return [(win_rate, float(v), rr_ratio) for v in values]
+
+    geometric = solve_for == "risk_per_trade"
+    if geometric:
+        grid = np.geomspace(_GOAL_MIN_RISK, 1.0, GOAL_GRID_CELLS)
+    else:
+        grid = np.linspace(0.0, 1.0, GOAL_GRID_CELLS + 1)[1:]
+    reach = _reach(initial_balance, cells(grid), fees, risk_type, iterations, seed, targets, checkpoints, horizon)
+    meets = reach >= probability
+    feasible = meets.any(axis=0)
+    first = meets.argmax(axis=0)
+    # Below the grid every target is out of reach: no wins, or no risk taken
+    high = grid[first]
+    low = np.where(first > 0, grid[np.maximum(first - 1, 0)], 0.0)
+    achieved = reach[first, np.arange(targets.size)]
+
+    for _ in range(_GOAL_MAX_STEPS):
+        open_goals = np.flatnonzero(feasible & (high - low > _GOAL_TOLERANCE * high))
+        if not open_goals.size:
+            break
+        middle = _midpoint(low[open_goals], high[open_goals], geometric)
+        # Goals sharing a bracket share its midpoint
+        values, index = np.unique(middle, return_inverse=True)
+        reach = _reach(initial_balance, cells(values), fees, risk_type, iterations, seed,
+                       targets[open_goals], np.asarray(checkpoints)[open_goals], horizon)
+        reach = reach[index, np.arange(open_goals.size)]
+        up = reach >= probability
+        high[open_goals[up]] = middle[up]
+        achieved[open_goals[up]] = reach[up]
+        low[open_goals[~up]] = middle[~up]
+
+    return np.where(feasible, high, np.nan), np.where(feasible, achieved, np.nan)
@@ -0,0 +1,93 @@
+from collections import namedtuple
+import numpy as np
+
+# Every alias table has this many columns (unused ones get zero weight), so a
+# column is just the top bits of a draw
+TABLE_SIZE = 1024
+# A sample uses 32 random bits: 10 pick the column, 22 flip its coin
+_COLUMN_SHIFT = np.uint64(22)
+_COIN_MASK = np.uint64((1 << 22) - 1)
+_COIN_SCALE = float(1 << 22)
+# Grid points used to discretize continuous payoff distributions
+_GRID_POINTS = 512
+# Continuous densities are cut this many standard deviations from the mean
+_TAIL_SIGMAS = 6.0
+
+# Walker/Vose alias table over `columns` columns: `lookup` holds the column
+# values followed by their alias values; column i keeps its own value when
+# its coin falls below `threshold[i]` (out of 2**22)
+AliasTable = namedtuple("AliasTable", ["lookup", "threshold", "mean"])
+
+
+def build_alias_table(values, weights) -> AliasTable:
+    """Vose's alias method: O(K) setup, O(1) sampling from K weighted values."""
+    probabilities = np.zeros(TABLE_SIZE)
+    probabilities[:len(weights)] = weights
+    probabilities /= probabilities.sum()
+    padded = np.zeros(TABLE_SIZE)
+    padded[:len(values)] = values
+
+    scaled = probabilities * TABLE_SIZE
+    alias = np.arange(TABLE_SIZE)
+    small = [i for i in range(TABLE_SIZE) if scaled[i] < 1.0]
+    large = [i for i in range(TABLE_SIZE) if scaled[i] >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    # Leftovers are 1 up to rounding
+    for i in small + large:
+        scaled[i] = 1.0
+    threshold = np.minimum(np.round(scaled * _COIN_SCALE), _COIN_SCALE).astype(np.uint64)
+    return AliasTable(np.concatenate([padded, padded[alias]]), threshold, float(padded @ probabilities))
+
+
+def signed_outcomes(win_table: AliasTable, loss_table: AliasTable) -> AliasTable:
+    """One table of R-multiples: win sizes in columns [0, TABLE_SIZE), negated loss
+    sizes after them, so a block of wins and losses is sampled in a single lookup."""
+    win_values, win_alias = np.split(win_table.lookup, 2)
+    loss_values, loss_alias = np.split(loss_table.lookup, 2)
+    return AliasTable(
+        np.concatenate([win_values, -loss_values, win_alias, -loss_alias]),
+        np.concatenate([win_table.threshold, loss_table.threshold]),
+        None,
+    )
+
+
+def sample(table: AliasTable, bits, offset=None):
+    """One value per draw from the low 32 bits of `bits` (uint64).
+
+    `offset` (optional, per draw) shifts the column, e.g. TABLE_SIZE for the
+    loss half of a signed_outcomes table.
+    """
+    bits = bits & np.uint64(0xFFFFFFFF)
+    column = (bits >> _COLUMN_SHIFT).view(np.int64)
+    if offset is not None:
+        column += offset
+    # Columns whose coin comes up above the threshold read their alias instead
+    column += ((bits & _COIN_MASK) >= table.threshold[column]) * table.threshold.size
+    return table.lookup[column]
+
+
+def payoff_table(spec) -> AliasTable:
+    """Alias table for a PayoffDistribution (magnitudes in R, never negative)."""
+    if spec.kind == "fixed":
+        return build_alias_table([float(spec.value)], [1.0])
+    if spec.kind == "histogram":
+        return build_alias_table([float(v) for v in spec.values], [float(w) for w in spec.weights])
+
+    mean, std = float(spec.mean), float(spec.std)
+    if spec.kind == "normal":
+        # Truncated at 0: a win never costs and a loss never pays
+        grid = np.linspace(max(mean - _TAIL_SIGMAS * std, 0.0), mean + _TAIL_SIGMAS * std, _GRID_POINTS)
+        weights = np.exp(-0.5 * ((grid - mean) / std) ** 2)
+    else:
+        # lognormal with the requested mean and standard deviation
+        sigma2 = np.log1p((std / mean) ** 2)
+        mu, sigma = np.log(mean) - sigma2 / 2, np.sqrt(sigma2)
+        log_grid = np.linspace(mu - _TAIL_SIGMAS * sigma, mu + _TAIL_SIGMAS * sigma, _GRID_POINTS)
+        grid = np.exp(log_grid)
+        # Equal-width bins in log(x): each one's mass follows the normal density of log(x)
+        weights = np.exp(-0.5 * ((log_grid - mu) / sigma) ** 2)
+    return build_alias_table(grid, weights)
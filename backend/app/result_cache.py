@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from decimal import Decimal
+from cachetools import TTLCache
+
+# Identical simulation requests (same parameters, same seed) are served from a
+# content-addressed cache instead of being re-simulated.
+SIM_CACHE_BACKEND = os.getenv("SIM_CACHE_BACKEND", "memory")  # memory | sqlite | off
+SIM_CACHE_PATH = os.getenv("SIM_CACHE_PATH", "simulation_cache.sqlite3")
+SIM_CACHE_TTL = float(os.getenv("SIM_CACHE_TTL", "600"))  # seconds
+SIM_CACHE_MAX_BYTES = int(os.getenv("SIM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def _canonical(value):
+    # 2, 2.0, Decimal("2") and Decimal("2.00") describe the same request
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return format(Decimal(str(value)).normalize(), "f")
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def make_key(kind: str, request) -> str:
+    """Content address of a request: `kind` (endpoint/format) plus every request field."""
+    payload = json.dumps(_canonical(request.model_dump(warnings=False)), sort_keys=True)
+    return hashlib.sha256(f"{kind}:{payload}".encode()).hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU with TTL, bounded by the total size of the stored values."""
+
+    def __init__(self, max_bytes: int = SIM_CACHE_MAX_BYTES, ttl: float = SIM_CACHE_TTL, timer=time.monotonic):
+        self._cache = TTLCache(maxsize=max_bytes, ttl=ttl, timer=timer, getsizeof=len)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            try:
+                self._cache[key] = value
+            except ValueError:
+                # Larger than the whole cache
+                pass
+
+
+class SQLiteBackend:
+    """File-backed store shared by every web worker on the host.
+
+    Entries expire after `ttl`; when the stored values exceed `max_bytes`
+    the least recently used ones are evicted.
+    """
+
+    def __init__(self, path: str = SIM_CACHE_PATH, max_bytes: int = SIM_CACHE_MAX_BYTES,
+                 ttl: float = SIM_CACHE_TTL, timer=time.time):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._timer = timer
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "expires REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=5, isolation_level=None))
+
+    def get(self, key: str):
+        now = self._timer()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM results WHERE key = ? AND expires > ?", (key, now)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        now = self._timer()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now + self.ttl, now),
+            )
+            conn.execute("DELETE FROM results WHERE expires <= ?", (now,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total > self.max_bytes:
+                # Drop least recently used rows until the rest fits
+                conn.execute(
+                    "DELETE FROM results WHERE key IN ("
+                    " SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed DESC, key) AS kept FROM results)"
+                    " WHERE kept > ?)",
+                    (self.max_bytes,),
+                )
+            conn.execute("COMMIT")
+
+
+class ResultCache:
+    """Pickling front-end over a pluggable byte-store backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, key: str):
+        if self.backend is None:
+            return None
+        value = self.backend.get(key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key: str, result):
+        if self.backend is not None:
+            self.backend.set(key, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _backend_from_env():
+    if SIM_CACHE_BACKEND == "sqlite":
+        return SQLiteBackend()
+    if SIM_CACHE_BACKEND == "off":
+        return None
+    return MemoryBackend()
+
+
+result_cache = ResultCache(_backend_from_env())
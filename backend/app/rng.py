@@ -0,0 +1,66 @@
+import secrets
+import numpy as np
+
+# Every simulation runs from one integer seed. Seeds stay below 2**53 so they
+# survive a round trip through JSON / JavaScript numbers.
+SEED_MAX = 2 ** 53 - 1
+
+# Independent PCG64 streams derived from the seed
+PROJECTION_STREAM = 0
+STRATIFIED_STREAM = 1
+# cell_bits sub-stream for the size of wins / losses and slippage
+PAYOFF_STREAM = 2
+
+# SplitMix64 constants
+_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_SHIFTS = tuple(np.uint64(n) for n in (30, 27, 31, 32))
+_UINT64_MAX = 2 ** 64 - 1
+
+
+def new_seed() -> int:
+    return secrets.randbits(53)
+
+
+def stream(seed: int, *key: int) -> np.random.Generator:
+    """PCG64 generator for the sub-stream `key` of `seed`."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=key))
+
+
+def cell_key(seed: int, *key: int) -> np.uint64:
+    """Hashed seed of sub-stream `key` for cell_bits, so nearby seeds give unrelated outcomes."""
+    return np.random.SeedSequence(seed, spawn_key=key).generate_state(1, np.uint64)[0]
+
+
+def cell_bits(key: np.uint64, paths, first_trade: int, width: int):
+    """64 random bits for every (path, trade) cell, one row per path.
+
+    Counter-based: cell (p, t) is the SplitMix64 output number (p << 32 | t) of
+    the stream `key`. It depends on nothing else, so a path sees the same
+    outcomes however paths are batched, blocked or split across processes.
+    """
+    s30, s27, s31, s32 = _SHIFTS
+    z = np.left_shift(np.asarray(paths, dtype=np.uint64)[:, None], s32)
+    z = z | np.arange(first_trade, first_trade + width, dtype=np.uint64)
+    z *= _GAMMA
+    z += key
+    t = z >> s30
+    z ^= t
+    z *= _MIX1
+    np.right_shift(z, s27, out=t)
+    z ^= t
+    z *= _MIX2
+    np.right_shift(z, s31, out=t)
+    z ^= t
+    return z
+
+
+def bounded(bits, n: int):
+    """Map 64 random bits to integers in [0, n) (multiply-shift; n < 2**32)."""
+    return ((bits >> np.uint64(32)) * np.uint64(n) >> np.uint64(32)).astype(np.int64)
+
+
+def bernoulli_threshold(probability: float) -> np.uint64:
+    """Bits below this value occur with `probability`."""
+    return np.uint64(min(max(int(probability * 2.0 ** 64), 0), _UINT64_MAX))
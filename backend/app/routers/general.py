@@ -8,6 +8,10 @@ from sqlmodel import Session
 from ..database import get_session
 from ..models import ChatRequest, ChatResponse, ChatEnhancedRequest, ChatEnhancedResponse, FeedbackCreate, Feedback, ReportCreate, Report, User
 from ..dependencies import get_current_user
+from ..market_cache import market_cache
+from ..engine import get_watchlist
+from ..symbols import DEFAULT_WATCHLIST, normalize_symbol
+from ..market_refresher import hot_symbols
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
@@ -28,15 +32,24 @@ class MarketDataResponse(BaseModel):
     data: List[MarketData]
     timestamp: str
 
+def _download_quote(yf_symbol: str):
+    """Ticker info and 2-day history (for the daily change) of a yfinance symbol."""
+    ticker = yf.Ticker(yf_symbol)
+    return ticker.info, ticker.history(period="2d")
+
+async def fetch_quote(yf_symbol: str):
+    """_download_quote off the event loop; concurrent requests for a symbol share one upstream call."""
+    return await market_cache.flight.run(f"quote:{yf_symbol}", lambda: _download_quote(yf_symbol))
+
 @router.get("/")
 def read_root():
   return{"message": "Welcome to the Trading Simulation"}
 
 # Get market data for multiple symbols
 @router.get("/api/market-data", response_model=MarketDataResponse)
-async def get_market_data(symbols: str = "BTC,ETH,BNB,SOL,XRP,EURUSD=X,GBPUSD=X,GC=F,CL=F"):
+async def get_market_data(symbols: str = ",".join(DEFAULT_WATCHLIST)):
     """Fetch real-time market data from yfinance for all asset classes"""
-    symbol_list = [s.strip() for s in symbols.split(",")]
+    symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
     market_data = []
 
     # Human-readable display labels
@@ -58,68 +71,40 @@ async def get_market_data(symbols: str = "BTC,ETH,BNB,SOL,XRP,EURUSD=X,GBPUSD=X,
         "DOGE": "DOGE/USDT",
         "ADA": "ADA/USDT",
     }
-    
+
     try:
-        for symbol in symbol_list:
-            try:
-                original = symbol.upper()
-                # If it's already a native yfinance symbol (has = sign), pass it through directly
-                if "=" in original:
-                    yf_symbol = original
-                else:
-                    yf_symbol = original.replace("BINANCE:", "").replace("PEPE24478", "PEPE").replace("UNI7083", "UNI")
-                    yf_symbol = yf_symbol.replace("USDT", "USD")
-                    
-                    if 'XAU' in yf_symbol or 'GOLD' in yf_symbol:
-                        yf_symbol = 'GC=F'
-                    elif 'XAG' in yf_symbol or 'SILVER' in yf_symbol:
-                        yf_symbol = 'SI=F'
-                    elif 'OIL' in yf_symbol or 'WTI' in yf_symbol:
-                        yf_symbol = 'CL=F'
-                    elif yf_symbol.endswith("USD") and "-" not in yf_symbol and len(yf_symbol) > 3:
-                        if not any(pair in yf_symbol for pair in ['EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'USDCAD']):
-                            yf_symbol = f"{yf_symbol[:-3]}-USD"
-                    elif yf_symbol in ["BTC", "ETH", "BNB", "SOL", "XRP", "DOGE", "ADA", "PEPE", "UNI"]:
-                        yf_symbol = f"{yf_symbol}-USD"
-                        
-                    if "=" not in yf_symbol and "-" not in yf_symbol:
-                        if any(pair in yf_symbol for pair in ['EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'USDCAD']):
-                            yf_symbol += '=X'
-
-                display_label = display_name_map.get(original, original)
-
-                ticker = yf.Ticker(yf_symbol)
-                info = ticker.info
-                hist = ticker.history(period="2d")  # 2d for change calculation
-                
-                if hist.empty:
-                    continue
-                    
-                price = info.get('regularMarketPrice') or info.get('currentPrice') or hist['Close'].iloc[-1]
-                high = info.get('dayHigh') or hist['High'].max()
-                low = info.get('dayLow') or hist['Low'].min()
-                volume = info.get('volume') or hist['Volume'].sum()
-                
-                if len(hist) > 1:
-                    change_pct = ((hist['Close'].iloc[-1] - hist['Close'].iloc[-2]) / hist['Close'].iloc[-2]) * 100
-                else:
-                    change_pct = 0
-                
-                trend = "📈 Bullish" if change_pct > 0.5 else "📉 Bearish" if change_pct < -0.5 else "➡️ Sideways"
-                
-                market_data.append(MarketData(
-                    symbol=display_label,
-                    price=float(price),
-                    change_24h=float(change_pct),
-                    high_24h=float(high),
-                    low_24h=float(low),
-                    volume_24h=float(volume),
-                    trend=trend
-                ))
-            except Exception as e:
-                print(f"Error fetching {symbol}: {e}")
+        yf_symbols = [normalize_symbol(original) for original in symbol_list]
+        unique = list(dict.fromkeys(yf_symbols))
+        if not unique:
+            return MarketDataResponse(data=[], timestamp="live")
+        # Counted for the background refresher's hot watchlist
+        hot_symbols.record(unique)
+        try:
+            # Cached rows off the event loop; missing symbols come from one bulk download
+            # shared by concurrent requests for the same watchlist
+            rows = await market_cache.flight.run(
+                "watchlist:" + ",".join(unique), lambda: get_watchlist(unique)
+            )
+        except Exception as e:
+            print(f"Error fetching {','.join(unique)}: {e}")
+            return MarketDataResponse(data=[], timestamp="live")
+
+        row_of = dict(zip(unique, rows))
+        for original, yf_symbol in zip(symbol_list, yf_symbols):
+            listed, price, change_pct, high, low, volume = row_of[yf_symbol]
+            if not listed:
                 continue
-                
+            trend = "📈 Bullish" if change_pct > 0.5 else "📉 Bearish" if change_pct < -0.5 else "➡️ Sideways"
+            market_data.append(MarketData(
+                symbol=display_name_map.get(original, original),
+                price=price,
+                change_24h=change_pct,
+                high_24h=high,
+                low_24h=low,
+                volume_24h=volume,
+                trend=trend
+            ))
+
         return MarketDataResponse(data=market_data, timestamp="live")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -129,28 +114,9 @@ async def get_market_data(symbols: str = "BTC,ETH,BNB,SOL,XRP,EURUSD=X,GBPUSD=X,
 async def get_single_market_data(symbol: str):
     """Fetch market data for a single symbol"""
     try:
-        yf_symbol = symbol.upper().replace("BINANCE:", "").replace("PEPE24478", "PEPE").replace("UNI7083", "UNI")
-        yf_symbol = yf_symbol.replace("USDT", "USD")
-        
-        if 'XAU' in yf_symbol or 'GOLD' in yf_symbol:
-            yf_symbol = 'GC=F'
-        elif 'XAG' in yf_symbol or 'SILVER' in yf_symbol:
-            yf_symbol = 'SI=F'
-        elif 'OIL' in yf_symbol:
-            yf_symbol = 'CL=F'
-        elif yf_symbol.endswith("USD") and "-" not in yf_symbol and len(yf_symbol) > 3:
-            if not any(pair in yf_symbol for pair in ['EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'USDCAD']):
-                yf_symbol = f"{yf_symbol[:-3]}-USD"
-        elif yf_symbol in ["BTC", "ETH", "BNB", "SOL", "XRP", "DOGE", "ADA", "PEPE", "UNI"]:
-            yf_symbol = f"{yf_symbol}-USD"
-            
-        if not '=' in yf_symbol and "-" not in yf_symbol:
-            if any(pair in yf_symbol for pair in ['EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'USDCAD']):
-                yf_symbol += '=X'
+        yf_symbol = normalize_symbol(symbol)
 
-        ticker = yf.Ticker(yf_symbol)
-        info = ticker.info
-        hist = ticker.history(period="2d")
+        info, hist = await fetch_quote(yf_symbol)
         
         price = info.get('regularMarketPrice') or info.get('currentPrice') or hist['Close'].iloc[-1] if not hist.empty else 0
         high = info.get('dayHigh') or hist['High'].max() if not hist.empty else 0
@@ -1,37 +1,190 @@
+import asyncio
 import requests
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlmodel import Session, select
 from datetime import datetime
 from ..database import get_session
-from ..models import SimulationRequest, SimulationResponse, GoalPlannerRequest, GoalPlannerResponse, HealthAnalysisRequest, HealthAnalysisResponse, ManualTrade, ManualTradeCreate, User, UserTradingPreferences, UserTradingPreferencesUpdate
-from ..engine import calculate_compounding, calculate_goal_plan, get_market_price, analyze_trade_health
+from ..models import SimulationRequest, SimulationResponse, SweepRequest, SweepResponse, OptimizeRequest, OptimizeResponse, PortfolioRequest, PortfolioResponse, GoalPlannerRequest, GoalPlannerResponse, GoalSolveRequest, GoalSolveResponse, HealthAnalysisRequest, HealthAnalysisResponse, ManualTrade, ManualTradeCreate, User, UserTradingPreferences, UserTradingPreferencesUpdate
+from ..engine import calculate_compounding, calculate_compounding_columnar, calculate_projection, simulation_tracker, run_simulation_batch, monte_carlo_estimate, stream_fan_chart, split_sweep, run_sweep_part, combine_sweep, calculate_optimal_risk, calculate_portfolio, calculate_goal_plan, calculate_goal_requirements, get_market_price, analyze_trade_health
 from ..dependencies import get_current_user, get_current_active_user
+from ..executor import simulation_pool, PoolSaturated, JobTimeout, JobCancelled
+from ..result_cache import result_cache, make_key
+from ..trade_history import trade_history, BOOTSTRAP_MIN_TRADES
+from ..rng import new_seed
 
 router = APIRouter()
 
+# Days of the daily breakdown per streamed event
+STREAM_DAYS_PER_EVENT = 365
+
+async def run_in_pool(fn, payload, http_request: Request, *args):
+  """Run a CPU-bound engine call, fn(payload, *args), in the simulation process pool."""
+  try:
+    return await simulation_pool.run(fn, payload, *args, is_disconnected=http_request.is_disconnected)
+  except PoolSaturated as e:
+    raise HTTPException(
+      status_code=429,
+      detail="Simulation server is busy. Please try again shortly.",
+      headers={"Retry-After": str(e.retry_after)}
+    )
+  except JobTimeout:
+    raise HTTPException(status_code=504, detail="Simulation took too long. Try a shorter horizon or fewer trades per day.")
+  except JobCancelled:
+    # Client went away; nobody will read this response
+    raise HTTPException(status_code=499, detail="Client closed request.")
+
+async def run_cached(fn, payload, http_request: Request, *args, scope: str = ""):
+  """run_in_pool, served from the result cache when the same request was already simulated.
+
+  `scope` identifies inputs passed in `args` rather than in the payload.
+  """
+  key = make_key(fn.__name__ + scope, payload)
+  result = result_cache.get(key)
+  if result is None:
+    result = await run_in_pool(fn, payload, http_request, *args)
+    result_cache.set(key, result)
+  return result
+
+def recorded_returns(request: SimulationRequest, user: User, session: Session):
+  """Engine args and cache scope for a request: the user's journal in bootstrap mode."""
+  if request.outcome_model != "bootstrap":
+    return (), ""
+  # Resample the user's journal; its version keeps cached results from going stale
+  returns, version = trade_history.returns(session, user.tenant_id, user.id)
+  if len(returns) < BOOTSTRAP_MIN_TRADES:
+    raise HTTPException(status_code=400, detail=f"Record at least {BOOTSTRAP_MIN_TRADES} manual trades to simulate from your history.")
+  return (returns,), f":{version}"
+
 @router.post("/api/simulate", response_model=SimulationResponse)
-async def run_simulation(request: SimulationRequest, user: User = Depends(get_current_user)):
+async def run_simulation(request: SimulationRequest, http_request: Request, format: Literal["default", "columnar"] = "default", user: User = Depends(get_current_user), session: Session = Depends(get_session)):
   try:
-    result = calculate_compounding(request)
+    args, scope = recorded_returns(request, user, session)
+    if format == "columnar":
+      # Parallel numeric arrays instead of per-row models, serialized by orjson
+      result = await run_cached(calculate_compounding_columnar, request, http_request, *args, scope=scope)
+      return ORJSONResponse(result)
+    result = await run_cached(calculate_compounding, request, http_request, *args, scope=scope)
     return result
+  except HTTPException:
+    raise
+  except Exception as e:
+    raise HTTPException(status_code=500, detail=str(e))
+
+def sse(event: str, data) -> bytes:
+  """One Server-Sent Events message."""
+  return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+async def simulation_events(request: SimulationRequest, http_request: Request, args):
+  """Projection first, then a Monte Carlo estimate after every batch of paths."""
+  try:
+    projection = await run_in_pool(calculate_projection, request, http_request, *args)
+    daily = projection["daily_breakdown"]
+    yield sse("start", {"seed": request.seed, "days": len(daily["day"]), "final_balance": projection["final_balance"], "trade_log": projection["trade_log"]})
+    for start in range(0, len(daily["day"]), STREAM_DAYS_PER_EVENT):
+      yield sse("daily", {name: column[start:start + STREAM_DAYS_PER_EVENT] for name, column in daily.items()})
+
+    # Batches continue the global path ids: the paths are /api/simulate's for this seed
+    tracker = simulation_tracker(request)
+    while tracker.next_batch:
+      tracker.add(await run_in_pool(run_simulation_batch, request, http_request, tracker.iterations, tracker.next_batch, *args))
+      yield sse("estimate", monte_carlo_estimate(request, tracker))
+    yield sse("done", {"fan_chart": stream_fan_chart(tracker)})
+  except HTTPException as e:
+    # Headers are already sent: report the failure in the stream
+    yield sse("error", {"status": e.status_code, "detail": e.detail})
+  except Exception as e:
+    yield sse("error", {"status": 500, "detail": str(e)})
+
+@router.post("/api/simulate/stream")
+async def stream_simulation(request: SimulationRequest, http_request: Request, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+  """Stream a simulation as Server-Sent Events (see docs/api.md); closing the stream stops it."""
+  try:
+    args, _ = recorded_returns(request, user, session)
+  except HTTPException:
+    raise
+  except Exception as e:
+    raise HTTPException(status_code=500, detail=str(e))
+  if request.seed is None:
+    # Every batch must draw from the same seed
+    request = request.model_copy(update={"seed": new_seed()})
+  return StreamingResponse(
+    simulation_events(request, http_request, args),
+    media_type="text/event-stream",
+    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+  )
+
+@router.post("/api/simulate/sweep", response_model=SweepResponse)
+async def run_sweep(request: SweepRequest, http_request: Request, user: User = Depends(get_current_user)):
+  try:
+    key = make_key("sweep", request)
+    result = result_cache.get(key)
+    if result is None:
+      # Paths are split over the idle pool processes; every part simulates all cells
+      parts = split_sweep(request, min(simulation_pool.workers, simulation_pool.free_slots))
+      outputs = await asyncio.gather(
+        *(run_in_pool(run_sweep_part, sweep, http_request, first_path, paths) for sweep, first_path, paths in parts),
+        return_exceptions=True
+      )
+      for output in outputs:
+        if isinstance(output, BaseException):
+          raise output
+      result = combine_sweep(parts[0][0], outputs)
+      result_cache.set(key, result)
+    return result
+  except HTTPException:
+    raise
+  except Exception as e:
+    raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/api/simulate/optimize", response_model=OptimizeResponse)
+async def run_optimizer(request: OptimizeRequest, http_request: Request, user: User = Depends(get_current_user)):
+  try:
+    return await run_cached(calculate_optimal_risk, request, http_request)
+  except HTTPException:
+    raise
+  except Exception as e:
+    raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/api/simulate/portfolio", response_model=PortfolioResponse)
+async def run_portfolio(request: PortfolioRequest, http_request: Request, user: User = Depends(get_current_user)):
+  try:
+    return await run_cached(calculate_portfolio, request, http_request)
+  except HTTPException:
+    raise
   except Exception as e:
     raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/api/plan", response_model=GoalPlannerResponse)
-async def run_goal_planner(request: GoalPlannerRequest, user: User = Depends(get_current_user)):
+async def run_goal_planner(request: GoalPlannerRequest, http_request: Request, user: User = Depends(get_current_user)):
   try:
-    result = calculate_goal_plan(request)
+    result = await run_in_pool(calculate_goal_plan, request, http_request)
     if isinstance(result, dict) and result.get("status") == "error":
         raise HTTPException(status_code=400, detail=result.get("message"))
     return result
+  except HTTPException:
+    raise
   except Exception as e:
       raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/api/plan/solve", response_model=GoalSolveResponse)
+async def solve_goal_plan(request: GoalSolveRequest, http_request: Request, user: User = Depends(get_current_user)):
+  try:
+    return await run_cached(calculate_goal_requirements, request, http_request)
+  except HTTPException:
+    raise
+  except Exception as e:
+    raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/api/analyze/health", response_model=HealthAnalysisResponse)
-async def analyze_health(request: HealthAnalysisRequest, user: User = Depends(get_current_user)):
+async def analyze_health(request: HealthAnalysisRequest, http_request: Request, user: User = Depends(get_current_user)):
     try:
-        result = analyze_trade_health(request)
+        result = await run_in_pool(analyze_trade_health, request, http_request)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -58,6 +211,7 @@ async def create_manual_trade(trade: ManualTradeCreate, user: User = Depends(get
     session.add(db_trade)
     session.commit()
     session.refresh(db_trade)
+    trade_history.record(session, db_trade)
     return db_trade
 
 @router.get("/api/price/{symbol}")
@@ -0,0 +1,70 @@
+from functools import lru_cache
+from itertools import product
+
+# TradingView / exchange symbols are resolved to yfinance tickers: known
+# symbols from a table built at import, anything else by the rules below
+# (memoized), so every market endpoint maps a symbol the same way.
+_PREFIXES = ("BINANCE:",)
+# Exchange-specific names of some tokens
+_ALIASES = {"PEPE24478": "PEPE", "UNI7083": "UNI"}
+_CRYPTO = ("BTC", "ETH", "BNB", "SOL", "XRP", "DOGE", "ADA", "PEPE", "UNI")
+_FOREX = ("EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "USDCAD")
+# Substring -> futures ticker, checked in order
+_COMMODITIES = (("XAU", "GC=F"), ("GOLD", "GC=F"), ("XAG", "SI=F"), ("SILVER", "SI=F"),
+                ("OIL", "CL=F"), ("WTI", "CL=F"))
+# Symbols of /api/market-data when none are given
+DEFAULT_WATCHLIST = ("BTC", "ETH", "BNB", "SOL", "XRP", "EURUSD=X", "GBPUSD=X", "GC=F", "CL=F")
+# Unknown symbols remembered by the resolver
+_RESOLVED_MAX = 4096
+
+
+def _resolve(symbol):
+    """yfinance ticker of an upper-case symbol by the mapping rules."""
+    # Native yfinance symbols (GC=F, EURUSD=X) pass through
+    if "=" in symbol:
+        return symbol
+    for prefix in _PREFIXES:
+        symbol = symbol.replace(prefix, "")
+    for alias, name in _ALIASES.items():
+        symbol = symbol.replace(alias, name)
+    symbol = symbol.replace("USDT", "USD")
+
+    for part, ticker in _COMMODITIES:
+        if part in symbol:
+            return ticker
+    # Crypto trades against USD with a -USD suffix on yfinance
+    if symbol.endswith("USD") and "-" not in symbol and len(symbol) > 3:
+        if not any(pair in symbol for pair in _FOREX):
+            return f"{symbol[:-3]}-USD"
+    elif symbol in _CRYPTO:
+        return f"{symbol}-USD"
+
+    if "-" not in symbol and any(pair in symbol for pair in _FOREX):
+        return symbol + "=X"
+    return symbol
+
+
+def _known_symbols():
+    """Every spelling of the supported crypto, forex and commodity symbols."""
+    coins = _CRYPTO + tuple(_ALIASES)
+    for coin, quote, prefix in product(coins, ("", "USD", "USDT", "-USD"), ("",) + _PREFIXES):
+        yield f"{prefix}{coin}{quote}"
+    for pair, suffix in product(_FOREX, ("", "=X")):
+        yield pair + suffix
+    for part, ticker in _COMMODITIES:
+        yield from (part, part + "USD", "US" + part, ticker)
+
+
+SYMBOL_TABLE = {symbol: _resolve(symbol) for symbol in _known_symbols()}
+
+
+@lru_cache(maxsize=_RESOLVED_MAX)
+def _resolve_unknown(symbol):
+    return _resolve(symbol)
+
+
+def normalize_symbol(symbol):
+    """Map a TradingView / exchange style symbol to its yfinance ticker."""
+    symbol = symbol.strip().upper()
+    ticker = SYMBOL_TABLE.get(symbol)
+    return ticker if ticker is not None else _resolve_unknown(symbol)
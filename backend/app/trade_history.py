@@ -0,0 +1,82 @@
+import threading
+import numpy as np
+from sqlmodel import select
+from .models import ManualTrade
+
+# Fewest recorded trades a bootstrap simulation will resample from
+BOOTSTRAP_MIN_TRADES = 10
+
+
+class _Journal:
+    """Append-only P&L vector of one user's ManualTrade rows, in id order."""
+
+    def __init__(self):
+        self.pnl = np.empty(64)
+        self.size = 0
+        self.last_id = 0
+        self._returns = None
+
+    def extend(self, rows):
+        """Append (id, pnl) rows newer than the last one seen."""
+        rows = [(trade_id, float(pnl)) for trade_id, pnl in rows if trade_id > self.last_id]
+        if not rows:
+            return
+        needed = self.size + len(rows)
+        if needed > self.pnl.size:
+            # Amortized doubling, so a long journal is copied O(log n) times
+            grown = np.empty(max(needed, 2 * self.pnl.size))
+            grown[:self.size] = self.pnl[:self.size]
+            self.pnl = grown
+        self.pnl[self.size:needed] = [pnl for _, pnl in rows]
+        self.size = needed
+        self.last_id = rows[-1][0]
+        self._returns = None
+
+    def returns(self):
+        """Recorded P&L as R-multiples: profit per unit of risk, 1R being the average loss."""
+        if self._returns is None:
+            pnl = self.pnl[:self.size]
+            losses = pnl[pnl < 0]
+            unit = -losses.mean() if losses.size else np.abs(pnl).mean()
+            self._returns = pnl / unit if unit > 0 else np.zeros(self.size)
+        return self._returns
+
+
+class TradeHistoryCache:
+    """Per-user ManualTrade returns, kept in memory and synced incrementally.
+
+    The first bootstrap run of a user reads their journal once; afterwards only
+    rows with a higher id than the last one seen are fetched (a primary key
+    range scan), so trades recorded through another web worker are picked up too.
+    """
+
+    def __init__(self):
+        self._journals = {}
+        self._lock = threading.Lock()
+
+    def _sync(self, session, tenant_id, user_id, journal):
+        rows = session.exec(
+            select(ManualTrade.id, ManualTrade.pnl)
+            .where(ManualTrade.tenant_id == tenant_id, ManualTrade.user_id == user_id, ManualTrade.id > journal.last_id)
+            .order_by(ManualTrade.id)
+        ).all()
+        with self._lock:
+            journal.extend(rows)
+
+    def record(self, session, trade: ManualTrade):
+        """Pick up a newly created trade if its user's journal is cached."""
+        journal = self._journals.get((trade.tenant_id, trade.user_id))
+        if journal is not None:
+            self._sync(session, trade.tenant_id, trade.user_id, journal)
+
+    def returns(self, session, tenant_id, user_id):
+        """R-multiples of the user's recorded trades, oldest first, and a version key
+        that changes whenever a trade is added."""
+        with self._lock:
+            journal = self._journals.setdefault((tenant_id, user_id), _Journal())
+        self._sync(session, tenant_id, user_id, journal)
+        with self._lock:
+            return journal.returns(), f"{tenant_id}:{user_id}:{journal.last_id}"
+
+
+trade_history = TradeHistoryCache()
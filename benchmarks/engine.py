@@ -0,0 +1,253 @@
+"""Microbenchmarks of the engine entry points, with a regression check.
+
+Every case runs in a fresh process (so its peak RSS is its own): one warmup
+call, then `--repeats` timed calls, then one call under tracemalloc for the
+peak of Python-level allocations. No network is used: the health analysis
+takes its rule-based path and symbol normalization never calls yfinance.
+
+    python -m benchmarks.engine run --json baseline.json
+    python -m benchmarks.engine run --only compounding --json current.json
+    python -m benchmarks.engine compare baseline.json current.json --tolerance 0.25
+
+The `paths_*` cases time the Monte Carlo alone at a fixed MC_PATHS paths, for
+the NumPy kernel and for a replica of the per-trade Python loop it replaced,
+and report the time per path; `run` prints their ratio. End-to-end cases also
+include the deterministic projection and the payload, and since the precision
+stopping rule picks its own path count they say nothing about the cost per path.
+
+`compare` lists every case whose time, allocation peak or RSS grew by more
+than the tolerance (relative, above a small absolute noise floor) and exits
+with status 1 when there is any.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+# (days, trades per day): a month of day trading up to five years of it
+COMPOUNDING_SIZES = [(30, 5), (365, 10), (1825, 10)]
+RISK_TYPES = ["dynamic", "fixed"]
+HEALTH_TRADES = [10, 100]
+SYMBOLS = [
+    "BINANCE:BTCUSDT", "ETHUSDT", "PEPE24478USDT", "UNI7083USDT", "SOL", "EURUSD", "USDJPY",
+    "XAUUSD", "GOLD", "XAGUSD", "USOIL", "AAPL", "GBPUSD", "DOGEUSD", "BTC-USD", "GC=F",
+]
+# Monte Carlo paths of the per-path cases: the fixed count of the original loop
+MC_PATHS = 500
+# Calls per timed repeat of the cheap cases, so they stay well above the noise floor
+ROUNDS = 1000
+
+# Growth below these is noise whatever its ratio
+TIME_FLOOR = 1e-3  # seconds
+BYTES_FLOOR = 256 * 1024
+METRICS = [("seconds", TIME_FLOOR), ("alloc_peak_bytes", BYTES_FLOOR), ("peak_rss_bytes", BYTES_FLOOR)]
+
+
+def _compounding(days, trades_per_day, risk_type):
+    from backend.app.engine import calculate_compounding
+    from backend.app.models import SimulationRequest
+    request = SimulationRequest(
+        initial_balance=Decimal("10000"), capital_utilization=Decimal("100"), risk_per_trade=Decimal("1"),
+        risk_reward_ratio=Decimal("2"), win_rate=Decimal("45"), trades_per_day=trades_per_day,
+        simulation_days=days, fees_per_trade=Decimal("1"), risk_type=risk_type, seed=0,
+    )
+    return lambda: calculate_compounding(request)
+
+
+def _numpy_paths(days, trades_per_day, risk_type):
+    from backend.app.monte_carlo import simulate_paths
+    total_trades = days * trades_per_day
+    return lambda: simulate_paths(10000.0, 0.01, 2.0, 0.45, 1.0, risk_type, total_trades, MC_PATHS, seed=0)
+
+
+def _loop_paths(days, trades_per_day, risk_type):
+    # The per-trade loop calculate_compounding ran before the NumPy kernel
+    total_trades = days * trades_per_day
+    initial_balance, risk_per_trade, rr_ratio, win_rate, fees = 10000.0, 0.01, 2.0, 0.45, 1.0
+
+    def call():
+        rng = random.Random(0)
+        final_balances = []
+        max_drawdowns = []
+        for _ in range(MC_PATHS):
+            balance = peak = initial_balance
+            drawdown = 0
+            for _ in range(total_trades):
+                if balance <= 0:
+                    break
+                risk_amt = (balance if risk_type == "dynamic" else initial_balance) * risk_per_trade
+                balance += risk_amt * rr_ratio - fees if rng.random() < win_rate else -risk_amt - fees
+                if balance > peak:
+                    peak = balance
+                if peak > 0:
+                    drawdown = max(drawdown, (peak - balance) / peak * 100)
+            final_balances.append(max(balance, 0))
+            max_drawdowns.append(drawdown)
+        return final_balances, max_drawdowns
+    return call
+
+
+def _goal_plan():
+    from backend.app.engine import calculate_goal_plan
+    from backend.app.models import GoalPlannerRequest
+    requests = [
+        GoalPlannerRequest(initial_balance=Decimal("10000"), target_balance=Decimal(target), deadline_months=months)
+        for target in ("5000", "12000", "50000", "1000000") for months in (1, 12, 120)
+    ]
+    return lambda: [calculate_goal_plan(request) for _ in range(ROUNDS) for request in requests]
+
+
+def _trade_health(trades):
+    from backend.app.engine import analyze_trade_health
+    from backend.app.models import HealthAnalysisRequest, TradeItem
+    items = []
+    balance = Decimal("10000")
+    for i in range(trades):
+        # Deterministic mix of wins and losses with an occasional size-up after a loss
+        is_win = i % 5 in (0, 2)
+        risk = Decimal("150") if i % 7 == 6 else Decimal("100")
+        pnl = risk * 2 if is_win else -risk
+        items.append(TradeItem(pnl=pnl, risk_amount=risk, balance=balance, is_win=is_win))
+        balance += pnl
+    request = HealthAnalysisRequest(trades=items)
+    return lambda: [analyze_trade_health(request) for _ in range(ROUNDS)]
+
+
+def _symbols():
+    from backend.app.symbols import normalize_symbol
+    return lambda: [normalize_symbol(symbol) for _ in range(ROUNDS) for symbol in SYMBOLS]
+
+
+def cases():
+    """Benchmark name -> (builder, args); the builder returns the call to time."""
+    table = {}
+    for days, trades_per_day in COMPOUNDING_SIZES:
+        for risk_type in RISK_TYPES:
+            table[f"compounding_{risk_type}_{days}d_x{trades_per_day}"] = (_compounding, (days, trades_per_day, risk_type))
+    for days, trades_per_day in COMPOUNDING_SIZES:
+        for risk_type in RISK_TYPES:
+            for kernel, builder in (("numpy", _numpy_paths), ("loop", _loop_paths)):
+                table[f"paths_{kernel}_{risk_type}_{days}d_x{trades_per_day}"] = (builder, (days, trades_per_day, risk_type))
+    table["goal_plan"] = (_goal_plan, ())
+    for trades in HEALTH_TRADES:
+        table[f"trade_health_{trades}"] = (_trade_health, (trades,))
+    table["normalize_symbol"] = (_symbols, ())
+    return table
+
+
+def _measure(name, repeats):
+    # Rule-based coach only: never reach out to Gemini
+    os.environ.pop("GEMINI_TRADING_COACH_KEY", None)
+    builder, args = cases()[name]
+    call = builder(*args)
+    call()
+
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    call()
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result = {
+        "seconds": statistics.median(seconds),
+        "seconds_min": min(seconds),
+        "alloc_peak_bytes": alloc_peak,
+        "peak_rss_bytes": rss if sys.platform == "darwin" else rss * 1024,
+    }
+    if name.startswith("paths_"):
+        result["seconds_per_path"] = result["seconds"] / MC_PATHS
+    return result
+
+
+def run(names, repeats):
+    report = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "repeats": repeats,
+        "cases": {},
+    }
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(_measure, name, repeats).result()
+        report["cases"][name] = result
+        per_path = f"{result['seconds_per_path'] * 1e6:>12.1f} us/path" if "seconds_per_path" in result else ""
+        print(f"{name:<34}{result['seconds'] * 1000:>10.2f} ms"
+              f"{result['alloc_peak_bytes'] / 2 ** 20:>10.1f} MiB alloc"
+              f"{result['peak_rss_bytes'] / 2 ** 20:>10.1f} MiB rss{per_path}")
+    for name, loop in report["cases"].items():
+        numpy_result = report["cases"].get(name.replace("paths_loop_", "paths_numpy_"))
+        if name.startswith("paths_loop_") and numpy_result:
+            ratio = loop["seconds_per_path"] / numpy_result["seconds_per_path"]
+            print(f"per-path speedup {name[len('paths_loop_'):]}: {ratio:.1f}x at {MC_PATHS} paths")
+    return report
+
+
+def compare(baseline, current, tolerance):
+    """(case, metric, baseline, current, ratio) for every metric grown beyond tolerance."""
+    regressions = []
+    for name, now in current["cases"].items():
+        before = baseline["cases"].get(name)
+        if before is None:
+            continue
+        for metric, floor in METRICS:
+            if now[metric] - before[metric] > max(before[metric] * tolerance, floor):
+                regressions.append((name, metric, before[metric], now[metric], now[metric] / before[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="measure every case")
+    run_parser.add_argument("--repeats", type=int, default=5)
+    run_parser.add_argument("--only", help="only cases whose name contains this")
+    run_parser.add_argument("--json", help="write the report to this file")
+    compare_parser = commands.add_parser("compare", help="flag regressions of a report against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative growth (default 0.25)")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        names = [name for name in cases() if args.only is None or args.only in name]
+        report = run(names, args.repeats)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline["machine"] != current["machine"]:
+        print("warning: reports come from different machines, timings are not comparable")
+    missing = sorted(set(current["cases"]) - set(baseline["cases"]))
+    if missing:
+        print(f"not in the baseline: {', '.join(missing)}")
+    regressions = compare(baseline, current, args.tolerance)
+    for name, metric, before, now, ratio in regressions:
+        print(f"REGRESSION {name} {metric}: {before:.6g} -> {now:.6g} ({ratio:.2f}x)")
+    if not regressions:
+        print(f"no regressions beyond {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Measure the variance reduction of the Monte Carlo samplers.
+
+Each sampler estimates the 5th/50th/95th percentile of the final balance and
+the ruin probability `--repeats` times with `--paths` paths. The spread of
+those estimates is compared with plain random draws; a ratio of 4 means the
+sampler reaches the same accuracy with about 4x fewer paths. The time per run
+is reported alongside, since the stratified sampler costs more per path.
+
+    python -m benchmarks.variance_reduction
+    python -m benchmarks.variance_reduction --paths 1000 --repeats 100 --json out.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from backend.app.monte_carlo import simulate_paths
+
+SAMPLERS = ["random", "antithetic", "stratified"]
+STATISTICS = ["p5", "p50", "p95", "ruin"]
+
+SCENARIOS = {
+    "dynamic_1y": (10000.0, 0.02, 2.0, 0.4, 0.0, "dynamic", 365 * 3),
+    "dynamic_1y_fees": (10000.0, 0.02, 2.0, 0.4, 5.0, "dynamic", 365 * 3),
+    "fixed_1y": (10000.0, 0.02, 1.5, 0.45, 1.0, "fixed", 365 * 3),
+    "ruin_heavy": (1000.0, 0.1, 1.0, 0.48, 0.0, "fixed", 500),
+}
+
+
+def _estimates(result):
+    final_balances = result["final_balances"]
+    p5, p50, p95 = np.percentile(final_balances, [5, 50, 95])
+    return {"p5": p5, "p50": p50, "p95": p95, "ruin": result["ruined"].mean() * 100}
+
+
+def measure(scenario, paths, repeats, seed=0):
+    """Variance of every statistic per sampler, plus the ratio to plain random draws."""
+    rng = np.random.default_rng(seed)
+    variances = {}
+    seconds = {}
+    for sampler in SAMPLERS:
+        start = time.perf_counter()
+        runs = [_estimates(simulate_paths(*scenario, paths, seed=int(rng.integers(2 ** 53)), sampler=sampler))
+                for _ in range(repeats)]
+        seconds[sampler] = (time.perf_counter() - start) / repeats
+        variances[sampler] = {stat: float(np.var([run[stat] for run in runs], ddof=1)) for stat in STATISTICS}
+
+    report = {}
+    for sampler in SAMPLERS:
+        report[sampler] = {"seconds_per_run": seconds[sampler]}
+        for stat in STATISTICS:
+            variance = variances[sampler][stat]
+            baseline = variances["random"][stat]
+            report[sampler][stat] = {
+                "variance": variance,
+                "reduction": baseline / variance if variance > baseline * 1e-12 else (None if baseline > 0 else 1.0),
+            }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args()
+
+    reports = {}
+    for name, scenario in SCENARIOS.items():
+        reports[name] = measure(scenario, args.paths, args.repeats, args.seed)
+        print(f"\n{name} ({args.paths} paths x {args.repeats} repeats), variance reduction vs random:")
+        print(f"  {'sampler':<12}" + "".join(f"{stat:>10}" for stat in STATISTICS) + f"{'ms/run':>10}")
+        for sampler in SAMPLERS:
+            cells = []
+            for stat in STATISTICS:
+                reduction = reports[name][sampler][stat]["reduction"]
+                cells.append(f"{reduction:>9.2f}x" if reduction is not None else f"{'exact':>10}")
+            print(f"  {sampler:<12}" + "".join(cells) + f"{reports[name][sampler]['seconds_per_run'] * 1000:>10.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
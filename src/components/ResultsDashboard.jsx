@@ -6,7 +6,7 @@ import SimulationChart from "./SimulationChart";
 const ResultsDashboard = ({ data }) => {
   if (!data) return null;
 
-  const { summary, daily_breakdown, monte_carlo, trade_log } = data;
+  const { summary, daily_breakdown, monte_carlo, trade_log, fan_chart } = data;
 
   // A stable key that changes on every new simulation run so SimulationChart fully remounts
   const runKey = useMemo(() => {
@@ -168,7 +168,9 @@ const ResultsDashboard = ({ data }) => {
               </p>
             )}
             <p className="text-xs text-gray-500 mt-5 italic font-mono">
-              *Based on {monte_carlo.iterations} Monte Carlo simulations of your specific parameters.
+              {monte_carlo.method === 'exact'
+                ? '*Exact probabilities computed from your specific parameters.'
+                : `*Based on ${monte_carlo.iterations} Monte Carlo simulations of your specific parameters.`}
             </p>
           </div>
         </div>
@@ -264,7 +266,7 @@ const ResultsDashboard = ({ data }) => {
             <h3 className="text-sm font-extrabold mb-5 text-engine-neon uppercase tracking-widest flex items-center gap-2">
               Monte Carlo Simulation{" "}
               <span className="text-[10px] text-gray-500 normal-case font-mono">
-                (500 Iterations)
+                ({monte_carlo.method === 'exact' ? 'Exact' : `${monte_carlo.iterations} Iterations`})
               </span>
             </h3>
             <div className="flex-1 grid grid-cols-1 xl:grid-cols-2 gap-6">
@@ -506,6 +508,39 @@ const ResultsDashboard = ({ data }) => {
         );
       })()}
 
+      {/* Monte Carlo Fan Chart */}
+      {fan_chart && (() => {
+        const { balance } = fan_chart;
+        const fanData = fan_chart.day.map((day, i) => ({
+          day,
+          outer: [balance.p5[i], balance.p95[i]],
+          inner: [balance.p25[i], balance.p75[i]],
+          median: balance.p50[i],
+        }));
+        return (
+          <div className="bg-engine-panel/60 p-6 rounded-2xl border border-engine-neon/20 shadow-[0_0_20px_rgba(var(--engine-neon-rgb),0.05)] backdrop-blur-md h-[300px]">
+            <h3 className="text-sm font-extrabold mb-4 text-engine-neon uppercase tracking-widest">
+              Balance Range <span className="text-[10px] text-gray-500 normal-case font-mono">(5-95% / 25-75% of {fan_chart.paths} simulated paths)</span>
+            </h3>
+            <ResponsiveContainer width="100%" height="100%">
+              <AreaChart data={fanData}>
+                <CartesianGrid strokeDasharray="3 3" stroke="#00cfff" strokeOpacity={0.07} vertical={false} />
+                <XAxis dataKey="day" stroke="#00cfff" strokeOpacity={0.4} tick={{ fill: "rgba(var(--engine-neon-rgb),0.5)", fontSize: 11, fontFamily: 'monospace' }} tickLine={false} axisLine={false} />
+                <YAxis tickFormatter={v => `$${v >= 1000 ? (v/1000).toFixed(1)+'k' : v}`} stroke="#00cfff" strokeOpacity={0.4} tick={{ fill: "rgba(var(--engine-neon-rgb),0.5)", fontSize: 11, fontFamily: 'monospace' }} tickLine={false} axisLine={false} />
+                <Tooltip
+                  contentStyle={{ backgroundColor: "rgba(3,3,8,0.9)", borderColor: "rgba(var(--engine-neon-rgb),0.4)", color: "#fff", borderRadius: "12px", fontFamily: 'monospace' }}
+                  formatter={(v, name) => [Array.isArray(v) ? `$${v[0]} - $${v[1]}` : `$${v}`, name === 'outer' ? '5-95%' : name === 'inner' ? '25-75%' : 'Median']}
+                  labelFormatter={l => `Day ${l}`}
+                />
+                <Area type="monotone" dataKey="outer" stroke="none" fill="#00cfff" fillOpacity={0.1} />
+                <Area type="monotone" dataKey="inner" stroke="none" fill="#00cfff" fillOpacity={0.2} />
+                <Area type="monotone" dataKey="median" stroke="#00cfff" strokeWidth={2} fill="none" />
+              </AreaChart>
+            </ResponsiveContainer>
+          </div>
+        );
+      })()}
+
       {/* Table Section */}
       <div className="bg-engine-panel/60 rounded-2xl border border-engine-neon/20 shadow-[0_0_20px_rgba(var(--engine-neon-rgb),0.05)] backdrop-blur-md overflow-hidden">
         {/* Table Tabs */}
@@ -1,17 +1,45 @@
 import pytest
+import tracemalloc
 from decimal import Decimal
 from unittest.mock import patch, MagicMock
+import numpy as np
+import orjson
 import pandas as pd  # for empty DataFrame
 
 from backend.app.engine import (
     calculate_compounding,
+    calculate_compounding_columnar,
+    calculate_projection,
+    simulation_tracker,
+    run_simulation_batch,
+    monte_carlo_estimate,
+    stream_fan_chart,
     calculate_goal_plan,
+    calculate_goal_requirements,
+    split_sweep,
+    run_sweep_part,
+    combine_sweep,
+    calculate_optimal_risk,
+    calculate_portfolio,
     get_market_price,
+    watchlist_stats,
+    download_watchlist,
+    get_watchlist,
+    refresh_watchlist,
     analyze_trade_health
 )
+from backend.app import engine
+from backend.app.monte_carlo import simulate_paths
+from backend.app.market_cache import MarketCache
+from backend.app.result_cache import MemoryBackend
 from backend.app.models import (
     SimulationRequest,
+    SweepRequest,
+    OptimizeRequest,
+    PortfolioRequest,
+    PayoffDistribution,
     GoalPlannerRequest,
+    GoalSolveRequest,
     HealthAnalysisRequest,
     TradeItem
 )
@@ -43,6 +71,18 @@ class TestCalculateCompounding:
         assert "expectancy" in summary
         assert "risk_of_ruin" in summary
 
+    def test_seed_reproduces_result(self, sample_simulation_request):
+        """Test the returned seed reproduces the whole simulation."""
+        first = calculate_compounding(sample_simulation_request)
+        assert first.seed is not None
+
+        replay = sample_simulation_request.model_copy(update={"seed": first.seed})
+        second = calculate_compounding(replay)
+        assert second.seed == first.seed
+        assert second.summary == first.summary
+        assert second.monte_carlo == first.monte_carlo
+        assert second.trade_log == first.trade_log
+
     def test_simulation_daily_breakdown(self, sample_simulation_request):
         """Test that daily breakdown is generated correctly."""
         result = calculate_compounding(sample_simulation_request)
@@ -69,6 +109,92 @@ class TestCalculateCompounding:
         assert "median" in mc
         assert "best_case" in mc
         assert "ruin_probability" in mc
+        assert "ruin_probability_stderr" in mc
+        assert "median_stderr" in mc
+        assert mc["iterations"] <= sample_simulation_request.mc_max_iterations
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_default_precision_converges(self, sample_simulation_request, seed):
+        """Test a default year-long request reaches mc_precision before the path cap."""
+        request = sample_simulation_request.model_copy(update={"simulation_days": 365, "seed": seed})
+        mc = calculate_compounding(request).monte_carlo
+
+        assert mc["converged"]
+        assert mc["iterations"] < request.mc_max_iterations
+
+    def test_simulation_fan_chart(self, sample_simulation_request):
+        """Test one percentile band per simulated day."""
+        result = calculate_compounding(sample_simulation_request)
+        fan = result.fan_chart
+
+        assert fan["day"] == list(range(1, sample_simulation_request.simulation_days + 1))
+        assert fan["paths"] == min(result.monte_carlo["iterations"], 1000)
+        for series in (fan["balance"], fan["drawdown"]):
+            assert set(series) == {"p5", "p25", "p50", "p75", "p95"}
+            assert all(len(band) == sample_simulation_request.simulation_days for band in series.values())
+
+    def test_simulation_columnar(self, sample_simulation_request):
+        """Test the columnar format returns parallel numeric arrays matching the rows."""
+        request = sample_simulation_request.model_copy(update={"probability_method": "exact", "fees_per_trade": Decimal("0")})
+        rows = calculate_compounding(request)
+        result = calculate_compounding_columnar(request)
+
+        daily = result["daily_breakdown"]
+        assert set(daily) == {"day", "start_balance", "profit_loss", "end_balance", "roi"}
+        assert all(len(column) == len(daily["day"]) for column in daily.values())
+        assert isinstance(daily["end_balance"][0], float)
+        assert len(result["trade_log"]["trade_no"]) <= 100
+        assert result["monte_carlo"]["median"] == rows.monte_carlo["median"]
+
+    def test_columnar_rows_are_smaller(self, sample_simulation_request):
+        """Test the columnar daily breakdown and trade log encode at least twice as small as the row models."""
+        request = sample_simulation_request.model_copy(update={"simulation_days": 365, "seed": 3})
+        rows = calculate_compounding(request).model_dump(mode="json")
+        result = calculate_compounding_columnar(request)
+
+        for field in ("daily_breakdown", "trade_log"):
+            assert 2 * len(orjson.dumps(result[field])) < len(orjson.dumps(rows[field]))
+        assert result["fan_chart"] == rows["fan_chart"]
+
+    def test_streamed_simulation(self, sample_simulation_request):
+        """Test the streaming pieces reproduce the projection and sample the same paths."""
+        request = sample_simulation_request.model_copy(update={"seed": 11, "mc_max_iterations": 400})
+        columnar = calculate_compounding_columnar(request)
+        projection = calculate_projection(request)
+
+        assert projection["daily_breakdown"] == columnar["daily_breakdown"]
+        assert projection["trade_log"] == columnar["trade_log"]
+
+        tracker = simulation_tracker(request)
+        while tracker.next_batch:
+            tracker.add(run_simulation_batch(request, tracker.iterations, tracker.next_batch))
+        estimate = monte_carlo_estimate(request, tracker)
+        paths = simulate_paths(10000.0, 0.02, 2.0, 0.5, 1.0, "dynamic", 150, tracker.iterations, seed=11)
+
+        assert estimate["median"] == f"{np.sort(paths['final_balances'])[tracker.iterations // 2]:.2f}"
+        assert estimate["method"] == "monte_carlo"
+        assert len(stream_fan_chart(tracker)["day"]) == 30
+
+    def test_simulation_exact_method(self, sample_simulation_request):
+        """Test exact mode returns deterministic percentiles and ruin probability."""
+        request = sample_simulation_request.model_copy(update={"probability_method": "exact", "fees_per_trade": Decimal("0")})
+
+        first = calculate_compounding(request).monte_carlo
+        second = calculate_compounding(request).monte_carlo
+
+        assert first["method"] == "exact"
+        assert first["iterations"] == 0
+        for key in ("worst_case", "median", "best_case", "ruin_probability"):
+            assert first[key] == second[key]
+
+    def test_simulation_exact_falls_back(self, sample_simulation_request):
+        """Test exact mode falls back to Monte Carlo for dynamic risk with fees."""
+        request = sample_simulation_request.model_copy(update={"probability_method": "exact"})
+
+        result = calculate_compounding(request)
+
+        assert result.monte_carlo["method"] == "monte_carlo"
+        assert result.monte_carlo["iterations"] > 0
 
     def test_simulation_trade_log(self, sample_simulation_request):
         """Test trade log generation."""
@@ -142,6 +268,97 @@ class TestCalculateCompounding:
         assert final_balance > 10000.00
 
 
+def _loop_projection(request, outcomes):
+    """Reference per-trade loop of the deterministic projection (day rows, trade rows)."""
+    initial = float(request.initial_balance)
+    risk = float(request.risk_per_trade) / 100
+    fees = float(request.fees_per_trade)
+    balance, days, trades, counter = initial, [], [], 0
+    for day in range(1, request.simulation_days + 1):
+        start, pnl = balance, 0.0
+        for _ in range(request.trades_per_day):
+            if balance <= 0:
+                break
+            r_multiple = outcomes[counter]
+            counter += 1
+            trade_pnl = (balance if request.risk_type == "dynamic" else initial) * risk * r_multiple - fees
+            balance += trade_pnl
+            pnl += trade_pnl
+            if len(trades) < 100:
+                trades.append((counter, day, r_multiple > 0, trade_pnl, balance))
+        balance = max(balance, 0)
+        days.append((day, start, pnl, balance, (balance - start) / start * 100))
+        if balance <= 0:
+            break
+    return days, trades
+
+
+class TestProjection:
+    """Test the array-based deterministic projection against the per-trade loop."""
+
+    @pytest.mark.parametrize("risk_type,risk", [("dynamic", "2"), ("fixed", "2"), ("fixed", "30"), ("dynamic", "40")])
+    def test_matches_loop(self, sample_simulation_request, risk_type, risk):
+        """Test day and trade rows equal the loop's, including a ruin stopping the projection."""
+        request = sample_simulation_request.model_copy(update={
+            "risk_type": risk_type, "risk_per_trade": Decimal(risk), "win_rate": Decimal("35"), "seed": 5
+        })
+        columnar = calculate_compounding_columnar(request)
+        outcomes = np.where(np.random.default_rng(np.random.SeedSequence(5, spawn_key=(0,))).permutation(150) < 52, 2.0, -1.0)
+        days, trades = _loop_projection(request, outcomes.tolist())
+
+        daily = columnar["daily_breakdown"]
+        assert daily["day"] == [row[0] for row in days]
+        for i, name in enumerate(("start_balance", "profit_loss", "end_balance", "roi"), start=1):
+            np.testing.assert_allclose(daily[name], [round(row[i], 2) for row in days], atol=0.011)
+        log = columnar["trade_log"]
+        assert log["is_win"] == [row[2] for row in trades]
+        np.testing.assert_allclose(log["balance"], [round(row[4], 2) for row in trades], atol=0.011)
+
+
+    def test_chunks_keep_exact_win_count(self, sample_simulation_request, monkeypatch):
+        """Test chunks that split days still place exactly win_rate x trades wins."""
+        monkeypatch.setattr(engine, "_PROJECTION_CHUNK", 7)
+        request = sample_simulation_request.model_copy(update={
+            "risk_type": "fixed", "fees_per_trade": Decimal("0"), "win_rate": Decimal("35"), "seed": 2
+        })
+        result = calculate_projection(request)
+
+        # 52 wins of 2R and 98 losses of 1R, 1R = 200
+        assert result["final_balance"] == 10000 + 200 * (2 * 52 - 98)
+        assert result["daily_breakdown"]["day"] == list(range(1, 31))
+        assert result["daily_breakdown"]["start_balance"][1:] == result["daily_breakdown"]["end_balance"][:-1]
+
+    def test_chunks_stop_at_ruin(self, sample_simulation_request, monkeypatch):
+        """Test a ruin inside a later chunk ends the projection on the loop's day."""
+        monkeypatch.setattr(engine, "_PROJECTION_CHUNK", 7)
+        request = sample_simulation_request.model_copy(update={
+            "risk_type": "fixed", "risk_per_trade": Decimal("9"), "win_rate": Decimal("0"), "seed": 2
+        })
+        days, trades = _loop_projection(request, [-1.0] * 150)
+        daily = calculate_projection(request)["daily_breakdown"]
+
+        assert daily["day"] == [row[0] for row in days]
+        np.testing.assert_allclose(daily["profit_loss"], [round(row[2], 2) for row in days], atol=0.011)
+        assert daily["end_balance"][-1] == 0
+
+    def test_memory_bounded_by_chunk(self, sample_simulation_request):
+        """Test peak memory doesn't grow with the horizon (7.3 million trades)."""
+        request = sample_simulation_request.model_copy(update={
+            "simulation_days": 3650, "trades_per_day": 2000, "risk_per_trade": Decimal("0.01"),
+            "fees_per_trade": Decimal("0"), "seed": 1
+        })
+        tracemalloc.start()
+        try:
+            result = calculate_projection(request)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        assert len(result["daily_breakdown"]["day"]) == 3650
+        # The outcome sequence alone would take 58 MB as float64
+        assert peak < 8 * 2 ** 20
+
+
 class TestCalculateGoalPlan:
     """Test goal planning functionality."""
 
@@ -209,9 +426,206 @@ class TestCalculateGoalPlan:
         assert result.feasibility in ["Realistic", "Challenging", "Ambitious", "Very Unlikely"]
 
 
+class TestCalculateGoalRequirements:
+    """Test the goal solver response."""
+
+    def test_batch_of_goals(self):
+        """Test every goal gets a result, in request order, with unreachable ones flagged."""
+        request = GoalSolveRequest(
+            initial_balance=Decimal("10000"), solve_for="win_rate", risk_per_trade=Decimal("1"),
+            risk_reward_ratio=Decimal("2"), trades_per_day=2, iterations=200, seed=7,
+            goals=[{"target_balance": target, "deadline_months": 3} for target in (12000, 15000, 10 ** 9)]
+        )
+        result = calculate_goal_requirements(request)
+
+        assert result.seed == 7
+        assert [goal["target_balance"] for goal in result.goals] == ["12000.00", "15000.00", "1000000000.00"]
+        first, second, unreachable = result.goals
+        assert first["feasible"] and float(first["probability"]) >= 50
+        assert float(first["required"]) < float(second["required"])
+        assert not unreachable["feasible"] and unreachable["required"] is None
+
+
+class TestPayoffDistributions:
+    """Test simulating with stochastic win / loss sizes."""
+
+    def test_fixed_payoffs_match_default(self, sample_simulation_request):
+        """Test fixed payoffs of rr / 1R reproduce the default model."""
+        base = sample_simulation_request.model_copy(update={"seed": 4})
+        payoffs = base.model_copy(update={
+            "win_payoff": PayoffDistribution(kind="fixed", value=base.risk_reward_ratio),
+            "loss_payoff": PayoffDistribution(kind="fixed", value=1),
+        })
+        default, fixed = calculate_compounding(base), calculate_compounding(payoffs)
+
+        assert fixed.monte_carlo["median"] == default.monte_carlo["median"]
+        assert fixed.monte_carlo["ruin_probability"] == default.monte_carlo["ruin_probability"]
+        assert fixed.summary["expectancy"] == default.summary["expectancy"]
+
+    def test_partial_stops_and_slippage(self, sample_simulation_request):
+        """Test smaller losses help, slippage hurts and exact mode falls back to sampling."""
+        base = sample_simulation_request.model_copy(update={"seed": 4, "probability_method": "exact"})
+        partial = base.model_copy(update={"loss_payoff": PayoffDistribution(kind="histogram", values=[1, 0.5], weights=[1, 1])})
+        slipped = partial.model_copy(update={"slippage": PayoffDistribution(kind="fixed", value=0.2)})
+        partial_result, slipped_result = calculate_compounding(partial), calculate_compounding(slipped)
+
+        assert partial_result.monte_carlo["method"] == "monte_carlo"
+        assert float(partial_result.summary["expectancy"]) > float(calculate_compounding(base).summary["expectancy"])
+        assert float(slipped_result.monte_carlo["median"]) < float(partial_result.monte_carlo["median"])
+        assert all(float(t.pnl) != 0 for t in slipped_result.trade_log)
+
+    def test_log_keeps_drawn_wins(self, sample_simulation_request):
+        """Test a drawn win whose slippage exceeds its payoff is still logged as a WIN."""
+        request = sample_simulation_request.model_copy(update={
+            "seed": 4,
+            "win_payoff": PayoffDistribution(kind="fixed", value=0.1),
+            "slippage": PayoffDistribution(kind="fixed", value=0.2),
+        })
+        log = calculate_compounding(request).trade_log
+
+        assert all(float(t.pnl) < 0 for t in log)
+        assert 30 < sum(t.result == "WIN" for t in log) < 70
+
+
+class TestBootstrapSimulation:
+    """Test simulating from the user's recorded trade returns."""
+
+    def test_resamples_recorded_returns(self, sample_simulation_request):
+        """Test bootstrap mode uses the recorded R-multiples, not win_rate / rr."""
+        request = sample_simulation_request.model_copy(update={"outcome_model": "bootstrap", "bootstrap_block": 3, "seed": 1, "risk_type": "fixed"})
+        returns = np.array([2.0, -1.0, -1.0, 1.0])
+        result = calculate_compounding(request, returns)
+
+        assert result.monte_carlo["method"] == "bootstrap"
+        assert result.monte_carlo["recorded_trades"] == 4
+        assert result.summary["profit_factor"] == "1.50"
+        # Fixed risk: every trade's P&L is one of the recorded R-multiples times 1R, less fees
+        risk_amount = float(request.initial_balance * request.risk_per_trade) / 100
+        expected = {f"{risk_amount * r - float(request.fees_per_trade):.2f}" for r in returns}
+        assert {t.pnl for t in result.trade_log} <= expected
+
+    def test_needs_returns(self, sample_simulation_request):
+        """Test bootstrap mode without a history is rejected."""
+        request = sample_simulation_request.model_copy(update={"outcome_model": "bootstrap"})
+        with pytest.raises(ValueError):
+            calculate_compounding(request)
+
+
+class TestSweep:
+    """Test the parameter sweep split/run/combine pipeline."""
+
+    def _run(self, request, parts):
+        jobs = split_sweep(request, parts)
+        return jobs, combine_sweep(jobs[0][0], [run_sweep_part(*job) for job in jobs])
+
+    def test_matrix_shape(self):
+        """Test metrics are indexed [win_rate][risk_per_trade][risk_reward_ratio]."""
+        request = SweepRequest(
+            initial_balance=Decimal("1000"), trades_per_day=4, simulation_days=25,
+            win_rate={"start": 40, "stop": 60, "steps": 3}, risk_per_trade=[Decimal("1"), Decimal("5")],
+            risk_reward_ratio=[Decimal("2")], iterations=300
+        )
+        _, result = self._run(request, 1)
+
+        assert result.win_rate == [40.0, 50.0, 60.0]
+        assert result.iterations == 300
+        for metric in (result.median, result.p5, result.ruin_probability, result.avg_max_drawdown):
+            assert np.array(metric).shape == (3, 2, 1)
+        # Common random numbers: a better win rate is better on every statistic
+        assert result.median[2][0][0] > result.median[1][0][0] > result.median[0][0][0]
+
+    def test_split_does_not_change_result(self):
+        """Test splitting paths over pool jobs gives the same matrices."""
+        request = SweepRequest(
+            initial_balance=Decimal("1000"), trades_per_day=5, simulation_days=40, fees_per_trade=Decimal("0.5"),
+            win_rate=[Decimal("45"), Decimal("55")], risk_per_trade=[Decimal("2"), Decimal("10")],
+            risk_reward_ratio=[Decimal("1.5")], iterations=1000
+        )
+        jobs, split = self._run(request, 4)
+        _, whole = self._run(request.model_copy(update={"seed": split.seed}), 1)
+
+        assert len(jobs) == 4
+        assert sum(paths for _, _, paths in jobs) == 1000
+        assert split == whole
+
+
+class TestCalculateOptimalRisk:
+    """Test the risk optimizer response."""
+
+    def test_recommends_risk_within_limits(self):
+        """Test a feasible recommendation respects the limits and lists its candidates."""
+        request = OptimizeRequest(
+            initial_balance=Decimal("10000"), win_rate=Decimal("55"), risk_reward_ratio=Decimal("1.5"),
+            trades_per_day=2, simulation_days=100, risk_type="fixed", trades_per_day_options=[4],
+            max_drawdown=Decimal("25"), seed=3
+        )
+        result = calculate_optimal_risk(request)
+
+        assert result.feasible
+        assert result.kelly_fraction == "25.00"
+        assert float(result.avg_max_drawdown) <= 25
+        assert float(result.ruin_probability) <= 1
+        assert {c["trades_per_day"] for c in result.candidates} == {2, 4}
+        assert result.seed == 3
+
+    def test_default_limits_bind(self):
+        """Test a default compounding request stays well below full Kelly and within the drawdown limit."""
+        request = OptimizeRequest(
+            initial_balance=Decimal("10000"), win_rate=Decimal("50"), risk_reward_ratio=Decimal("2"),
+            trades_per_day=5, simulation_days=365, seed=3
+        )
+        result = calculate_optimal_risk(request)
+
+        assert result.feasible
+        assert float(result.avg_max_drawdown) <= 30
+        assert float(result.risk_per_trade) < float(result.kelly_fraction) / 2
+
+    def test_no_edge(self):
+        """Test a negative expectancy gets no recommendation."""
+        request = OptimizeRequest(
+            initial_balance=Decimal("10000"), win_rate=Decimal("30"), risk_reward_ratio=Decimal("2"),
+            trades_per_day=5, simulation_days=30
+        )
+        result = calculate_optimal_risk(request)
+
+        assert not result.feasible
+        assert result.risk_per_trade is None
+        assert result.candidates == []
+
+
+class TestCalculatePortfolio:
+    """Test the multi-strategy portfolio response."""
+
+    def test_summary_and_contributions(self):
+        """Test the summary percentiles are ordered and the strategy shares add up."""
+        request = PortfolioRequest(
+            initial_balance=Decimal("10000"), simulation_days=60, seed=4,
+            strategies=[
+                {"name": "trend", "win_rate": 45, "risk_per_trade": 1, "risk_reward_ratio": 2.5, "trades_per_day": 2, "fees_per_trade": 1},
+                {"name": "scalp", "win_rate": 60, "risk_per_trade": 0.5, "risk_reward_ratio": 1, "trades_per_day": 5},
+            ],
+            correlation=[[1, -0.3], [-0.3, 1]]
+        )
+        result = calculate_portfolio(request)
+
+        summary = result.summary
+        assert float(summary["p5"]) <= float(summary["median"]) <= float(summary["p95"])
+        assert [s["name"] for s in result.strategies] == ["trend", "scalp"]
+        total = sum(float(s["mean_pnl"]) for s in result.strategies)
+        assert total == pytest.approx(float(summary["mean_final_balance"]) - 10000, abs=0.02)
+        assert sum(float(s["share"].rstrip("%")) for s in result.strategies) == pytest.approx(100, abs=0.2)
+        assert calculate_portfolio(request) == result
+
+
 class TestGetMarketPrice:
     """Test market price fetching."""
 
+    @pytest.fixture(autouse=True)
+    def empty_market_cache(self):
+        cache = MarketCache(MemoryBackend(max_bytes=10000, ttl=600))
+        with patch.object(engine, "market_cache", cache):
+            yield cache
+
     @patch('yfinance.Ticker')
     def test_yfinance_price_success(self, mock_ticker):
         """Test successful price fetch from yfinance."""
@@ -233,6 +647,100 @@ class TestGetMarketPrice:
         assert result["status"] == "error"
         assert result["price"] == 0
 
+    @patch('backend.app.engine.yf.Ticker')
+    def test_aliases_share_cached_price(self, mock_ticker):
+        """Test symbols normalizing to the same ticker are fetched once."""
+        mock_ticker.return_value.info = {'regularMarketPrice': 3000.0}
+
+        assert get_market_price("ETHUSDT")["price"] == 3000.0
+        assert get_market_price("BINANCE:ETHUSDT")["symbol"] == "ETH-USD"
+        mock_ticker.assert_called_once_with("ETH-USD")
+
+
+def _daily_bars(closes):
+    """yf.download-style frame of two daily bars; closes maps symbol -> [previous, last] (None = no bar)."""
+    dates = pd.to_datetime(["2026-10-16", "2026-10-17"])
+    columns = pd.MultiIndex.from_product([["Close", "High", "Low", "Volume"], list(closes)])
+    bars = pd.DataFrame(np.nan, index=dates, columns=columns)
+    for symbol, values in closes.items():
+        for row, close in enumerate(values):
+            if close is not None:
+                bars.loc[dates[row], ("Close", symbol)] = close
+                bars.loc[dates[row], ("High", symbol)] = close * 1.1
+                bars.loc[dates[row], ("Low", symbol)] = close * 0.9
+                bars.loc[dates[row], ("Volume", symbol)] = row + 1
+    return bars
+
+
+class TestWatchlistStats:
+    """Test per-symbol quotes computed from one bulk download."""
+
+    def test_change_and_last_bar(self):
+        """Test each symbol uses its own last two closes, whatever its calendar."""
+        bars = _daily_bars({"BTC-USD": [100, 110], "EURUSD=X": [1.25, None], "GC=F": [None, 2000]})
+        listed, price, change, high, low, volume = watchlist_stats(bars, ["BTC-USD", "EURUSD=X", "GC=F", "NOPE"])
+
+        assert listed.tolist() == [True, True, True, False]
+        assert price[:3] == pytest.approx([110, 1.25, 2000])
+        # Forex had no bar on the last day; gold has a single bar, so no change
+        assert change[:3] == pytest.approx([10, 0, 0])
+        assert high[0] == pytest.approx(121) and low[0] == pytest.approx(99)
+        assert volume[:3].tolist() == [2, 1, 2]
+
+    def test_single_ticker_flat_columns(self):
+        """Test the flat column layout of older yfinance releases."""
+        bars = _daily_bars({"ETH-USD": [10, 9]}).xs("ETH-USD", axis=1, level=1)
+        listed, price, change, *_ = watchlist_stats(bars, ["ETH-USD"])
+
+        assert listed.tolist() == [True]
+        assert change[0] == pytest.approx(-10)
+
+    def test_empty_download(self):
+        """Test a failed download lists nothing."""
+        listed, price, *_ = watchlist_stats(pd.DataFrame(), ["BTC-USD", "ETH-USD"])
+        assert not listed.any() and price.tolist() == [0, 0]
+
+    @patch('backend.app.engine.yf.download')
+    def test_one_bulk_download(self, mock_download):
+        """Test every symbol comes from a single yf.download call."""
+        mock_download.return_value = _daily_bars({"BTC-USD": [100, 110], "ETH-USD": [10, 9]})
+        listed, price, *_ = download_watchlist(["BTC-USD", "ETH-USD"])
+
+        mock_download.assert_called_once()
+        assert mock_download.call_args.args[0] == ["BTC-USD", "ETH-USD"]
+        assert price.tolist() == [110, 9]
+
+
+class TestGetWatchlist:
+    """Test watchlist rows served from the market cache."""
+
+    @pytest.fixture(autouse=True)
+    def empty_market_cache(self):
+        cache = MarketCache(MemoryBackend(max_bytes=10000, ttl=600))
+        with patch.object(engine, "market_cache", cache):
+            yield cache
+
+    @patch('backend.app.engine.yf.download')
+    def test_only_misses_downloaded(self, mock_download):
+        """Test cached symbols are not downloaded again."""
+        mock_download.return_value = _daily_bars({"BTC-USD": [100, 110]})
+        assert get_watchlist(["BTC-USD"]) == [(True, 110, 10, pytest.approx(121), 99, 2)]
+
+        mock_download.return_value = _daily_bars({"ETH-USD": [10, 9]})
+        rows = get_watchlist(["ETH-USD", "BTC-USD"])
+        assert [row[1] for row in rows] == [9, 110]
+        assert mock_download.call_args.args[0] == ["ETH-USD"]
+
+    @patch('backend.app.engine.yf.download')
+    def test_refresh_fills_cache(self, mock_download):
+        """Test refreshed symbols are then served without a download."""
+        mock_download.return_value = _daily_bars({"BTC-USD": [100, 110], "ETH-USD": [10, 9]})
+        refresh_watchlist(["BTC-USD", "ETH-USD"])
+        mock_download.reset_mock()
+
+        assert [row[1] for row in get_watchlist(["ETH-USD", "BTC-USD"])] == [9, 110]
+        mock_download.assert_not_called()
+
 
 class TestAnalyzeTradeHealth:
     """Test trade health analysis."""
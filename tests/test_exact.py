@@ -0,0 +1,90 @@
+import itertools
+import numpy as np
+import pytest
+
+from backend.app.exact import binomial_pmf, solve_exact, quantile, EXACT_MAX_TRADES
+from backend.app.monte_carlo import simulate_paths
+
+
+def _enumerate(initial, risk, rr, win_rate, fees, risk_type, trades):
+    """Brute-force terminal distribution over every win/loss sequence."""
+    outcomes = {}
+    ruin = 0.0
+    for sequence in itertools.product([True, False], repeat=trades):
+        probability = np.prod([win_rate if w else 1 - win_rate for w in sequence])
+        balance = initial
+        for is_win in sequence:
+            risk_amount = balance * risk if risk_type == "dynamic" else initial * risk
+            balance += (risk_amount * rr) - fees if is_win else -risk_amount - fees
+            if balance <= 0:
+                break
+        if balance <= 0:
+            ruin += probability
+        else:
+            outcomes[round(balance, 6)] = outcomes.get(round(balance, 6), 0.0) + probability
+    return outcomes, ruin
+
+
+class TestBinomialPmf:
+    """Test the log-space binomial pmf."""
+
+    def test_sums_to_one_with_binomial_mean(self):
+        """Test the pmf is normalized and centred on n * p."""
+        pmf = binomial_pmf(5000, 0.37)
+
+        assert pmf.sum() == pytest.approx(1.0)
+        assert (np.arange(5001) * pmf).sum() == pytest.approx(5000 * 0.37)
+
+    @pytest.mark.parametrize("win_rate,index", [(0.0, 0), (1.0, 10)])
+    def test_degenerate_rates(self, win_rate, index):
+        """Test 0% and 100% win rates put all mass on one count."""
+        pmf = binomial_pmf(10, win_rate)
+
+        assert pmf[index] == 1.0
+        assert pmf.sum() == 1.0
+
+
+class TestSolveExact:
+    """Test the exact ruin / terminal-balance solver."""
+
+    @pytest.mark.parametrize("risk_type,fees,risk", [
+        ("fixed", 0.0, 0.3),
+        ("fixed", 20.0, 0.25),
+        ("dynamic", 0.0, 0.4),
+        ("dynamic", 0.0, 1.0),
+    ])
+    def test_matches_enumeration(self, risk_type, fees, risk):
+        """Test ruin and terminal masses match every enumerated sequence."""
+        expected, expected_ruin = _enumerate(1000.0, risk, 1.5, 0.45, fees, risk_type, 10)
+
+        result = solve_exact(1000.0, risk, 1.5, 0.45, fees, risk_type, 10)
+
+        assert result["ruin_probability"] == pytest.approx(expected_ruin)
+        for balance, probability in expected.items():
+            mask = np.isclose(result["balances"], balance)
+            assert result["probabilities"][mask].sum() == pytest.approx(probability)
+        assert result["probabilities"].sum() == pytest.approx(1.0)
+
+    def test_matches_monte_carlo(self):
+        """Test exact ruin and median agree with a large Monte Carlo run."""
+        args = (1000.0, 0.1, 1.0, 0.48, 0.0, "fixed", 300)
+        exact = solve_exact(*args)
+        paths = simulate_paths(*args, 20000, seed=0)
+
+        assert exact["ruin_probability"] == pytest.approx(paths["ruined"].mean(), abs=0.01)
+        assert quantile(exact, 0.5) == pytest.approx(np.median(paths["final_balances"]), abs=40)
+
+    def test_dynamic_with_fees_is_intractable(self):
+        """Test path-dependent models are left to the Monte Carlo."""
+        assert solve_exact(1000.0, 0.02, 2.0, 0.5, 1.0, "dynamic", 100) is None
+
+    def test_too_many_trades_is_intractable(self):
+        """Test horizons beyond the DP budget are left to the Monte Carlo."""
+        assert solve_exact(1000.0, 0.02, 2.0, 0.5, 0.0, "fixed", EXACT_MAX_TRADES + 1) is None
+
+    def test_quantile_of_certain_outcome(self):
+        """Test every quantile of a 100% win rate is the single terminal balance."""
+        result = solve_exact(1000.0, 0.01, 2.0, 1.0, 0.0, "dynamic", 50)
+
+        for q in (0.05, 0.5, 0.95):
+            assert quantile(result, q) == pytest.approx(1000.0 * 1.02 ** 50)
@@ -0,0 +1,79 @@
+import asyncio
+import time
+import pytest
+
+from backend.app.executor import (
+    SimulationPool,
+    PoolSaturated,
+    JobTimeout,
+    JobCancelled,
+    check_cancelled
+)
+from backend.app.monte_carlo import simulate_paths
+
+# Arguments for a kernel run that only ends when it is cancelled
+ENDLESS_SIMULATION = (1000.0, 0.001, 1.0, 0.5, 0.0, "fixed", 10 ** 12, 1000)
+
+
+@pytest.fixture
+def pool():
+    """Small pool: one worker, no queue."""
+    pool = SimulationPool(workers=1, queue_size=0, timeout=30, retry_after=3)
+    yield pool
+    pool.shutdown()
+
+
+async def _wait_until_idle(pool, seconds=10.0):
+    deadline = time.monotonic() + seconds
+    while pool.in_flight and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    return pool.in_flight == 0
+
+
+class TestSimulationPool:
+    """Test the bounded simulation process pool."""
+
+    @pytest.mark.asyncio
+    async def test_run_returns_result(self, pool):
+        """Test a job runs in a worker process and returns its result."""
+        result = await pool.run(sum, [1, 2, 3])
+
+        assert result == 6
+        assert await _wait_until_idle(pool)
+
+    @pytest.mark.asyncio
+    async def test_saturated_pool_rejects(self, pool):
+        """Test backpressure: a full pool raises instead of queueing."""
+        first = asyncio.ensure_future(pool.run(time.sleep, 1))
+        await asyncio.sleep(0)
+
+        with pytest.raises(PoolSaturated) as exc:
+            await pool.run(sum, [1])
+        assert exc.value.retry_after == 3
+
+        await first
+        assert await _wait_until_idle(pool)
+
+    @pytest.mark.asyncio
+    async def test_timeout_stops_running_job(self, pool):
+        """Test a timed out job is cancelled inside the worker and frees its slot."""
+        with pytest.raises(JobTimeout):
+            await pool.run(simulate_paths, *ENDLESS_SIMULATION, timeout=1.0)
+
+        assert await _wait_until_idle(pool)
+
+    @pytest.mark.asyncio
+    async def test_client_disconnect_cancels_job(self, pool):
+        """Test a disconnected client cancels its job."""
+        async def is_disconnected():
+            return True
+
+        with pytest.raises(JobCancelled):
+            await pool.run(simulate_paths, *ENDLESS_SIMULATION, is_disconnected=is_disconnected)
+
+        assert await _wait_until_idle(pool)
+
+
+def test_check_cancelled_outside_pool():
+    """Test the cancellation point is a no-op outside pool processes."""
+    assert check_cancelled() is None
@@ -0,0 +1,269 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.app.market_cache import MarketCache, SingleFlight
+from backend.app.result_cache import MemoryBackend, SQLiteBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class QueuedExecutor:
+    """Holds submitted refreshes until run() so tests control when they happen."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, *args):
+        self.jobs.append((fn, args))
+
+    def run(self):
+        jobs, self.jobs = self.jobs, []
+        for fn, args in jobs:
+            fn(*args)
+
+
+class Upstream:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("upstream down")
+        return {"price": float(self.calls)}
+
+
+def _cache(backend=None):
+    clock = FakeClock()
+    executor = QueuedExecutor()
+    cache = MarketCache(backend or MemoryBackend(max_bytes=10000, ttl=600), ttl=30, timer=clock, executor=executor)
+    return cache, clock, executor
+
+
+class TestMarketCache:
+    """Test stale-while-revalidate serving of upstream market data."""
+
+    def test_miss_fetches_then_hits(self):
+        """Test only the first read waits on upstream."""
+        cache, clock, _ = _cache()
+        upstream = Upstream()
+
+        assert cache.get("BTC-USD", upstream) == {"price": 1.0}
+        clock.now += 10
+        assert cache.get("BTC-USD", upstream) == {"price": 1.0}
+        assert upstream.calls == 1
+
+    def test_stale_entry_served_while_refreshing(self):
+        """Test an expired entry is answered at once and replaced by one background refresh."""
+        cache, clock, executor = _cache()
+        upstream = Upstream()
+        cache.get("BTC-USD", upstream)
+        clock.now += 31
+
+        # Both readers get the stale value; only one refresh is queued
+        assert cache.get("BTC-USD", upstream) == {"price": 1.0}
+        assert cache.get("BTC-USD", upstream) == {"price": 1.0}
+        assert upstream.calls == 1 and len(executor.jobs) == 1
+
+        executor.run()
+        assert upstream.calls == 2
+        assert cache.get("BTC-USD", upstream) == {"price": 2.0}
+
+    def test_failed_refresh_keeps_stale_value(self):
+        """Test an upstream error during a refresh leaves the cached value in place."""
+        cache, clock, executor = _cache()
+        upstream = Upstream()
+        cache.get("BTC-USD", upstream)
+        clock.now += 31
+        upstream.fail = True
+
+        cache.get("BTC-USD", upstream)
+        executor.run()
+        assert cache.get("BTC-USD", upstream) == {"price": 1.0}
+        # The failed refresh is not stuck: the next stale read queues another
+        assert len(executor.jobs) == 1
+
+    def test_miss_propagates_errors(self):
+        """Test a cold key surfaces the upstream error and caches nothing."""
+        cache, _, _ = _cache()
+        upstream = Upstream()
+        upstream.fail = True
+
+        with pytest.raises(ConnectionError):
+            cache.get("BTC-USD", upstream)
+        upstream.fail = False
+        assert cache.get("BTC-USD", upstream) == {"price": 2.0}
+
+    def test_refresh_skipped_when_another_worker_refreshed(self):
+        """Test a queued refresh finds a fresh entry written through the shared backend."""
+        backend = MemoryBackend(max_bytes=10000, ttl=600)
+        cache, clock, executor = _cache(backend)
+        other, _, _ = _cache(backend)
+        other._timer = clock
+        upstream = Upstream()
+        cache.get("BTC-USD", upstream)
+        clock.now += 31
+
+        cache.get("BTC-USD", upstream)
+        other.set("BTC-USD", {"price": 9.0})
+        executor.run()
+        assert upstream.calls == 1
+        assert cache.get("BTC-USD", upstream) == {"price": 9.0}
+
+    def test_shared_between_workers_via_sqlite(self, tmp_path):
+        """Test a value fetched by one worker serves another through the SQLite backend."""
+        path = str(tmp_path / "market.sqlite3")
+        first, _, _ = _cache(SQLiteBackend(path, max_bytes=10000, ttl=600))
+        second, _, _ = _cache(SQLiteBackend(path, max_bytes=10000, ttl=600))
+        upstream = Upstream()
+
+        first.get("ETH-USD", upstream)
+        assert second.get("ETH-USD", upstream) == {"price": 1.0}
+        assert upstream.calls == 1
+
+
+class BulkUpstream:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, keys):
+        self.calls.append(list(keys))
+        return {key: len(self.calls) for key in keys}
+
+
+class TestMarketCacheGetMany:
+    """Test several keys read together with one upstream call for the misses."""
+
+    def test_misses_fetched_in_one_call(self):
+        """Test cached keys are served and only the misses are fetched, together."""
+        cache, _, _ = _cache()
+        upstream = BulkUpstream()
+        cache.get_many(["BTC"], upstream)
+
+        assert cache.get_many(["BTC", "ETH", "SOL"], upstream) == {"BTC": 1, "ETH": 2, "SOL": 2}
+        assert upstream.calls == [["BTC"], ["ETH", "SOL"]]
+        assert cache.get_many(["SOL", "BTC"], upstream) == {"SOL": 2, "BTC": 1}
+        assert len(upstream.calls) == 2
+
+    def test_stale_keys_refreshed_together(self):
+        """Test stale keys are served at once and refreshed by one background call."""
+        cache, clock, executor = _cache()
+        upstream = BulkUpstream()
+        cache.get_many(["BTC", "ETH"], upstream)
+        clock.now += 31
+
+        assert cache.get_many(["BTC", "ETH"], upstream) == {"BTC": 1, "ETH": 1}
+        cache.get_many(["ETH"], upstream)
+        assert len(executor.jobs) == 1
+
+        executor.run()
+        assert upstream.calls[-1] == ["BTC", "ETH"]
+        assert cache.get_many(["BTC", "ETH"], upstream) == {"BTC": 2, "ETH": 2}
+
+    def test_refresh_skips_keys_set_meanwhile(self):
+        """Test a queued refresh only fetches keys still stale when it runs."""
+        cache, clock, executor = _cache()
+        upstream = BulkUpstream()
+        cache.get_many(["BTC", "ETH"], upstream)
+        clock.now += 31
+
+        cache.get_many(["BTC", "ETH"], upstream)
+        cache.set("BTC", 9)
+        executor.run()
+        assert upstream.calls[-1] == ["ETH"]
+        assert cache.get_many(["BTC", "ETH"], upstream) == {"BTC": 9, "ETH": 2}
+
+
+class TestSingleFlight:
+    """Test per-key coalescing of concurrent upstream calls."""
+
+    def _burst(self, fn, callers=16):
+        results = []
+        start = threading.Barrier(callers)
+
+        def call():
+            start.wait()
+            try:
+                results.append(fn())
+            except Exception as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_callers_share_one_call(self):
+        """Test a burst of callers makes a single upstream call and all get its result."""
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"price": 1.0}
+
+        flight = SingleFlight()
+        results = self._burst(lambda: flight.do("BTC-USD", fetch))
+        assert len(calls) == 1
+        assert results == [{"price": 1.0}] * 16
+
+    def test_error_is_shared(self):
+        """Test every waiter sees the leader's exception, and the next call retries."""
+        flight = SingleFlight()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            raise ConnectionError("upstream down")
+
+        results = self._burst(lambda: flight.do("BTC-USD", fetch))
+        assert len(calls) == 1
+        assert all(isinstance(r, ConnectionError) for r in results)
+        assert flight.do("BTC-USD", lambda: 2.0) == 2.0
+
+    def test_async_waiters_share_one_thread(self):
+        """Test coroutines awaiting one key share a single call, more of them than executor threads."""
+        flight = SingleFlight()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"price": 1.0}
+
+        async def burst():
+            return await asyncio.gather(*(flight.run("BTC-USD", fetch) for _ in range(100)))
+
+        assert asyncio.run(burst()) == [{"price": 1.0}] * 100
+        assert len(calls) == 1
+
+    def test_keys_are_independent(self):
+        """Test different keys don't wait for each other."""
+        flight = SingleFlight()
+        assert flight.do("a", lambda: flight.do("b", lambda: "b")) == "b"
+
+    def test_cache_misses_coalesce(self):
+        """Test concurrent misses of a cold key reach upstream once."""
+        cache, _, _ = _cache()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"price": 1.0}
+
+        results = self._burst(lambda: cache.get("BTC-USD", fetch), callers=8)
+        assert len(calls) == 1 and results == [{"price": 1.0}] * 8
@@ -0,0 +1,112 @@
+import threading
+
+from backend.app.market_cache import MarketCache
+from backend.app.market_refresher import AccessCounter, MarketRefresher
+from backend.app.result_cache import MemoryBackend
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+        self.max_ages = []
+        self.called = threading.Event()
+
+    def __call__(self, symbols, max_age):
+        self.calls.append(symbols)
+        self.max_ages.append(max_age)
+        self.called.set()
+
+
+class TestAccessCounter:
+    """Test per-symbol request counts."""
+
+    def test_top_symbols(self):
+        """Test symbols are ranked by how often they were requested."""
+        counter = AccessCounter()
+        counter.record(["BTC-USD", "ETH-USD"])
+        counter.record(["ETH-USD", "SOL-USD"])
+        counter.record(["ETH-USD", "SOL-USD"])
+        assert counter.top(2) == ["ETH-USD", "SOL-USD"]
+
+    def test_decay_forgets_old_requests(self):
+        """Test decay scales counts down and drops symbols not requested lately."""
+        counter = AccessCounter()
+        counter.record(["BTC-USD"] * 4 + ["ETH-USD"])
+        counter.decay(0.25)
+        assert counter.top(5) == ["BTC-USD"]
+
+    def test_bounded(self):
+        """Test the least requested symbols are dropped past twice the limit."""
+        counter = AccessCounter(max_symbols=2)
+        counter.record(["A", "A", "B", "B", "C"])
+        counter.record(["D", "E"])
+        assert counter.top(10) == ["A", "B"]
+
+
+class TestMarketRefresher:
+    """Test the background refresh of the hot watchlist."""
+
+    def test_watchlist_pins_defaults(self):
+        """Test the defaults come first, then the most requested other symbols."""
+        counter = AccessCounter()
+        counter.record(["BTC-USD", "AAPL", "AAPL", "TSLA", "MSFT", "MSFT", "MSFT"])
+        refresher = MarketRefresher(Recorder(), ["BTC-USD", "ETH-USD", "BTC-USD"], counter, interval=20, hot=2)
+        assert refresher.watchlist() == ["BTC-USD", "ETH-USD", "MSFT", "AAPL"]
+
+    def test_jittered_delay(self):
+        """Test waits spread within the jitter around the interval."""
+        refresher = MarketRefresher(Recorder(), [], AccessCounter(), interval=20, jitter=0.2, rng=lambda: 0.0)
+        assert refresher.delay() == 16
+        refresher._random = lambda: 1.0
+        assert refresher.delay() == 24
+
+    def test_refresh_errors_are_contained(self):
+        """Test a failed refresh is reported and the counts still decay."""
+        def fail(symbols, max_age):
+            raise ConnectionError("upstream down")
+        counter = AccessCounter()
+        counter.record(["AAPL"])
+        MarketRefresher(fail, ["BTC-USD"], counter, interval=1200).refresh_once()
+        assert counter.top(1) == []
+
+    def test_disabled_without_interval(self):
+        """Test an interval of 0 never starts the thread."""
+        refresh = Recorder()
+        refresher = MarketRefresher(refresh, ["BTC-USD"], AccessCounter(), interval=0)
+        refresher.start()
+        assert refresher._thread is None
+        refresher.stop()
+
+    def test_start_refreshes_until_stopped(self):
+        """Test the thread refreshes at once on start and exits on stop."""
+        refresh = Recorder()
+        refresher = MarketRefresher(refresh, ["BTC-USD"], AccessCounter(), interval=60)
+        refresher.start()
+        assert refresh.called.wait(5)
+        thread = refresher._thread
+        refresher.stop()
+        assert not thread.is_alive()
+        assert refresh.calls == [["BTC-USD"]]
+        assert refresh.max_ages == [48]
+
+    def test_workers_share_refreshes(self):
+        """Test workers on one shared cache skip the symbols another one just refreshed."""
+        clock = [0.0]
+        backend = MemoryBackend()
+        downloads = []
+
+        def fetch_many(keys):
+            downloads.append(keys)
+            return {key: clock[0] for key in keys}
+
+        def worker():
+            cache = MarketCache(backend, ttl=60, timer=lambda: clock[0])
+            return MarketRefresher(lambda symbols, max_age: cache.refresh_many(symbols, fetch_many, max_age),
+                                   ["BTC-USD", "ETH-USD"], AccessCounter(), interval=20)
+
+        workers = [worker() for _ in range(4)]
+        for _ in range(3):
+            for w in workers:
+                w.refresh_once()
+                clock[0] += 5
+        assert downloads == [["BTC-USD", "ETH-USD"]] * 3
@@ -4,11 +4,16 @@ from datetime import datetime
 
 from backend.app.models import (
     SimulationRequest,
+    SweepRequest,
+    OptimizeRequest,
+    PortfolioRequest,
+    PayoffDistribution,
     SimulationResponse,
     DailyResult,
     TradeResult,
     GoalPlannerRequest,
     GoalPlannerResponse,
+    GoalSolveRequest,
     HealthAnalysisRequest,
     HealthAnalysisResponse,
     TradeItem,
@@ -140,6 +145,133 @@ class TestSimulationRequest:
             assert request.risk_type == risk_type
 
 
+class TestPayoffDistribution:
+    """Test payoff distribution parameter validation."""
+
+    def test_valid_distributions(self):
+        """Test each kind accepts its parameters."""
+        PayoffDistribution(kind="fixed", value=Decimal("1.5"))
+        PayoffDistribution(kind="histogram", values=[Decimal("1"), Decimal("0.5")], weights=[Decimal("7"), Decimal("3")])
+        PayoffDistribution(kind="lognormal", mean=Decimal("2"), std=Decimal("1"))
+
+    @pytest.mark.parametrize("fields", [
+        {"kind": "fixed"},
+        {"kind": "histogram", "values": [1, 2], "weights": [1]},
+        {"kind": "histogram", "values": [1], "weights": [0]},
+        {"kind": "histogram", "values": [-1], "weights": [1]},
+        {"kind": "normal", "mean": 1},
+    ])
+    def test_invalid_distributions(self, fields):
+        """Test missing or inconsistent parameters are rejected."""
+        with pytest.raises(ValueError):
+            PayoffDistribution(**fields)
+
+
+class TestSweepRequest:
+    """Test SweepRequest grid validation."""
+
+    def _request(self, **overrides):
+        fields = dict(
+            initial_balance=Decimal("10000"), trades_per_day=5, simulation_days=30,
+            win_rate=[Decimal("40"), Decimal("50")], risk_per_trade=[Decimal("1")],
+            risk_reward_ratio=[Decimal("2")]
+        )
+        fields.update(overrides)
+        return SweepRequest(**fields)
+
+    def test_range_axis_expands(self):
+        """Test a start/stop/steps range becomes evenly spaced values."""
+        request = self._request(win_rate={"start": 40, "stop": 60, "steps": 5})
+        assert request.axis("win_rate") == [Decimal(v) for v in (40, 45, 50, 55, 60)]
+        assert request.axis("risk_per_trade") == [Decimal("1")]
+
+    def test_invalid_axis_values(self):
+        """Test axis values outside their field's range are rejected."""
+        with pytest.raises(ValueError):
+            self._request(win_rate=[Decimal("120")])
+        with pytest.raises(ValueError):
+            self._request(risk_per_trade=[Decimal("0")])
+        with pytest.raises(ValueError):
+            self._request(risk_reward_ratio=[])
+
+    def test_grid_too_large(self):
+        """Test grids beyond the cell and work limits are rejected."""
+        with pytest.raises(ValueError):
+            self._request(win_rate={"start": 1, "stop": 99, "steps": 50}, risk_per_trade={"start": 1, "stop": 10, "steps": 10})
+        with pytest.raises(ValueError):
+            self._request(simulation_days=3650, trades_per_day=100, iterations=10000)
+
+
+class TestOptimizeRequest:
+    """Test OptimizeRequest needs a constraint that can bind."""
+
+    def _request(self, **overrides):
+        fields = dict(
+            initial_balance=Decimal("10000"), win_rate=Decimal("50"), risk_reward_ratio=Decimal("2"),
+            trades_per_day=5, simulation_days=365
+        )
+        fields.update(overrides)
+        return OptimizeRequest(**fields)
+
+    def test_drawdown_limit_by_default(self):
+        """Test a default request is bounded by the drawdown limit."""
+        assert self._request().max_drawdown == Decimal("30")
+
+    @pytest.mark.parametrize("overrides", [
+        dict(risk_type="fixed"),
+        dict(fees_per_trade=Decimal("1")),
+    ])
+    def test_ruin_limit_alone(self, overrides):
+        """Test the drawdown limit can be dropped where ruin is possible."""
+        assert self._request(max_drawdown=None, **overrides).max_drawdown is None
+
+    @pytest.mark.parametrize("overrides", [
+        dict(),                                                          # compounding without fees never ruins
+        dict(risk_type="fixed", max_ruin_probability=Decimal("100")),   # ruin limit never binds
+    ])
+    def test_no_effective_constraint(self, overrides):
+        """Test requests whose limits cannot bind are rejected."""
+        with pytest.raises(ValueError):
+            self._request(max_drawdown=None, **overrides)
+
+
+class TestPortfolioRequest:
+    """Test PortfolioRequest strategy and correlation validation."""
+
+    def _request(self, **overrides):
+        fields = dict(
+            initial_balance=Decimal("10000"), simulation_days=30,
+            strategies=[
+                {"name": "a", "win_rate": 50, "risk_per_trade": 1, "risk_reward_ratio": 2, "trades_per_day": 2},
+                {"name": "b", "win_rate": 40, "risk_per_trade": 1, "risk_reward_ratio": 3, "trades_per_day": 1},
+            ]
+        )
+        fields.update(overrides)
+        return PortfolioRequest(**fields)
+
+    def test_valid_correlation(self):
+        """Test a symmetric positive definite matrix is accepted."""
+        request = self._request(correlation=[[1, 0.4], [0.4, 1]])
+        assert request.correlation[0][1] == Decimal("0.4")
+
+    @pytest.mark.parametrize("correlation", [
+        [[1, 0.4]],                            # wrong shape
+        [[1, 0.4], [0.2, 1]],                  # not symmetric
+        [[2, 0.4], [0.4, 2]],                  # diagonal not 1
+        [[1, 1], [1, 1]],                      # singular
+    ])
+    def test_invalid_correlation(self, correlation):
+        """Test malformed or non positive definite matrices are rejected."""
+        with pytest.raises(ValueError):
+            self._request(correlation=correlation)
+
+    def test_duplicate_names(self):
+        """Test strategies need distinct names."""
+        strategy = {"name": "a", "win_rate": 50, "risk_per_trade": 1, "risk_reward_ratio": 2, "trades_per_day": 2}
+        with pytest.raises(ValueError):
+            self._request(strategies=[strategy, strategy])
+
+
 class TestGoalPlannerRequest:
     """Test GoalPlannerRequest model validation."""
 
@@ -183,6 +315,42 @@ class TestGoalPlannerRequest:
             )
 
 
+class TestGoalSolveRequest:
+    """Test GoalSolveRequest validation."""
+
+    def _request(self, **overrides):
+        fields = dict(
+            initial_balance=Decimal("10000"), solve_for="win_rate", risk_per_trade=Decimal("1"),
+            risk_reward_ratio=Decimal("2"), trades_per_day=5,
+            goals=[{"target_balance": 20000, "deadline_months": 12}]
+        )
+        fields.update(overrides)
+        return GoalSolveRequest(**fields)
+
+    def test_valid_request(self):
+        """Test defaults of a valid request."""
+        request = self._request()
+        assert request.probability == Decimal("50")
+        assert request.days_per_month == 30
+
+    def test_fixed_parameter_required(self):
+        """Test the parameter held fixed must be given."""
+        with pytest.raises(ValueError):
+            self._request(solve_for="risk_per_trade")
+        assert self._request(solve_for="risk_per_trade", win_rate=Decimal("50")).win_rate == Decimal("50")
+
+    def test_target_above_initial_balance(self):
+        """Test a target the balance already meets is rejected."""
+        with pytest.raises(ValueError):
+            self._request(goals=[{"target_balance": 10000, "deadline_months": 12}])
+
+    def test_work_limit(self):
+        """Test oversized solves are rejected."""
+        with pytest.raises(ValueError):
+            self._request(trades_per_day=1000, iterations=5000,
+                          goals=[{"target_balance": 20000, "deadline_months": 120}] * 10)
+
+
 class TestHealthAnalysisRequest:
     """Test HealthAnalysisRequest model."""
 
@@ -0,0 +1,464 @@
+import numpy as np
+import pytest
+
+import backend.app.monte_carlo as monte_carlo
+
+from backend.app.rng import cell_key, cell_bits, bernoulli_threshold
+from backend.app.monte_carlo import (
+    simulate_paths,
+    simulate_to_precision,
+    PrecisionTracker,
+    sweep_paths,
+    simulate_portfolio,
+    fan_bands,
+    _chunk_balances,
+    _draw_wins,
+    _draw_returns,
+    _stratified_win_counts,
+    FAN_PERCENTILES
+)
+
+
+def _loop_balances(start, outcomes, initial, risk, rr, fees, risk_type):
+    """Reference per-trade loop, mirroring the original engine."""
+    balances = []
+    balance = start
+    for is_win in outcomes:
+        risk_amount = balance * risk if risk_type == "dynamic" else initial * risk
+        balance += (risk_amount * rr) - fees if is_win else -risk_amount - fees
+        balances.append(balance)
+    return balances
+
+
+class TestChunkBalances:
+    """Test the vectorized balance arithmetic against the scalar loop."""
+
+    @pytest.mark.parametrize("risk_type", ["dynamic", "fixed"])
+    @pytest.mark.parametrize("fees", [0.0, 1.5])
+    def test_matches_scalar_loop(self, risk_type, fees):
+        """Test cumulative sums/products reproduce the per-trade recurrence."""
+        rng = np.random.default_rng(7)
+        wins = rng.random((4, 50)) < 0.5
+        start = np.array([10000.0, 9500.0, 12000.0, 10000.0])
+
+        curve = _chunk_balances(start, wins, 10000.0, 0.02, 2.0, fees, risk_type)
+
+        for row in range(4):
+            expected = _loop_balances(start[row], wins[row], 10000.0, 0.02, 2.0, fees, risk_type)
+            np.testing.assert_allclose(curve[row], expected, rtol=1e-9)
+
+
+class TestSimulatePaths:
+    """Test the vectorized Monte Carlo kernel."""
+
+    def test_result_shapes(self):
+        """Test one entry per path is returned for every statistic."""
+        result = simulate_paths(10000.0, 0.02, 2.0, 0.5, 1.0, "dynamic", 100, 64, seed=1)
+
+        assert result["final_balances"].shape == (64,)
+        assert result["max_drawdowns"].shape == (64,)
+        assert result["ruined"].dtype == bool
+
+    def test_all_wins_is_exact(self):
+        """Test a 100% win rate compounds deterministically with no drawdown."""
+        result = simulate_paths(1000.0, 0.01, 2.0, 1.0, 0.0, "dynamic", 300, 10)
+
+        np.testing.assert_allclose(result["final_balances"], 1000.0 * 1.02 ** 300)
+        assert np.all(result["max_drawdowns"] == 0)
+        assert not result["ruined"].any()
+
+    def test_all_losses_ruin_fixed(self):
+        """Test losing 25% of the initial balance per trade ruins on trade 4."""
+        result = simulate_paths(1000.0, 0.25, 2.0, 0.0, 0.0, "fixed", 1000, 20)
+
+        assert result["ruined"].all()
+        assert np.all(result["final_balances"] == 0)
+        np.testing.assert_allclose(result["max_drawdowns"], 100.0)
+
+    def test_full_risk_loss_ruins_dynamic_with_fees(self):
+        """Test risking 100% with fees ruins on the first loss instead of producing NaN."""
+        result = simulate_paths(1000.0, 1.0, 2.0, 0.5, 1.0, "dynamic", 200, 200, seed=3)
+
+        assert result["ruined"].all()
+        assert not np.isnan(result["max_drawdowns"]).any()
+
+    def test_ruin_probability_matches_analytic(self):
+        """Test ruin frequency for two 50% trades matches P(two losses) = 25%."""
+        result = simulate_paths(1000.0, 0.5, 1.0, 0.5, 0.0, "fixed", 2, 20000, seed=11)
+
+        assert result["ruined"].mean() == pytest.approx(0.25, abs=0.015)
+
+    def test_ruined_paths_stop_early(self):
+        """Test ruined paths keep a zero balance across later outcome blocks."""
+        result = simulate_paths(1000.0, 0.5, 1.0, 0.3, 0.0, "fixed", 5000, 500, seed=5)
+
+        assert result["ruined"].any()
+        assert np.all(result["final_balances"][result["ruined"]] == 0)
+        assert np.all(result["final_balances"][~result["ruined"]] > 0)
+
+
+class TestFanChart:
+    """Test the per-day percentile bands of the fan chart."""
+
+    def test_bands_match_stored_curves(self):
+        """Test the bands equal percentiles of fully stored day-end balances."""
+        args = (1000.0, 0.05, 1.5, 0.45, 0.0, "fixed", 60)
+        result = simulate_paths(*args, 300, seed=12, day_length=4)
+        wins = cell_bits(cell_key(12), np.arange(300), 0, 60) < bernoulli_threshold(0.45)
+        curve = np.maximum(_chunk_balances(np.full(300, 1000.0), wins, 1000.0, 0.05, 1.5, 0.0, "fixed"), 0)
+        fan_balance, _ = fan_bands(result)
+
+        assert fan_balance.shape == (15, 5)
+        np.testing.assert_allclose(fan_balance, np.percentile(curve[:, 3::4], FAN_PERCENTILES, axis=0).T)
+
+    def test_ruined_paths_count_as_zero(self):
+        """Test days after ruin report 0 balance and 100% drawdown."""
+        fan_balance, fan_drawdown = fan_bands(simulate_paths(1000.0, 0.25, 2.0, 0.0, 0.0, "fixed", 20, 10, day_length=3))
+
+        assert fan_balance[0, 2] == 250.0
+        assert np.all(fan_balance[1:] == 0)
+        assert np.all(fan_drawdown[1:] == 100)
+
+    def test_partial_last_day(self):
+        """Test a trailing partial day still gets a band."""
+        fan_balance, _ = fan_bands(simulate_paths(1000.0, 0.01, 2.0, 1.0, 0.0, "dynamic", 10, 4, day_length=4))
+
+        assert fan_balance.shape == (3, 5)
+        np.testing.assert_allclose(fan_balance[-1], 1000.0 * 1.02 ** 10)
+
+    def test_batched_bands_are_percentiles_over_all_paths(self):
+        """Test the bands of a batched run are np.percentile over every path's day-end balance."""
+        args = (1000.0, 0.03, 1.5, 0.45, 1.0, "dynamic")
+        result = simulate_to_precision(*args, 50, 0.01, 800, seed=1, day_length=5)
+        fan_balance, _ = fan_bands(result)
+
+        assert result["iterations"] == 800
+        for day in range(1, 11):
+            # Paths depend only on (seed, id, trade), so a shorter run ends on that day's balances
+            balances = simulate_paths(*args, day * 5, 800, seed=1)["final_balances"]
+            np.testing.assert_allclose(fan_balance[day - 1], np.percentile(balances, FAN_PERCENTILES))
+
+    def test_follows_leading_paths(self, monkeypatch):
+        """Test only the first fan_paths global ids keep day-end values, however the run is batched."""
+        monkeypatch.setattr(monte_carlo, "_FAN_MAX_PATHS", 100)
+        args = (1000.0, 0.02, 2.0, 0.5, 0.0, "fixed", 40, 150)
+        whole = simulate_paths(*args, seed=2, day_length=4)
+        first = simulate_paths(*args[:-1], 60, seed=2, day_length=4)
+        rest = simulate_paths(*args[:-1], 90, seed=2, day_length=4, first_path=60)
+
+        assert whole["day_balances"].shape == (100, 10)
+        assert rest["day_balances"].shape == (40, 10)
+        np.testing.assert_array_equal(np.concatenate([first["day_balances"], rest["day_balances"]]), whole["day_balances"])
+
+
+class TestSamplers:
+    """Test the variance-reduced outcome generators."""
+
+    def test_antithetic_pairs_mirror(self):
+        """Test path 2k + 1 sees 1 - u of path 2k (the opposite outcome at a 50% win rate)."""
+        wins = _draw_wins(cell_key(0), "antithetic", np.arange(10), 10, 0, 0, 20, 0.5)
+
+        np.testing.assert_array_equal(wins[1::2], ~wins[::2])
+
+    def test_antithetic_pairs_survive_ruin(self):
+        """Test pairing follows path ids when only some paths are alive."""
+        wins = _draw_wins(cell_key(0), "antithetic", np.array([3, 6, 7]), 10, 0, 0, 20, 0.5)
+
+        np.testing.assert_array_equal(wins[2], ~wins[1])
+
+    def test_antithetic_mirror_keeps_win_rate(self):
+        """Test mirrored paths win with the requested probability."""
+        wins = _draw_wins(cell_key(5), "antithetic", np.arange(2000), 2000, 0, 0, 500, 0.3)
+
+        assert wins[1::2].mean() == pytest.approx(0.3, abs=0.005)
+
+    def test_stratified_counts_cover_distribution(self):
+        """Test stratified win counts have the binomial mean with far less spread in the mean."""
+        counts = _stratified_win_counts(np.random.default_rng(1), 1000, 0.4, 2000)
+
+        assert counts.mean() == pytest.approx(400, abs=0.5)
+        assert counts.std() == pytest.approx(np.sqrt(1000 * 0.4 * 0.6), rel=0.05)
+
+    def test_stratified_counts_degenerate_rates(self):
+        """Test 0% and 100% win rates give constant counts."""
+        rng = np.random.default_rng(1)
+
+        assert np.all(_stratified_win_counts(rng, 50, 0.0, 8) == 0)
+        assert np.all(_stratified_win_counts(rng, 50, 1.0, 8) == 50)
+
+    @pytest.mark.parametrize("sampler", ["antithetic", "stratified"])
+    def test_sampler_matches_random_distribution(self, sampler):
+        """Test variance-reduced samplers estimate the same percentiles and ruin rate."""
+        args = (1000.0, 0.1, 1.0, 0.48, 0.0, "fixed", 300, 4000)
+        plain = simulate_paths(*args, seed=8)
+        reduced = simulate_paths(*args, seed=9, sampler=sampler)
+
+        assert reduced["ruined"].mean() == pytest.approx(plain["ruined"].mean(), abs=0.03)
+        np.testing.assert_allclose(
+            np.percentile(reduced["final_balances"], [50, 95]),
+            np.percentile(plain["final_balances"], [50, 95]),
+            rtol=0.1
+        )
+
+    def test_stratified_keeps_win_count_through_blocks(self):
+        """Test stratified paths keep their drawn win count across outcome blocks."""
+        result = simulate_paths(1000.0, 0.001, 1.0, 0.5, 0.0, "fixed", 1000, 600,
+                                seed=3, sampler="stratified")
+        # +1 per win, -1 per loss over 1000 trades: balance = 2 * wins
+        wins = result["final_balances"] / 2.0
+
+        np.testing.assert_allclose(wins, np.round(wins), atol=1e-6)
+        assert wins.mean() == pytest.approx(500, abs=1)
+
+
+class TestSimulateToPrecision:
+    """Test the batched Monte Carlo that runs until the estimates converge."""
+
+    def test_deterministic_scenario_stops_after_first_batches(self):
+        """Test a zero-variance scenario converges far below the cap."""
+        result = simulate_to_precision(1000.0, 0.01, 2.0, 1.0, 0.0, "dynamic", 100, 0.5, 10000)
+
+        assert result["converged"]
+        assert result["iterations"] < 2500
+        assert result["median_stderr"] == 0
+        assert result["final_balances"].shape == (result["iterations"],)
+
+    def test_runs_minimum_paths(self):
+        """Test a loose precision still runs the minimum number of paths."""
+        result = simulate_to_precision(10000.0, 0.02, 2.0, 0.5, 0.0, "fixed", 100, 10.0, 10000, seed=1)
+
+        assert result["converged"]
+        assert result["iterations"] == 500
+
+    @pytest.mark.parametrize("total_trades, fees", [(1, 0.0), (5, 1.0)])
+    def test_discrete_outcomes_converge(self, total_trades, fees):
+        """Test a median between two clusters of outcomes counts as converged instead of running to the cap."""
+        result = simulate_to_precision(10000.0, 0.02, 2.0, 0.5, fees, "dynamic", total_trades, 1.0, 10000, seed=3)
+
+        assert result["converged"]
+        assert result["iterations"] == 500
+
+    def test_dynamic_median_in_log_space(self):
+        """Test a converged compounding run has its median interval within the requested log return."""
+        result = simulate_to_precision(10000.0, 0.01, 2.0, 0.5, 1.0, "dynamic", 2000, 5.0, 50000, seed=5)
+        ordered = np.sort(result["final_balances"])
+        n = ordered.size
+        lo, hi = int(np.floor(n / 2 - 0.98 * np.sqrt(n))), int(np.ceil(n / 2 + 0.98 * np.sqrt(n)))
+
+        assert result["converged"] and result["iterations"] > 500
+        assert np.log(ordered[hi] / ordered[lo]) / 2 <= np.log1p(0.05)
+
+    @pytest.mark.parametrize("sampler", ["antithetic", "stratified"])
+    def test_variance_reduction_stops_sooner(self, sampler):
+        """Test variance-reduced samplers reach the same precision on fewer paths, with the same estimates."""
+        args = (10000.0, 0.02, 1.5, 0.45, 1.0, "fixed", 600, 1.0, 50000)
+        plain = simulate_to_precision(*args, seed=1)
+        reduced = simulate_to_precision(*args, seed=1, sampler=sampler)
+
+        assert plain["converged"] and reduced["converged"]
+        assert reduced["iterations"] < plain["iterations"] * 0.75
+        assert np.median(reduced["final_balances"]) == pytest.approx(np.median(plain["final_balances"]), rel=0.02)
+        assert 1.96 * reduced["median_stderr"] <= np.median(reduced["final_balances"]) * 0.01
+
+    def test_hard_scenario_hits_cap(self):
+        """Test an unreachable precision stops at max_iterations without converging."""
+        result = simulate_to_precision(10000.0, 0.02, 2.0, 0.5, 0.0, "dynamic", 500, 0.01, 1500,
+                                       seed=2)
+
+        assert not result["converged"]
+        assert result["iterations"] == 1500
+        assert result["ruined"].shape == (1500,)
+
+    def test_reaches_requested_precision(self):
+        """Test a converged run reports errors within the requested half-width."""
+        result = simulate_to_precision(10000.0, 0.02, 2.0, 0.5, 0.0, "fixed", 200, 2.0, 50000,
+                                       seed=4)
+        median = np.median(result["final_balances"])
+
+        assert result["converged"]
+        assert 1.96 * result["ruin_stderr"] <= 2.0
+        assert 1.96 * result["median_stderr"] <= median * 0.02
+
+
+class TestPrecisionTracker:
+    """Test the batch bookkeeping behind simulate_to_precision and streaming."""
+
+    def test_design_effect(self):
+        """Test independent draws keep the i.i.d. variance and mirrored pairs are credited up to the floor."""
+        values = np.random.default_rng(2).random(4000)
+        mirrored = np.repeat([0.0, 1.0], 2000).reshape(2, -1).T.ravel()
+
+        assert monte_carlo._design_effect(values, "random", None) == 1.0
+        assert monte_carlo._design_effect(values, "antithetic", None) == pytest.approx(1.0, abs=0.1)
+        assert monte_carlo._design_effect(mirrored, "antithetic", None) == monte_carlo._MIN_DESIGN_EFFECT
+
+    def test_stratified_batches_pair_neighbouring_strata(self):
+        """Test the tracker pairs paths of each stratified batch by win count, within the batch."""
+        tracker = PrecisionTracker(0.01, 1000, max_batch=300, sampler="stratified")
+        while tracker.next_batch:
+            tracker.add(simulate_paths(10000.0, 0.02, 2.0, 0.5, 0.0, "fixed", 100, tracker.next_batch,
+                                       seed=6, first_path=tracker.iterations, sampler="stratified"))
+        pairs = np.concatenate(tracker._pairs)
+        balances = tracker.result()["final_balances"]
+
+        assert "win_counts" not in tracker.result()
+        assert np.all(pairs // 300 == pairs[:, :1] // 300)
+        # Without fees a win is worth 600 more; neighbouring strata end within one on average
+        assert np.abs(np.diff(balances[pairs], axis=1)).mean() <= 600
+
+    def test_capped_batches_continue_one_run(self):
+        """Test batches capped by max_batch stay even and add up to one simulate_paths run."""
+        tracker = PrecisionTracker(0.01, 1000, max_batch=301)
+        sizes = []
+        while tracker.next_batch:
+            sizes.append(tracker.next_batch)
+            tracker.add(simulate_paths(10000.0, 0.02, 2.0, 0.5, 0.0, "dynamic", 200, tracker.next_batch,
+                                       seed=6, first_path=tracker.iterations, day_length=10))
+        whole = simulate_paths(10000.0, 0.02, 2.0, 0.5, 0.0, "dynamic", 200, 1000, seed=6)
+        result = tracker.result()
+
+        assert all(size <= 300 and size % 2 == 0 for size in sizes)
+        assert result["iterations"] == 1000 and not result["converged"]
+        np.testing.assert_array_equal(result["final_balances"], whole["final_balances"])
+        assert result["day_balances"].shape == (1000, 20)
+        whole = simulate_paths(10000.0, 0.02, 2.0, 0.5, 0.0, "dynamic", 200, 1000, seed=6, day_length=10)
+        np.testing.assert_array_equal(result["day_drawdowns"], whole["day_drawdowns"])
+
+
+class TestSweepPaths:
+    """Test the common-random-numbers grid kernel."""
+
+    def test_cells_match_simulate_paths(self):
+        """Test every cell equals a random-sampler run with the same seed."""
+        cells = [(0.4, 0.05, 1.5), (0.55, 0.02, 2.0), (0.4, 0.5, 1.0)]
+        grid = sweep_paths(1000.0, cells, 0.5, "dynamic", 700, 300, seed=9)
+
+        for c, (win_rate, risk, rr) in enumerate(cells):
+            single = simulate_paths(1000.0, risk, rr, win_rate, 0.5, "dynamic", 700, 300, seed=9)
+            for key in ("final_balances", "max_drawdowns", "ruined"):
+                assert np.array_equal(grid[key][c], single[key])
+
+    def test_checkpoint_peaks(self):
+        """Test peaks at each checkpoint match a per-trade replay of the same draws."""
+        checkpoints = [1, 100, 300, 600]
+        grid = sweep_paths(1000.0, [(0.4, 0.1, 2.0)], 0.0, "fixed", 600, 50, seed=5, checkpoints=checkpoints)
+        wins = cell_bits(cell_key(5), np.arange(50), 0, 600) < bernoulli_threshold(0.4)
+
+        for p in range(50):
+            balances = np.array(_loop_balances(1000.0, wins[p], 1000.0, 0.1, 2.0, 0.0, "fixed"))
+            ruin = np.flatnonzero(balances <= 0)
+            if ruin.size:
+                balances[ruin[0]:] = balances[ruin[0]]
+            expected = [max(1000.0, balances[:t].max()) for t in checkpoints]
+            assert grid["peaks"][0, :, p] == pytest.approx(expected)
+
+    def test_common_random_numbers_are_monotone(self):
+        """Test a higher win rate never makes a path worse, since cells share draws."""
+        cells = [(0.45, 0.02, 2.0), (0.5, 0.02, 2.0)]
+        grid = sweep_paths(1000.0, cells, 0.0, "fixed", 500, 400, seed=2)
+
+        assert np.all(grid["final_balances"][1] >= grid["final_balances"][0])
+        assert not np.any(grid["ruined"][1] & ~grid["ruined"][0])
+
+
+class TestBootstrap:
+    """Test resampling recorded R-multiples instead of Bernoulli wins."""
+
+    def test_blocks_replay_consecutive_trades(self):
+        """Test each block replays consecutive (circular) recorded trades."""
+        returns = np.arange(7, dtype=float)
+        drawn = _draw_returns(cell_key(1), np.arange(50), 3, 20, returns, block=4)
+
+        # Trades 3..22: block boundaries at trades 4, 8, 12, ...
+        for row in drawn:
+            for block in np.split(row[1:17], 4):
+                np.testing.assert_array_equal(np.diff(block) % 7, 1)
+        assert set(np.unique(drawn)) == set(returns)
+
+    def test_rr_multiples_match_bernoulli(self):
+        """Test R-multiples of rr / -1 give the win/loss balance arithmetic."""
+        rng = np.random.default_rng(0)
+        wins = rng.random((4, 30)) < 0.5
+        start = np.full(4, 1000.0)
+        for risk_type, fees in (("dynamic", 0.0), ("dynamic", 1.0), ("fixed", 1.0)):
+            bernoulli = _chunk_balances(start, wins, 1000.0, 0.02, 1.5, fees, risk_type)
+            multiples = _chunk_balances(start, np.where(wins, 1.5, -1.0), 1000.0, 0.02, 1.5, fees, risk_type)
+            np.testing.assert_allclose(multiples, bernoulli, rtol=1e-12)
+
+    def test_bootstrap_split_invariant(self):
+        """Test bootstrapped paths don't depend on how the run is split."""
+        returns = np.array([2.0, -1.0, 0.5, -1.0, 3.0, -0.5])
+        args = (1000.0, 0.05, 1.0, 0.5, 0.0, "dynamic", 900)
+        whole = simulate_paths(*args, 400, seed=4, returns=returns, block_length=5)
+        first = simulate_paths(*args, 200, seed=4, returns=returns, block_length=5)
+        second = simulate_paths(*args, 200, seed=4, first_path=200, returns=returns, block_length=5)
+
+        np.testing.assert_array_equal(whole["final_balances"], np.concatenate([first["final_balances"], second["final_balances"]]))
+
+    def test_losing_history_ruins(self):
+        """Test a journal of full losses ruins every fixed-risk path."""
+        paths = simulate_paths(1000.0, 0.5, 2.0, 0.9, 0.0, "fixed", 10, 100, seed=1, returns=np.array([-1.0, -1.5]))
+
+        assert paths["ruined"].all()
+
+
+class TestPortfolio:
+    """Test several strategies trading one shared balance."""
+
+    def test_single_strategy_matches_simulate_paths(self):
+        """Test a one-strategy portfolio replays simulate_paths with the same seed."""
+        portfolio = simulate_portfolio(1000.0, [0.45], [0.05], [2.0], [0.5], [3], 100, "dynamic", 300, seed=9)
+        single = simulate_paths(1000.0, 0.05, 2.0, 0.45, 0.5, "dynamic", 300, 300, seed=9)
+
+        for key in ("final_balances", "max_drawdowns", "ruined"):
+            np.testing.assert_array_equal(portfolio[key], single[key])
+
+    @pytest.mark.parametrize("risk_type,risks", [("fixed", [0.3, 0.2]), ("dynamic", [0.1, 0.2])])
+    def test_contributions_add_up(self, risk_type, risks):
+        """Test each path's per-strategy P&L adds up to its P&L, ruined paths included."""
+        paths = simulate_portfolio(
+            1000.0, [0.4, 0.5], risks, [1.5, 1.0], [0.5, 1.0], [3, 1], 50, risk_type, 500, seed=3,
+            correlation=[[1.0, 0.5], [0.5, 1.0]]
+        )
+
+        assert 0 < paths["ruined"].mean() < 1
+        np.testing.assert_allclose(paths["contributions"].sum(axis=1), paths["final_balances"] - 1000.0, atol=1e-6)
+
+    def test_per_trade_fees(self):
+        """Test a per-trade fee vector compounds like the reference loop."""
+        rng = np.random.default_rng(1)
+        wins = rng.random((3, 40)) < 0.5
+        fees = rng.random(40)
+        start = np.full(3, 1000.0)
+        curve = _chunk_balances(start, wins, 1000.0, 0.02, 1.5, fees, "dynamic")
+
+        for row, outcomes in zip(curve, wins):
+            balance, expected = 1000.0, []
+            for is_win, fee in zip(outcomes, fees):
+                balance += balance * 0.02 * (1.5 if is_win else -1.0) - fee
+                expected.append(balance)
+            np.testing.assert_allclose(row, expected, rtol=1e-12)
+
+    def test_correlation_widens_spread(self):
+        """Test correlated strategies spread outcomes wider and anti-correlated ones narrower."""
+        def spread(rho):
+            paths = simulate_portfolio(
+                1000.0, [0.5, 0.5], [0.01, 0.01], [1.0, 1.0], [0.0, 0.0], [2, 2], 100, "fixed", 2000, seed=5,
+                correlation=[[1.0, rho], [rho, 1.0]]
+            )
+            return paths["final_balances"].std()
+
+        # Fixed risk: the P&L std scales with sqrt(1 + rho)
+        assert spread(-0.8) < spread(0.0) < spread(0.8)
+        assert spread(0.8) / spread(0.0) == pytest.approx(np.sqrt(1.8), rel=0.1)
+
+    def test_correlation_keeps_win_rates(self):
+        """Test the copula leaves each strategy's own win rate unchanged."""
+        paths = simulate_portfolio(
+            1000.0, [0.3, 0.7], [0.001, 0.001], [1.0, 1.0], [0.0, 0.0], [1, 1], 1000, "fixed", 200, seed=2,
+            correlation=[[1.0, 0.9], [0.9, 1.0]]
+        )
+        # Fixed risk of 1 per trade paying 1:1: P&L = 2 * wins - trades
+        win_rates = (paths["contributions"].mean(axis=0) + 1000) / 2000
+
+        np.testing.assert_allclose(win_rates, [0.3, 0.7], atol=0.01)
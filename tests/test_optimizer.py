@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from backend.app.optimizer import kelly_fraction, search_risk, solve_goal, _reach
+
+
+class TestKellyFraction:
+    """Test the analytic Kelly bound."""
+
+    def test_known_values(self):
+        """Test f* = p - (1 - p) / b."""
+        assert kelly_fraction(0.5, 2.0) == pytest.approx(0.25)
+        assert kelly_fraction(0.6, 1.0) == pytest.approx(0.2)
+        assert kelly_fraction(0.3, 2.0) < 0
+
+
+class TestSearchRisk:
+    """Test the constrained Monte Carlo risk search."""
+
+    def test_no_edge_returns_none(self):
+        """Test a negative-expectancy bet is not searched."""
+        assert search_risk(1000.0, 0.3, 2.0, 0.0, "dynamic", 500, 1, max_ruin=1.0) is None
+
+    def test_dynamic_search_stays_below_kelly(self):
+        """Test compounding candidates never exceed full Kelly and the best is near it."""
+        result = search_risk(1000.0, 0.5, 2.0, 0.0, "dynamic", 1000, 1, max_ruin=1.0)
+        rows = result["rows"]
+
+        assert rows[:, 0].max() <= 0.25 + 1e-12
+        assert np.all(np.diff(rows[:, 0]) >= 0)
+        # Unconstrained, the median peaks at (or just below) the Kelly fraction
+        assert rows[result["best"], 0] > 0.1
+
+    def test_drawdown_limit_is_respected(self):
+        """Test the chosen candidate meets the drawdown limit and is the best such one."""
+        result = search_risk(1000.0, 0.5, 2.0, 0.0, "dynamic", 1000, 1, max_ruin=1.0, max_drawdown=20.0)
+        rows = result["rows"]
+        best = rows[result["best"]]
+
+        assert best[3] <= 20.0
+        feasible = rows[(rows[:, 2] <= 1.0) & (rows[:, 3] <= 20.0)]
+        assert best[1] == feasible[:, 1].max()
+
+    def test_impossible_limits(self):
+        """Test no candidate is chosen when even the smallest risk breaks the limits."""
+        result = search_risk(1000.0, 0.55, 1.0, 50.0, "fixed", 500, 1, max_ruin=0.0)
+
+        assert result["best"] is None
+        assert len(result["rows"]) > 0
+
+
+class TestSolveGoal:
+    """Test the batched inverse goal solver."""
+
+    def test_required_win_rate(self):
+        """Test the solution meets the probability and a slightly lower win rate does not."""
+        targets, checkpoints = [1200.0, 1500.0, 1500.0], [300, 300, 900]
+        required, reach = solve_goal(1000.0, "win_rate", None, 0.01, 2.0, 0.0, "dynamic",
+                                     targets, checkpoints, 0.5, 300, seed=4)
+
+        assert np.all(reach >= 0.5)
+        # A higher target needs a better edge, a later deadline a worse one
+        assert required[1] > required[0]
+        assert required[2] < required[1]
+        below = _reach(1000.0, [(w * 0.97, 0.01, 2.0) for w in required], 0.0, "dynamic", 300, 4,
+                       targets, checkpoints, 900)
+        assert np.all(np.diag(below) < 0.5)
+
+    def test_required_risk(self):
+        """Test solving for risk with a fixed win rate."""
+        required, reach = solve_goal(1000.0, "risk_per_trade", 0.55, None, 1.5, 0.0, "fixed",
+                                     [1100.0, 2000.0], [200, 200], 0.8, 300, seed=1)
+
+        assert 0 < required[0] < required[1] <= 1
+        assert np.all(reach >= 0.8)
+
+    def test_out_of_reach(self):
+        """Test a target no value in range can reach is reported as nan."""
+        required, reach = solve_goal(1000.0, "win_rate", None, 0.01, 1.0, 0.0, "fixed",
+                                     [10 ** 6], [50], 0.5, 200, seed=1)
+
+        assert np.isnan(required[0]) and np.isnan(reach[0])
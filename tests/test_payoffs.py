@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from backend.app.models import PayoffDistribution
+from backend.app.payoffs import build_alias_table, payoff_table, sample, signed_outcomes, TABLE_SIZE
+from backend.app.rng import cell_bits, cell_key
+
+
+@pytest.fixture(scope="module")
+def bits():
+    return cell_bits(cell_key(3), np.arange(1000), 0, 1000)
+
+
+class TestAliasTable:
+    """Test Vose alias tables and their constant-time sampling."""
+
+    def test_frequencies_match_weights(self, bits):
+        """Test each value is drawn with its weight's probability."""
+        table = build_alias_table([1.0, 2.0, 3.0], [2, 5, 3])
+        drawn = sample(table, bits)
+
+        for value, expected in ((1.0, 0.2), (2.0, 0.5), (3.0, 0.3)):
+            assert (drawn == value).mean() == pytest.approx(expected, abs=0.002)
+        assert table.mean == pytest.approx(2.1)
+
+    def test_zero_weights_never_drawn(self, bits):
+        """Test padding and zero-weight values never come up."""
+        drawn = sample(build_alias_table([5.0, 7.0], [0, 1]), bits)
+
+        assert np.all(drawn == 7.0)
+        assert build_alias_table([5.0], [1]).threshold.size == TABLE_SIZE
+
+    def test_halves_of_a_draw_are_independent(self, bits):
+        """Test the high and low 32 bits give uncorrelated samples."""
+        table = build_alias_table(np.arange(10.0), np.ones(10))
+        low, high = sample(table, bits), sample(table, bits >> np.uint64(32))
+
+        assert abs(np.corrcoef(low.ravel(), high.ravel())[0, 1]) < 0.005
+
+    def test_signed_outcomes(self, bits):
+        """Test wins read win sizes and losses read negated loss sizes."""
+        table = signed_outcomes(build_alias_table([2.0], [1]), build_alias_table([1.0, 0.5], [0.7, 0.3]))
+        wins = (bits & np.uint64(1)).astype(bool)
+        drawn = sample(table, bits >> np.uint64(32), offset=(~wins) * TABLE_SIZE)
+
+        assert np.all(drawn[wins] == 2.0)
+        assert (drawn[~wins] == -0.5).mean() == pytest.approx(0.3, abs=0.002)
+        assert np.all(np.isin(drawn[~wins], [-1.0, -0.5]))
+
+
+class TestPayoffTable:
+    """Test the discretized payoff distributions."""
+
+    @pytest.mark.parametrize("kind", ["normal", "lognormal"])
+    def test_continuous_moments(self, bits, kind):
+        """Test sampled mean and standard deviation match the request."""
+        drawn = sample(payoff_table(PayoffDistribution(kind=kind, mean=2, std=0.5)), bits)
+
+        assert drawn.mean() == pytest.approx(2.0, abs=0.01)
+        assert drawn.std() == pytest.approx(0.5, abs=0.01)
+        assert drawn.min() >= 0
+
+    def test_normal_truncated_at_zero(self, bits):
+        """Test a wide normal never produces a negative size."""
+        drawn = sample(payoff_table(PayoffDistribution(kind="normal", mean=0.2, std=1)), bits)
+
+        assert drawn.min() >= 0
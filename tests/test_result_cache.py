@@ -0,0 +1,122 @@
+import pytest
+from decimal import Decimal
+
+from backend.app.models import SimulationRequest
+from backend.app.result_cache import make_key, MemoryBackend, SQLiteBackend, ResultCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _request(**overrides):
+    fields = dict(
+        initial_balance=Decimal("10000.00"),
+        capital_utilization=Decimal("10"),
+        risk_per_trade=Decimal("2"),
+        risk_reward_ratio=Decimal("2"),
+        win_rate=Decimal("50"),
+        trades_per_day=5,
+        simulation_days=30,
+    )
+    fields.update(overrides)
+    return SimulationRequest(**fields)
+
+
+class TestMakeKey:
+    """Test content addressing of simulation requests."""
+
+    def test_equivalent_decimals_share_key(self):
+        """Test 2 and 2.00 produce the same key."""
+        assert make_key("sim", _request(risk_per_trade=Decimal("2.00"))) == make_key("sim", _request())
+        assert make_key("sim", _request(fees_per_trade=Decimal("0.00"))) == make_key("sim", _request())
+
+    def test_fields_and_kind_change_key(self):
+        """Test any parameter or the result kind changes the key."""
+        base = make_key("sim", _request())
+
+        assert make_key("sim", _request(win_rate=Decimal("51"))) != base
+        assert make_key("columnar", _request()) != base
+
+
+class TestMemoryBackend:
+    """Test the in-process LRU/TTL backend."""
+
+    def test_ttl_expiry(self):
+        """Test entries disappear after the TTL."""
+        clock = FakeClock()
+        backend = MemoryBackend(max_bytes=1000, ttl=10, timer=clock)
+        backend.set("a", b"x")
+
+        assert backend.get("a") == b"x"
+        clock.now += 11
+        assert backend.get("a") is None
+
+    def test_memory_cap_evicts_least_recently_used(self):
+        """Test the byte budget evicts the least recently used entry."""
+        backend = MemoryBackend(max_bytes=10, ttl=60)
+        backend.set("a", b"1234")
+        backend.set("b", b"1234")
+        backend.get("a")
+        backend.set("c", b"1234")
+
+        assert backend.get("a") == b"1234"
+        assert backend.get("b") is None
+        assert backend.get("c") == b"1234"
+
+    def test_oversized_value_is_skipped(self):
+        """Test a value larger than the whole cache is not stored."""
+        backend = MemoryBackend(max_bytes=4, ttl=60)
+        backend.set("a", b"12345")
+
+        assert backend.get("a") is None
+
+
+class TestSQLiteBackend:
+    """Test the shared file-backed backend."""
+
+    def test_shared_between_instances(self, tmp_path):
+        """Test a value stored by one worker is read by another."""
+        path = str(tmp_path / "cache.sqlite3")
+        SQLiteBackend(path, max_bytes=1000, ttl=60).set("a", b"value")
+
+        assert SQLiteBackend(path, max_bytes=1000, ttl=60).get("a") == b"value"
+
+    def test_ttl_expiry(self, tmp_path):
+        """Test expired rows are not returned."""
+        clock = FakeClock()
+        backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_bytes=1000, ttl=10, timer=clock)
+        backend.set("a", b"value")
+
+        clock.now += 11
+        assert backend.get("a") is None
+
+    def test_memory_cap_evicts_least_recently_used(self, tmp_path):
+        """Test the byte budget drops least recently used rows."""
+        clock = FakeClock()
+        backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_bytes=10, ttl=60, timer=clock)
+        backend.set("a", b"1234")
+        clock.now += 1
+        backend.set("b", b"1234")
+        clock.now += 1
+        backend.get("a")
+        clock.now += 1
+        backend.set("c", b"1234")
+
+        assert backend.get("a") == b"1234"
+        assert backend.get("b") is None
+        assert backend.get("c") == b"1234"
+
+
+def test_result_cache_round_trip(sample_simulation_request):
+    """Test results are pickled through the backend and a disabled cache always misses."""
+    cache = ResultCache(MemoryBackend(max_bytes=10000, ttl=60))
+    key = make_key("sim", sample_simulation_request)
+    cache.set(key, {"status": "success", "median": 1.5})
+
+    assert cache.get(key) == {"status": "success", "median": 1.5}
+    assert ResultCache(None).get(key) is None
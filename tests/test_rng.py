@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from backend.app.rng import cell_key, cell_bits, bernoulli_threshold, stream
+from backend.app.monte_carlo import simulate_paths
+
+
+class TestCellBits:
+    """Test the counter-based per-cell random bits."""
+
+    def test_split_invariant(self):
+        """Test cells are the same however paths and trades are blocked."""
+        key = cell_key(42)
+        whole = cell_bits(key, np.arange(8), 0, 100)
+        assert np.array_equal(whole[:, :40], cell_bits(key, np.arange(8), 0, 40))
+        assert np.array_equal(whole[:, 40:], cell_bits(key, np.arange(8), 40, 60))
+        assert np.array_equal(whole[5:], cell_bits(key, np.arange(5, 8), 0, 100))
+
+    def test_seeds_differ(self):
+        """Test neighbouring seeds give unrelated bits."""
+        a = cell_bits(cell_key(1), np.arange(4), 0, 64)
+        b = cell_bits(cell_key(2), np.arange(4), 0, 64)
+        assert not np.any(a == b)
+
+    def test_bernoulli_threshold_rate(self):
+        """Test bits below the threshold occur at the requested rate."""
+        bits = cell_bits(cell_key(7), np.arange(200), 0, 1000)
+        assert (bits < bernoulli_threshold(0.3)).mean() == pytest.approx(0.3, abs=0.005)
+        assert bernoulli_threshold(0.0) == 0
+        assert bernoulli_threshold(1.0) == np.uint64(2 ** 64 - 1)
+
+    def test_streams_reproducible(self):
+        """Test a (seed, key) stream is reproducible and keys are independent."""
+        assert np.array_equal(stream(3, 0).random(5), stream(3, 0).random(5))
+        assert not np.array_equal(stream(3, 0).random(5), stream(3, 1).random(5))
+
+
+class TestSplitInvariance:
+    """Test simulated paths don't depend on how a run is split."""
+
+    @pytest.mark.parametrize("sampler", ["random", "antithetic"])
+    def test_split_run_is_bit_identical(self, sampler):
+        """Test paths [0, 1000) equal [0, 500) + [500, 1000) bit for bit."""
+        args = (1000.0, 0.02, 2.0, 0.45, 0.5, "dynamic", 1500)
+        whole = simulate_paths(*args, 1000, seed=11, sampler=sampler, day_length=50)
+        first = simulate_paths(*args, 500, seed=11, sampler=sampler)
+        second = simulate_paths(*args, 500, seed=11, sampler=sampler, first_path=500)
+        for key in ("final_balances", "max_drawdowns", "ruined"):
+            assert np.array_equal(whole[key], np.concatenate([first[key], second[key]]))
+
+    def test_same_seed_same_result(self):
+        """Test a seed reproduces every sampler's run."""
+        args = (1000.0, 0.05, 1.5, 0.4, 1.0, "fixed", 800, 300)
+        for sampler in ("random", "antithetic", "stratified"):
+            a = simulate_paths(*args, seed=5, sampler=sampler, day_length=20)
+            b = simulate_paths(*args, seed=5, sampler=sampler, day_length=20)
+            assert all(np.array_equal(a[k], b[k]) for k in a)
@@ -0,0 +1,48 @@
+import pytest
+
+from backend.app import symbols
+from backend.app.symbols import SYMBOL_TABLE, normalize_symbol
+
+
+class TestNormalizeSymbol:
+    """Test mapping exchange symbols to yfinance tickers."""
+
+    @pytest.mark.parametrize("symbol,ticker", [
+        ("BINANCE:BTCUSDT", "BTC-USD"),
+        ("PEPE24478USDT", "PEPE-USD"),
+        ("sol", "SOL-USD"),
+        (" ethusdt ", "ETH-USD"),
+        ("XAUUSD", "GC=F"),
+        ("SILVER", "SI=F"),
+        ("USOIL", "CL=F"),
+        ("WTI", "CL=F"),
+        ("EURUSD", "EURUSD=X"),
+        ("USDJPY=X", "USDJPY=X"),
+        ("GC=F", "GC=F"),
+        ("BTC-USD", "BTC-USD"),
+        ("AAPL", "AAPL"),
+    ])
+    def test_normalize_symbol(self, symbol, ticker):
+        """Test crypto, commodity, forex, native yfinance and stock symbols."""
+        assert normalize_symbol(symbol) == ticker
+
+    def test_table_matches_rules(self):
+        """Test the precomputed table agrees with the resolver for every entry."""
+        assert len(SYMBOL_TABLE) > 100
+        for symbol, ticker in SYMBOL_TABLE.items():
+            assert symbols._resolve(symbol) == ticker
+
+    def test_unknown_symbols_are_memoized(self):
+        """Test symbols outside the table are resolved once."""
+        symbols._resolve_unknown.cache_clear()
+        assert "LINKUSDT" not in SYMBOL_TABLE
+        assert normalize_symbol("LINKUSDT") == "LINK-USD"
+        assert normalize_symbol("linkusdt") == "LINK-USD"
+        info = symbols._resolve_unknown.cache_info()
+        assert (info.misses, info.hits) == (1, 1)
+
+    def test_known_symbols_skip_resolver(self):
+        """Test table hits never reach the memoized resolver."""
+        symbols._resolve_unknown.cache_clear()
+        normalize_symbol("BINANCE:ETHUSDT")
+        assert symbols._resolve_unknown.cache_info().currsize == 0
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from datetime import datetime, timezone
+from decimal import Decimal
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, create_engine
+
+from backend.app.models import ManualTrade
+from backend.app.trade_history import TradeHistoryCache
+
+
+@pytest.fixture
+def db_engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    # SQLModel.metadata.create_all is patched out by conftest
+    ManualTrade.__table__.create(engine)
+    return engine
+
+
+def _add(engine, *pnls, user_id=1):
+    with Session(engine) as session:
+        for pnl in pnls:
+            session.add(ManualTrade(tenant_id=1, user_id=user_id, symbol="BTCUSDT", pnl=Decimal(str(pnl)), is_win=pnl > 0,
+                                    trade_date=datetime.now(timezone.utc)))
+        session.commit()
+
+
+class TestTradeHistoryCache:
+    """Test the per-user, incrementally synced returns vectors."""
+
+    def test_returns_in_r_multiples(self, db_engine):
+        """Test P&L is scaled so the average loss is 1R, oldest trade first."""
+        _add(db_engine, 100, -50, 200, -150)
+        cache = TradeHistoryCache()
+        with Session(db_engine) as session:
+            returns, _ = cache.returns(session, 1, 1)
+
+        np.testing.assert_allclose(returns, [1.0, -0.5, 2.0, -1.5])
+
+    def test_only_wins_use_average_size(self, db_engine):
+        """Test a journal without losses is scaled by the average absolute P&L."""
+        _add(db_engine, 10, 30)
+        with Session(db_engine) as session:
+            returns, _ = TradeHistoryCache().returns(session, 1, 1)
+
+        np.testing.assert_allclose(returns, [0.5, 1.5])
+
+    def test_picks_up_new_rows_incrementally(self, db_engine):
+        """Test later runs see new rows (from any process) and get a new version."""
+        _add(db_engine, *([10, -10] * 50))
+        cache = TradeHistoryCache()
+        with Session(db_engine) as session:
+            first, version = cache.returns(session, 1, 1)
+        _add(db_engine, 40, -20)
+        _add(db_engine, 999, user_id=2)
+        with Session(db_engine) as session:
+            second, new_version = cache.returns(session, 1, 1)
+
+        assert len(first) == 100 and len(second) == 102
+        assert new_version != version
+        average_loss = (50 * 10 + 20) / 51
+        np.testing.assert_allclose(second[-2:], [40 / average_loss, -20 / average_loss])
+
+    def test_record_updates_cached_users_only(self, db_engine):
+        """Test record() syncs a cached journal and ignores users never simulated."""
+        _add(db_engine, 10, -10)
+        cache = TradeHistoryCache()
+        with Session(db_engine) as session:
+            cache.returns(session, 1, 1)
+            for user_id in (1, 2):
+                trade = ManualTrade(tenant_id=1, user_id=user_id, symbol="ETHUSDT", pnl=Decimal("5"), is_win=True,
+                                    trade_date=datetime.now(timezone.utc))
+                session.add(trade)
+                session.commit()
+                session.refresh(trade)
+                cache.record(session, trade)
+
+        assert cache._journals[(1, 1)].size == 3
+        assert (1, 2) not in cache._journals